@@ -0,0 +1,58 @@
+"""
+Thông lượng chấm điểm lại hàng loạt (dòng/s) theo số tiến trình, so với gọi predict từng dòng như chatbot.
+
+    cd ai/v2
+    python -m diagnosis.train --version bench
+    python benchmarks/bench_batch_rescoring.py --rows 200000 --workers 0 1 2 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_streaming_loader import generate_matrix, peak_rss_mb
+from diagnosis.batch import DEFAULT_CHUNK_ROWS, rescore
+from diagnosis.numpy_backend import load_numpy_model
+
+
+def per_row_rows_per_second(csv_path, version, n_iter, sample_rows=500):
+    # Cách cũ: mỗi hồ sơ một lần predict (như predict_with_uncertainty trong vòng lặp chatbot)
+    model, metadata = load_numpy_model(version)
+    X = pd.read_csv(csv_path, nrows=sample_rows)[metadata['symptom_codes']].to_numpy(dtype=np.float32)
+    start = time.perf_counter()
+    for row in X:
+        model.predict(row, n_iter=n_iter)
+    return len(X) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--n-iter', type=int, default=100)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / 'encounters.csv'
+        generate_matrix(input_path, args.rows)
+        print(f"{args.rows} dòng, n_iter={args.n_iter}, chunk={args.chunk_rows}, {os.cpu_count()} CPU")
+        print(f"Từng dòng (predict mỗi hồ sơ): {per_row_rows_per_second(input_path, args.version, args.n_iter):,.0f} dòng/s")
+        # RSS đỉnh của tiến trình cha (đọc file + chunk đang chờ ghi); mỗi tiến trình con chỉ giữ mô hình và một chunk
+        print(f"{'Tiến trình':>10}{'Giây':>10}{'Dòng/s':>14}{'RSS đỉnh (MB)':>16}")
+        for workers in args.workers:
+            stats = rescore(input_path, Path(tmp) / 'scores.csv', version=args.version, n_iter=args.n_iter,
+                            workers=workers, chunk_rows=args.chunk_rows)
+            print(f"{workers:>10}{stats['seconds']:>10.1f}{stats['rows_per_second']:>14,.0f}{peak_rss_mb():>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Tìm k ca tương tự: vector bit-packed uint64 + popcount so với quét mảng float32 như dữ liệu huấn luyện.
+
+Case base lớn được sinh từ disease_symptoms_matrix.csv (lấy mẫu dòng gốc, lật ngẫu nhiên một ít triệu chứng).
+
+    cd ai/v2
+    python benchmarks/bench_case_index.py --cases 53 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnosis.cases import CaseIndex, pack_symptom_vectors
+from diagnosis.data import load_data
+
+
+def synthetic_cases(X_train, y_train, num_cases, flip_probability=0.02, seed=0):
+    if num_cases <= len(X_train):
+        return X_train[:num_cases], y_train[:num_cases]
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(X_train), num_cases)
+    flips = rng.random((num_cases, X_train.shape[1])) < flip_probability
+    return np.logical_xor(X_train[index], flips).astype(np.float32), y_train[index]
+
+
+def dense_nearest(cases, query, k):
+    distances = np.abs(cases - query).sum(axis=1)
+    candidates = np.argpartition(distances, k - 1)[:k]
+    return candidates[np.argsort(distances[candidates], kind='stable')]
+
+
+def time_per_query(func, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=int, nargs='+', default=[53, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--k', type=int, default=3)
+    args = parser.parse_args()
+
+    X_train, y_train, catalog = load_data()
+    queries = X_train[np.random.default_rng(1).integers(0, len(X_train), args.queries)]
+    has_bitwise_count = hasattr(np, 'bitwise_count')
+
+    print(f"k={args.k}, NumPy {np.__version__}")
+    print(f"{'Số ca':>10}{'float32 (MB)':>14}{'packed (MB)':>13}{'float32 L1':>13}{'Hamming':>10}"
+          f"{'Jaccard':>10}{'Hamming (bảng tra)':>20}   (µs / truy vấn)")
+    for num_cases in args.cases:
+        X_cases, y_cases = synthetic_cases(X_train, y_train, num_cases)
+        index = CaseIndex.from_training_data(catalog, X_cases, y_cases)
+        packed_queries = [pack_symptom_vectors(q) for q in queries]
+        repeat = max(1, 200_000 // num_cases)
+
+        # Cùng tập k ca gần nhất (khoảng cách Hamming = L1 trên vector 0/1)
+        for query, packed in zip(queries, packed_queries):
+            dense = dense_nearest(X_cases, query, args.k)
+            _, distances = index.nearest(packed, args.k)
+            assert np.array_equal(np.abs(X_cases[dense] - query).sum(axis=1), distances)
+
+        dense_us = time_per_query(lambda q: dense_nearest(X_cases, q, args.k), queries, repeat)
+        hamming_us = time_per_query(lambda q: index.nearest(q, args.k), packed_queries, repeat)
+        jaccard_us = time_per_query(lambda q: index.nearest(q, args.k, 'jaccard'), packed_queries, repeat)
+        # Đường dự phòng cho NumPy < 2.0 (không có np.bitwise_count)
+        if has_bitwise_count:
+            bitwise_count = np.bitwise_count
+            del np.bitwise_count
+        try:
+            table_us = time_per_query(lambda q: index.nearest(q, args.k), packed_queries, repeat)
+        finally:
+            if has_bitwise_count:
+                np.bitwise_count = bitwise_count
+        print(f"{num_cases:>10}{X_cases.nbytes / 2**20:>14.2f}{index.nbytes / 2**20:>13.2f}{dense_us:>13.1f}"
+              f"{hamming_us:>10.1f}{jaccard_us:>10.1f}{table_us:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+So sánh backend NumPy với TensorFlow: sai khác mean/std của MC dropout,
+thời gian khởi động và bộ nhớ (RSS) của một worker.
+
+    cd ai/v2
+    python -m diagnosis.train --version bench
+    python benchmarks/bench_numpy_backend.py --version bench
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnosis.artifacts import MODELS_DIR
+from diagnosis.data import load_data
+
+# Chạy trong tiến trình con để đo từ trạng thái "lạnh", giống một worker gunicorn mới
+WORKER_SNIPPET = '''
+import json, sys, time
+start = time.perf_counter()
+from diagnosis.service import load_engine
+engine, metadata = load_engine(sys.argv[1], sys.argv[2] or None, sys.argv[3])
+engine.predict([0.0] * len(metadata['symptom_codes']), n_iter=100)
+print(json.dumps({
+    'startup_seconds': time.perf_counter() - start,
+    # VmHWM: RSS tối đa của tiến trình (ru_maxrss bị kế thừa qua exec từ tiến trình cha)
+    'max_rss_mb': int(next(l for l in open('/proc/self/status') if l.startswith('VmHWM')).split()[1]) / 1024,
+    'tensorflow_loaded': 'tensorflow' in sys.modules,
+}))
+'''
+
+
+def measure_worker(backend, version, models_dir):
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER_SNIPPET, backend, version or '', str(models_dir)],
+        cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare_outputs(version, models_dir, n_iter, tolerance):
+    from diagnosis.model import load_model_artifact, predict_with_uncertainty
+    from diagnosis.numpy_backend import load_numpy_model
+
+    X_train = load_data()[0]
+    tf_model, _ = load_model_artifact(version, models_dir)
+    numpy_model, _ = load_numpy_model(version, models_dir, seed=0)
+
+    tf_mean, tf_std = predict_with_uncertainty(tf_model, X_train, n_iter=n_iter)
+    np_mean, np_std = numpy_model.predict(X_train, n_iter=n_iter)
+    mean_diff = float(np.abs(tf_mean - np_mean).max())
+    std_diff = float(np.abs(tf_std - np_std).max())
+    same_top = float((tf_mean.argmax(axis=1) == np_mean.argmax(axis=1)).mean())
+
+    print(f"Sai khác lớn nhất trên {X_train.shape[0]} mẫu (n_iter={n_iter}): "
+          f"mean={mean_diff:.4f}, std={std_diff:.4f}, trùng chẩn đoán top-1={same_top:.1%}")
+    if max(mean_diff, std_diff) > tolerance:
+        raise SystemExit(f"Vượt quá sai số cho phép {tolerance}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--n-iter', type=int, default=5000)
+    parser.add_argument('--tolerance', type=float, default=0.02)
+    args = parser.parse_args()
+
+    compare_outputs(args.version, args.models_dir, args.n_iter, args.tolerance)
+
+    print(f"\n{'backend':>10} | {'khởi động (s)':>13} | {'RSS tối đa (MB)':>15} | {'nạp TensorFlow':>14}")
+    for backend in ('tensorflow', 'numpy'):
+        result = measure_worker(backend, args.version, args.models_dir)
+        print(f"{backend:>10} | {result['startup_seconds']:>13.2f} | {result['max_rss_mb']:>15.1f} | "
+              f"{str(result['tensorflow_loaded']):>14}")
+
+
+if __name__ == "__main__":
+    main()
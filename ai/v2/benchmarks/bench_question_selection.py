@@ -0,0 +1,85 @@
+"""
+So sánh số câu hỏi mỗi phiên giữa thứ tự CSV (sequential) và chọn theo lượng thông tin (information_gain).
+
+Mỗi dòng của disease_symptoms_matrix.csv là một bệnh nhân giả lập: không mô tả gì lúc đầu, trả lời
+Có/Không đúng theo dòng đó, câu hỏi làm rõ được trả lời bằng một câu tự do.
+
+    cd ai/v2
+    python -m diagnosis.train --version bench
+    python benchmarks/bench_question_selection.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnosis.data import load_data
+from diagnosis.questions import QUESTION_STRATEGIES, create_question_selector
+from diagnosis.service import load_engine
+from diagnosis.session import ChatbotSessionEngine, InMemorySessionStore
+
+
+class CountingPredictor:
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.calls = 0
+
+    def predict(self, x_input, n_iter=100):
+        self.calls += 1
+        return self.predictor.predict(x_input, n_iter=n_iter)
+
+
+def simulate(engine, catalog, symptom_row):
+    present = {code for code, value in zip(catalog.main_codes, symptom_row) if value}
+    response = engine.start("")
+    main_questions = turns = 0
+    while not response['done']:
+        code = response['question']['code']
+        turns += 1
+        if catalog.is_main(code):
+            main_questions += 1
+            reply = "có" if code in present else "không"
+        else:
+            reply = "thỉnh thoảng"
+        response = engine.answer(response['session_id'], reply)
+    return main_questions, turns, response['diagnosis']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backend', choices=['numpy', 'tensorflow'], default='numpy')
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    parser.add_argument('--n-iter', type=int, default=100)
+    args = parser.parse_args()
+
+    X_train, y_train, catalog = load_data()
+    labels = [catalog.diseases[i] for i in y_train.argmax(axis=1)]
+    predictor, _ = load_engine(args.backend, args.version)
+
+    print(f"{len(X_train)} bệnh nhân giả lập, {len(catalog.main_codes)} triệu chứng chính, n_iter={args.n_iter}")
+    print(f"{'Chiến lược':<18}{'Câu hỏi chính':>15}{'Tổng lượt':>12}{'Lượt max':>10}{'Lần suy luận':>14}"
+          f"{'Đúng nhãn':>11}{'ms/phiên':>10}")
+    for strategy in QUESTION_STRATEGIES:
+        counter = CountingPredictor(predictor)
+        engine = ChatbotSessionEngine(
+            catalog, counter, InMemorySessionStore(), n_iter=args.n_iter,
+            selector=create_question_selector(catalog, strategy, X_train, y_train),
+        )
+        main_questions, turns, correct = [], [], []
+        start = time.perf_counter()
+        for symptom_row, label in zip(X_train, labels):
+            n_main, n_turns, diagnosis = simulate(engine, catalog, symptom_row)
+            main_questions.append(n_main)
+            turns.append(n_turns)
+            correct.append(diagnosis == label)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(X_train)
+        print(f"{strategy:<18}{np.mean(main_questions):>15.1f}{np.mean(turns):>12.1f}{max(turns):>10}"
+              f"{counter.calls / len(X_train):>14.2f}{np.mean(correct):>11.1%}{elapsed_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
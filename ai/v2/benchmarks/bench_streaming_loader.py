@@ -0,0 +1,126 @@
+"""
+Bộ nhớ đỉnh và tốc độ đọc một epoch: nạp toàn bộ (load_training_data) so với đọc dạng luồng
+(CSV theo chunk, .npy bit-packed / uint8 memory-map), ở nhiều kích thước dữ liệu.
+
+Ma trận lớn được sinh từ disease_symptoms_matrix.csv: lấy mẫu các dòng gốc và lật ngẫu nhiên một ít triệu chứng.
+Mỗi phép đo chạy trong một tiến trình riêng để VmHWM (bộ nhớ đỉnh) không bị lẫn.
+
+    cd ai/v2
+    python benchmarks/bench_streaming_loader.py --rows 250000 1000000 4000000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnosis.data import DISEASE_SYMPTOMS_MATRIX_CSV, load_catalog, load_training_data
+from diagnosis.dataset import (
+    DEFAULT_BATCH_SIZE, DEFAULT_SHUFFLE_BUFFER, MatrixDataset, convert_matrix, iter_batches, iter_csv_chunks,
+)
+
+MODES = ('in_memory', 'csv_stream', 'packed', 'dense', 'packed_tf')
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def generate_matrix(path, rows, flip_probability=0.02, chunk_rows=200_000, seed=0):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(Path(__file__).resolve().parent.parent / DISEASE_SYMPTOMS_MATRIX_CSV)
+    diseases = base['TenBenh'].to_numpy()
+    symptoms = base.drop(columns=['TenBenh']).to_numpy(dtype=np.uint8)
+    header = True
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        index = rng.integers(0, len(base), n)
+        values = symptoms[index] ^ (rng.random((n, symptoms.shape[1])) < flip_probability)
+        chunk = pd.DataFrame(values.astype(np.uint8), columns=base.columns[1:])
+        chunk.insert(0, 'TenBenh', diseases[index])
+        chunk.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+
+
+def measure(mode, csv_path, dataset_root):
+    catalog = load_catalog()
+    num_classes = len(catalog.diseases)
+    rng = np.random.default_rng(0)
+    if mode == 'packed_tf':
+        import tensorflow as tf  # Không tính thời gian nạp TensorFlow vào epoch
+    rows = 0
+    start = time.perf_counter()
+    if mode == 'in_memory':
+        X_train, y_train = load_training_data(catalog, Path(csv_path).parent)
+        rows = len(X_train)
+    elif mode == 'csv_stream':
+        for X, y in iter_batches(iter_csv_chunks(catalog, csv_path, DEFAULT_SHUFFLE_BUFFER), num_classes,
+                                 DEFAULT_BATCH_SIZE, rng):
+            rows += len(X)
+    elif mode in ('packed', 'dense'):
+        dataset = MatrixDataset(Path(dataset_root) / mode)
+        for X, y in iter_batches(dataset.iter_blocks(DEFAULT_SHUFFLE_BUFFER, rng), num_classes,
+                                 DEFAULT_BATCH_SIZE, rng):
+            rows += len(X)
+    elif mode == 'packed_tf':
+        from diagnosis.dataset import make_tf_dataset, streaming_batches
+
+        batches, _, num_batches = streaming_batches(catalog, dataset_dir=Path(dataset_root) / 'packed', seed=0)
+        for X, y in make_tf_dataset(batches, len(catalog.main_codes), num_classes, num_batches):
+            rows += int(X.shape[0])
+    elapsed = time.perf_counter() - start
+    print(f"{rows} {elapsed:.3f} {peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[250_000, 1_000_000, 4_000_000])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--measure', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--dataset-root', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.csv, args.dataset_root)
+        return
+
+    catalog = load_catalog()
+    print(f"{'Số dòng':>10} {'Cách đọc':<12}{'Giây/epoch':>12}{'Dòng/s':>14}{'RSS đỉnh (MB)':>15}{'Trên đĩa (MB)':>15}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Thư mục tạm chứa cả symptoms.csv / diseases.csv để load_training_data đọc được
+            for name in ('symptoms.csv', 'diseases.csv'):
+                os.symlink(Path(__file__).resolve().parent.parent / name, Path(tmp) / name)
+            csv_path = Path(tmp) / DISEASE_SYMPTOMS_MATRIX_CSV
+            generate_matrix(csv_path, rows)
+            sizes = {'in_memory': csv_path.stat().st_size, 'csv_stream': csv_path.stat().st_size}
+            for fmt in ('packed', 'dense'):
+                convert_matrix(catalog, csv_path, Path(tmp) / fmt, fmt)
+                sizes[fmt] = sum(f.stat().st_size for f in (Path(tmp) / fmt).iterdir())
+            sizes['packed_tf'] = sizes['packed']
+
+            for mode in args.modes:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--measure', mode, '--csv', str(csv_path), '--dataset-root', tmp],
+                    check=True, capture_output=True, text=True,
+                ).stdout.split()
+                n, seconds, rss = int(output[-3]), float(output[-2]), float(output[-1])
+                print(f"{n:>10} {mode:<12}{seconds:>12.2f}{n / seconds:>14,.0f}{rss:>15.1f}"
+                      f"{sizes[mode] / 2**20:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+So sánh bộ so khớp Aho-Corasick với cách cũ (re.search cho từng pattern \\b...\\b)
+trên một danh mục tổng hợp 500 triệu chứng.
+
+    cd ai/v2
+    python benchmarks/bench_symptom_matcher.py
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnosis.data import load_catalog
+from diagnosis.matcher import SymptomKeywordMatcher
+from diagnosis.text import extract_initial_symptoms_from_text
+
+SYLLABLES = ['đau', 'nhức', 'sốt', 'ho', 'mệt', 'khó', 'thở', 'ngứa', 'sưng', 'đỏ', 'rát', 'tê', 'mỏi',
+             'buồn', 'nôn', 'chóng', 'mặt', 'lạnh', 'nóng', 'khô', 'mờ', 'ù', 'tai', 'bụng', 'ngực', 'đầu']
+
+
+def extract_initial_symptoms_from_text_legacy(text_input, tu_khoa_map, ma_trieu_chung_chinh_list):
+    # Cài đặt cũ (chỉ giữ lại để so sánh)
+    detected_symptoms_values = {ma_tc: 0 for ma_tc in ma_trieu_chung_chinh_list}
+    text_lower = text_input.lower()
+    for ma_tc, keyword_patterns in tu_khoa_map.items():
+        if ma_tc in detected_symptoms_values:
+            for pattern in keyword_patterns:
+                if re.search(pattern, text_lower):
+                    detected_symptoms_values[ma_tc] = 1
+                    break
+    return detected_symptoms_values
+
+
+def synthetic_catalog(num_symptoms, keywords_per_symptom, rng):
+    keywords, seen = {}, set()
+    for i in range(num_symptoms):
+        code = f'TC{i:04d}'
+        keywords[code] = []
+        while len(keywords[code]) < keywords_per_symptom:
+            keyword = ' '.join(rng.sample(SYLLABLES, rng.randint(2, 4)))
+            if keyword not in seen:
+                seen.add(keyword)
+                keywords[code].append(keyword)
+    return keywords
+
+
+def synthetic_texts(keywords, num_texts, words_per_text, rng):
+    all_keywords = [kw for kws in keywords.values() for kw in kws]
+    texts = []
+    for _ in range(num_texts):
+        words = [rng.choice(SYLLABLES) for _ in range(words_per_text)]
+        for _ in range(rng.randint(1, 4)):
+            words.insert(rng.randrange(len(words)), rng.choice(all_keywords) + ',')
+        texts.append('Tôi bị ' + ' '.join(words))
+    return texts
+
+
+def time_per_text(func, texts, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeats * len(texts)) * 1e6
+
+
+def run(name, keywords, texts, repeats):
+    codes = list(keywords)
+    regex_map = {code: [r'\b' + kw + r'\b' for kw in kws] for code, kws in keywords.items()}
+
+    start = time.perf_counter()
+    matcher = SymptomKeywordMatcher(keywords)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    for text in texts:
+        legacy = extract_initial_symptoms_from_text_legacy(text, regex_map, codes)
+        if legacy != extract_initial_symptoms_from_text(text, matcher, codes):
+            raise SystemExit(f"Kết quả khác nhau với câu: {text!r}")
+
+    legacy_us = time_per_text(lambda t: extract_initial_symptoms_from_text_legacy(t, regex_map, codes), texts, repeats)
+    matcher_us = time_per_text(lambda t: extract_initial_symptoms_from_text(t, matcher, codes), texts, repeats)
+    num_keywords = sum(len(kws) for kws in keywords.values())
+    print(f"{name:>24} | {len(codes):>5} | {num_keywords:>6} | {legacy_us:>12.1f} | {matcher_us:>12.1f} | "
+          f"{legacy_us / matcher_us:>7.1f}x | {build_ms:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--symptoms', type=int, default=500)
+    parser.add_argument('--keywords-per-symptom', type=int, default=3)
+    parser.add_argument('--texts', type=int, default=200)
+    parser.add_argument('--words-per-text', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'danh mục':>24} | {'mã':>5} | {'từ khóa':>6} | {'cũ (µs/câu)':>12} | {'mới (µs/câu)':>12} | "
+          f"{'tăng tốc':>8} | {'dựng (ms)':>9}")
+
+    real_keywords = load_catalog().matcher.primary_keywords
+    real_texts = synthetic_texts(real_keywords, args.texts, args.words_per_text, rng)
+    run('symptoms.csv', real_keywords, real_texts, args.repeats)
+
+    keywords = synthetic_catalog(args.symptoms, args.keywords_per_symptom, rng)
+    texts = synthetic_texts(keywords, args.texts, args.words_per_text, rng)
+    run(f'tổng hợp {args.symptoms} triệu chứng', keywords, texts, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
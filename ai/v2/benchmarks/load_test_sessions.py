@@ -0,0 +1,110 @@
+"""
+Load test máy trạng thái hội thoại: 1.000 phiên đồng thời được xen kẽ trên một tiến trình.
+
+Mỗi bệnh nhân giả lập lấy một dòng của disease_symptoms_matrix.csv làm "sự thật", mô tả
+1-2 triệu chứng ban đầu rồi trả lời Có/Không theo dòng đó. Các lượt của mọi phiên được
+trộn ngẫu nhiên và gửi qua một thread pool, nên phiên nào cũng có thể bị gián đoạn giữa chừng.
+
+    cd ai/v2
+    python -m diagnosis.train --version bench
+    python benchmarks/load_test_sessions.py --sessions 1000
+    python benchmarks/load_test_sessions.py --store redis   # dùng REDIS_URL
+"""
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagnosis.data import load_data
+from diagnosis.questions import DEFAULT_QUESTION_STRATEGY, QUESTION_STRATEGIES, create_question_selector
+from diagnosis.service import load_engine
+from diagnosis.session import ChatbotSessionEngine, create_session_store
+
+
+class SimulatedPatient:
+    def __init__(self, catalog, symptom_row, rng):
+        self.present = {code for code, value in zip(catalog.main_codes, symptom_row) if value}
+        described = rng.sample(sorted(self.present), min(len(self.present), rng.randint(1, 2)))
+        keywords = [catalog.symptoms[code].primary_keywords[0] for code in described
+                    if catalog.symptoms[code].primary_keywords]
+        self.opening = "Tôi bị " + " và ".join(keywords) if keywords else "Tôi thấy không khỏe"
+
+    def reply(self, question_code):
+        if question_code in self.present:
+            return "có"
+        if '_' in question_code: # câu hỏi làm rõ
+            return "thỉnh thoảng"
+        return "không"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--store', choices=['memory', 'redis'], default='memory')
+    parser.add_argument('--backend', choices=['numpy', 'tensorflow'], default='numpy')
+    parser.add_argument('--strategy', choices=QUESTION_STRATEGIES, default=DEFAULT_QUESTION_STRATEGY)
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    X_train, y_train, catalog = load_data()
+    predictor, _ = load_engine(args.backend, args.version)
+    engine = ChatbotSessionEngine(
+        catalog, predictor, create_session_store(args.store),
+        selector=create_question_selector(catalog, args.strategy, X_train, y_train),
+    )
+
+    patients, latencies_ms = {}, []
+
+    def timed(func, *func_args):
+        start = time.perf_counter()
+        response = func(*func_args)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        return response
+
+    start = time.perf_counter()
+    # Mở toàn bộ phiên trước để tất cả cùng "đang hoạt động"
+    active = {}
+    for _ in range(args.sessions):
+        patient = SimulatedPatient(catalog, X_train[rng.randrange(len(X_train))], rng)
+        response = timed(engine.start, patient.opening)
+        patients[response['session_id']] = patient
+        if not response['done']:
+            active[response['session_id']] = response['question']['code']
+    peak_active = len(active)
+
+    completed = args.sessions - len(active)
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        while active:
+            # Mỗi vòng: mỗi phiên còn mở trả lời đúng một lượt, theo thứ tự ngẫu nhiên
+            round_ids = list(active)
+            rng.shuffle(round_ids)
+            replies = [(sid, patients[sid].reply(active[sid])) for sid in round_ids]
+            for response in pool.map(lambda item: timed(engine.answer, *item), replies):
+                if response['done']:
+                    del active[response['session_id']]
+                    completed += 1
+                else:
+                    active[response['session_id']] = response['question']['code']
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies_ms)
+    print(f"Phiên: {completed}/{args.sessions} hoàn tất, tối đa {peak_active} phiên mở đồng thời "
+          f"(kho: {args.store}, backend: {args.backend}, "
+          f"chọn câu hỏi: {args.strategy}, {args.threads} luồng)")
+    print(f"Lượt: {len(latencies)} trong {elapsed:.2f}s = {len(latencies) / elapsed:.0f} lượt/s, "
+          f"{len(latencies) / args.sessions:.1f} lượt/phiên")
+    print(f"Độ trễ mỗi lượt (ms): p50={np.percentile(latencies, 50):.3f}, "
+          f"p99={np.percentile(latencies, 99):.3f}, max={latencies.max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
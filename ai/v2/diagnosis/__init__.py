@@ -0,0 +1,6 @@
+"""
+Package chẩn đoán sơ bộ dựa trên triệu chứng (robot v2).
+
+Các module con được import trực tiếp (diagnosis.data, diagnosis.model, ...) để
+tránh nạp TensorFlow khi không cần thiết.
+"""
@@ -0,0 +1,40 @@
+"""
+Vị trí và metadata của các artifact mô hình đã huấn luyện (không phụ thuộc TensorFlow).
+"""
+import json
+import os
+from pathlib import Path
+
+from .data import DATA_DIR
+
+# Mỗi phiên bản nằm trong MODELS_DIR/<version>/, file LATEST trỏ tới phiên bản mới nhất
+MODELS_DIR = Path(os.environ.get('DIAGNOSIS_MODELS_DIR', DATA_DIR / 'models'))
+MODEL_FILENAME = 'model.keras'
+NUMPY_WEIGHTS_FILENAME = 'model.npz'
+METADATA_FILENAME = 'metadata.json'
+LATEST_FILENAME = 'LATEST'
+
+
+def resolve_model_version(version=None, models_dir=MODELS_DIR):
+    if version:
+        return version
+    latest_file = Path(models_dir) / LATEST_FILENAME
+    if not latest_file.exists():
+        raise FileNotFoundError(
+            f"Không tìm thấy artifact mô hình trong {models_dir}. Hãy chạy 'python -m diagnosis.train' trước."
+        )
+    return latest_file.read_text().strip()
+
+
+def get_artifact_dir(version=None, models_dir=MODELS_DIR):
+    return Path(models_dir) / resolve_model_version(version, models_dir)
+
+
+def load_model_metadata(version=None, models_dir=MODELS_DIR):
+    with open(get_artifact_dir(version, models_dir) / METADATA_FILENAME, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_model_metadata(artifact_dir, metadata):
+    with open(Path(artifact_dir) / METADATA_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
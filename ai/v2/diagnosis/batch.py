@@ -0,0 +1,243 @@
+"""
+Chấm điểm lại hàng loạt hồ sơ bệnh nhân ngoại tuyến (ví dụ chạy qua đêm sau mỗi lần huấn luyện lại).
+
+Đầu vào là CSV hoặc Parquet có các cột mã triệu chứng chính (TC001, TC002, ...) với giá trị 0/1; các cột khác
+(mã lượt khám, TenBenh, ...) được giữ nguyên trong đầu ra. File được đọc theo từng chunk, mỗi chunk được suy
+luận MC dropout (backend NumPy) trong một process pool; số chunk đang xử lý bị giới hạn nên bộ nhớ không tăng
+theo kích thước file.
+
+    python -m diagnosis.batch --input encounters.csv --output scores.csv --workers 4
+    python -m diagnosis.batch --input encounters.parquet --output scores.parquet --version v2
+"""
+import argparse
+import csv
+import io
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import MODELS_DIR, load_model_metadata, resolve_model_version
+from .numpy_backend import load_numpy_model
+
+DEFAULT_CHUNK_ROWS = 20_000
+DEFAULT_BATCH_N_ITER = int(os.environ.get('DIAGNOSIS_N_ITER', 100))
+# Các biến môi trường giới hạn số luồng BLAS: mỗi tiến trình con một luồng, song song hóa bằng số tiến trình
+_BLAS_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in ('.parquet', '.pq')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Cần cài pyarrow để đọc / ghi Parquet (pip install pyarrow)")
+    return pyarrow.parquet
+
+
+# --- Đọc / ghi theo chunk ---
+def read_record_chunks(path, symptom_codes, chunk_rows=DEFAULT_CHUNK_ROWS):
+    if _is_parquet(path):
+        parquet_file = _require_pyarrow().ParquetFile(path)
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunk_rows))
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_rows)
+    for frame in chunks:
+        missing = [code for code in symptom_codes if code not in frame.columns]
+        if missing:
+            raise ValueError(f"Thiếu cột triệu chứng trong {path}: {', '.join(missing[:5])}")
+        yield frame
+
+
+class ChunkWriter:
+    """
+    Ghi nối tiếp các chunk đã chấm: chuỗi CSV (đã định dạng sẵn trong tiến trình con) hoặc DataFrame (Parquet).
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.output_format = 'parquet' if _is_parquet(path) else 'csv'
+        self._parquet_writer = None
+        self._csv_file = None
+
+    def write(self, chunk):
+        if self.output_format == 'parquet':
+            import pyarrow as pa
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = _require_pyarrow().ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            if self._csv_file is None:
+                self._csv_file = open(self.path, 'w', encoding='utf-8', newline='')
+            self._csv_file.write(chunk)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+
+def score_columns(diseases):
+    columns = ['diagnosis', 'probability', 'uncertainty']
+    for disease in diseases:
+        columns += [f'p_{disease}', f'std_{disease}']
+    return columns
+
+
+def _score_values(mean_probabilities, std_dev_probabilities):
+    # (top, mảng float (n, 2 + 2 * số bệnh)) theo thứ tự cột của score_columns (bỏ cột diagnosis)
+    rows = np.arange(len(mean_probabilities))
+    top = mean_probabilities.argmax(axis=1)
+    values = np.empty((len(rows), 2 + 2 * mean_probabilities.shape[1]), dtype=np.float64)
+    values[:, 0] = mean_probabilities[rows, top]
+    values[:, 1] = std_dev_probabilities[rows, top]
+    values[:, 2::2] = mean_probabilities
+    values[:, 3::2] = std_dev_probabilities
+    return top, values
+
+
+def score_frame(frame, mean_probabilities, std_dev_probabilities, diseases):
+    top, values = _score_values(mean_probabilities, std_dev_probabilities)
+    columns = score_columns(diseases)
+    scores = pd.DataFrame(values, columns=columns[1:])
+    scores.insert(0, 'diagnosis', np.asarray(diseases, dtype=object)[top])
+    return pd.concat([frame.reset_index(drop=True), scores], axis=1)
+
+
+def format_scores_csv(frame, mean_probabilities, std_dev_probabilities, diseases, header=False):
+    """
+    Tương đương score_frame(...).to_csv(), nhưng định dạng khối số thực theo từng dòng bằng '%' thay vì
+    formatter của pandas cho từng ô (phần tốn thời gian nhất khi ghi hàng chục cột xác suất).
+    """
+    top, values = _score_values(mean_probabilities, std_dev_probabilities)
+    float_format = ',' + ','.join(['%.6f'] * values.shape[1]) + '\n'
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='')
+    if header:
+        writer.writerow(list(frame.columns) + score_columns(diseases))
+        buffer.write('\n')
+    passthrough = frame.astype(object).where(frame.notna(), '') # Ô trống giữ nguyên là rỗng như pandas
+    for prefix, disease_index, row in zip(passthrough.itertuples(index=False, name=None), top.tolist(), values.tolist()):
+        writer.writerow(prefix + (diseases[disease_index],))
+        buffer.write(float_format % tuple(row))
+    return buffer.getvalue()
+
+
+# --- Suy luận trong tiến trình con ---
+_worker_state = {}
+
+
+def _init_worker(version, models_dir, n_iter, seed, keep_symptoms):
+    # Mỗi tiến trình nạp model.npz một lần
+    model, metadata = load_numpy_model(version, models_dir)
+    _worker_state.update(model=model, n_iter=n_iter, seed=seed, keep_symptoms=keep_symptoms,
+                         symptom_codes=metadata['symptom_codes'], diseases=metadata['diseases'])
+
+
+def _score_chunk(chunk_index, frame, output_format):
+    state = _worker_state
+    model = state['model']
+    # Hạt giống theo chỉ số chunk: kết quả không phụ thuộc việc chunk rơi vào tiến trình nào
+    model.rng = np.random.default_rng([state['seed'], chunk_index])
+    features = frame[state['symptom_codes']].to_numpy(dtype=np.float32)
+    mean_probabilities, std_dev_probabilities = model.predict(features, n_iter=state['n_iter'])
+
+    if not state['keep_symptoms']:
+        frame = frame.drop(columns=state['symptom_codes'])
+    # Định dạng đầu ra ngay trong tiến trình con để tiến trình cha chỉ còn việc ghi file
+    if output_format == 'csv':
+        return format_scores_csv(frame, mean_probabilities, std_dev_probabilities, state['diseases'],
+                                 header=chunk_index == 0)
+    return score_frame(frame, mean_probabilities, std_dev_probabilities, state['diseases'])
+
+
+class _InlineExecutor:
+    # workers=0: chạy ngay trong tiến trình hiện tại (gỡ lỗi, máy một CPU)
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def rescore(input_path, output_path, version=None, models_dir=MODELS_DIR, n_iter=DEFAULT_BATCH_N_ITER,
+            workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0, keep_symptoms=False):
+    # Cố định phiên bản ngay từ đầu để mọi tiến trình dùng cùng một mô hình dù LATEST thay đổi giữa chừng
+    version = resolve_model_version(version, models_dir)
+    symptom_codes = load_model_metadata(version, models_dir)['symptom_codes']
+    workers = os.cpu_count() if workers is None else workers
+
+    if workers > 0:
+        for variable in _BLAS_THREAD_VARIABLES:
+            os.environ.setdefault(variable, '1')
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(version, models_dir, n_iter, seed, keep_symptoms),
+        )
+    else:
+        _init_worker(version, models_dir, n_iter, seed, keep_symptoms)
+        executor = _InlineExecutor()
+    max_in_flight = max(2, 2 * workers) # Giới hạn số chunk nằm trong bộ nhớ cùng lúc
+
+    writer = ChunkWriter(output_path)
+    pending = deque()
+    rows = 0
+    start = time.perf_counter()
+
+    def write_oldest():
+        num_rows, future = pending.popleft()
+        writer.write(future.result())
+        return num_rows
+
+    try:
+        with executor:
+            for chunk_index, frame in enumerate(read_record_chunks(input_path, symptom_codes, chunk_rows)):
+                pending.append((len(frame), executor.submit(_score_chunk, chunk_index, frame, writer.output_format)))
+                if len(pending) >= max_in_flight:
+                    rows += write_oldest()
+            while pending:
+                rows += write_oldest()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {'model_version': version, 'rows': rows, 'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chấm điểm lại hàng loạt hồ sơ bằng mô hình chẩn đoán.")
+    parser.add_argument('--input', required=True, help="File CSV / Parquet có các cột mã triệu chứng")
+    parser.add_argument('--output', required=True, help="File kết quả (.csv hoặc .parquet)")
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--n-iter', type=int, default=DEFAULT_BATCH_N_ITER)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Số tiến trình (0: chạy trong tiến trình hiện tại)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep-symptoms', action='store_true', help="Giữ các cột triệu chứng trong đầu ra")
+    args = parser.parse_args(argv)
+
+    stats = rescore(args.input, args.output, version=args.version, models_dir=args.models_dir, n_iter=args.n_iter,
+                    workers=args.workers, chunk_rows=args.chunk_rows, seed=args.seed, keep_symptoms=args.keep_symptoms)
+    print(f"Đã chấm {stats['rows']} dòng bằng mô hình {stats['model_version']} trong {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} dòng/s, {args.workers} tiến trình, n_iter={args.n_iter}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Vector triệu chứng dạng bit-packed và chỉ mục tìm ca bệnh tương tự.
+
+Mỗi vector 0/1 được nén thành các word uint64 (64 triệu chứng / word, 34 triệu chứng hiện tại chỉ cần 1 word).
+Khoảng cách giữa hai ca được tính bằng XOR / AND rồi đếm bit (popcount):
+
+    Hamming(a, b) = popcount(a ^ b)
+    Jaccard(a, b) = 1 - popcount(a & b) / popcount(a | b)
+
+Một triệu ca tham chiếu chỉ chiếm 8 MB và một truy vấn quét toàn bộ chỉ tốn vài mili giây,
+nên có thể trả "các ca tương tự" cùng với dự đoán của mô hình.
+"""
+import numpy as np
+
+CASE_METRICS = ('hamming', 'jaccard')
+DEFAULT_SIMILAR_CASES = 3
+
+# np.bitwise_count chỉ có từ NumPy 2.0; bản cũ hơn đếm bit qua bảng tra 256 phần tử trên từng byte
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    counts = _POPCOUNT_TABLE[np.ascontiguousarray(words).view(np.uint8)]
+    return counts.reshape(*words.shape[:-1], -1).sum(axis=-1, dtype=np.int64)
+
+
+def pack_symptom_vectors(vectors):
+    """
+    vectors: mảng 0/1 (n, số triệu chứng) hoặc (số triệu chứng,) -> uint64 (n, số word) hoặc (số word,).
+    Bit j của word j // 64 là triệu chứng thứ j.
+    """
+    vectors = np.asarray(vectors)
+    single = vectors.ndim == 1
+    vectors = np.atleast_2d(vectors).astype(bool)
+    num_words = -(-vectors.shape[1] // 64)
+    packed = np.packbits(vectors, axis=1, bitorder='little')
+    padded = np.zeros((vectors.shape[0], num_words * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    words = padded.view('<u8').astype(np.uint64, copy=False)
+    return words[0] if single else words
+
+
+def unpack_symptom_vectors(words, num_features):
+    words = np.asarray(words, dtype='<u8')
+    single = words.ndim == 1
+    bits = np.unpackbits(np.atleast_2d(words).view(np.uint8), axis=1, count=num_features, bitorder='little')
+    return bits[0] if single else bits
+
+
+class CaseIndex:
+    """
+    Chỉ mục các ca tham chiếu (mặc định là các dòng của disease_symptoms_matrix.csv).
+    labels: chỉ số bệnh của từng ca theo thứ tự catalog.diseases.
+    """
+    def __init__(self, catalog, packed_cases, labels):
+        self.catalog = catalog
+        self.cases = np.ascontiguousarray(packed_cases, dtype=np.uint64)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        if self.cases.ndim != 2 or len(self.cases) != len(self.labels):
+            raise ValueError("Số ca và số nhãn không khớp")
+        self._case_sizes = popcount(self.cases) # Số triệu chứng của mỗi ca, dùng cho Jaccard
+
+    @classmethod
+    def from_training_data(cls, catalog, X_train, y_train):
+        return cls(catalog, pack_symptom_vectors(X_train), np.argmax(y_train, axis=1))
+
+    def __len__(self):
+        return len(self.cases)
+
+    @property
+    def nbytes(self):
+        return self.cases.nbytes + self.labels.nbytes
+
+    def distances(self, query, metric='hamming'):
+        query = np.asarray(query, dtype=np.uint64)
+        if metric == 'hamming':
+            return popcount(self.cases ^ query)
+        if metric == 'jaccard':
+            shared = popcount(self.cases & query)
+            union = self._case_sizes + popcount(query) - shared
+            # Hai vector rỗng coi như giống hệt nhau
+            return 1.0 - np.divide(shared, union, out=np.ones(len(self), dtype=np.float64), where=union > 0)
+        raise ValueError(f"Metric không hợp lệ: {metric}")
+
+    def nearest(self, query, k=DEFAULT_SIMILAR_CASES, metric='hamming'):
+        # Trả về (chỉ số ca, khoảng cách) của k ca gần nhất, sắp theo khoảng cách tăng dần
+        distances = self.distances(query, metric)
+        k = min(k, len(distances))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), distances[:0]
+        candidates = np.argpartition(distances, k - 1)[:k]
+        # Các ca hòa với ca thứ k: argpartition chọn tùy ý, lấy các ca có chỉ số nhỏ nhất cho ổn định
+        kth_distance = distances[candidates].max()
+        closer = candidates[distances[candidates] < kth_distance]
+        ties = np.flatnonzero(distances == kth_distance)[:k - len(closer)]
+        candidates = np.concatenate([closer, ties])
+        order = candidates[np.lexsort((candidates, distances[candidates]))]
+        return order, distances[order]
+
+    def similar_cases(self, symptom_values, k=DEFAULT_SIMILAR_CASES, metric='hamming'):
+        """
+        symptom_values: {MaTrieuChungChinh: 0 hoặc 1} (như trong phiên hỏi đáp) hoặc vector theo catalog.main_codes.
+        """
+        if isinstance(symptom_values, dict):
+            symptom_values = [symptom_values.get(ma_tc, 0) for ma_tc in self.catalog.main_codes]
+        query = pack_symptom_vectors(symptom_values)
+        query_symptoms = np.asarray(symptom_values, dtype=bool)
+        indices, distances = self.nearest(query, k, metric)
+        results = []
+        for index, distance in zip(indices, distances):
+            case_symptoms = unpack_symptom_vectors(self.cases[index], len(self.catalog.main_codes)).astype(bool)
+            results.append({
+                'case_id': int(index),
+                'disease': self.catalog.diseases[self.labels[index]],
+                'distance': float(distance) if metric == 'jaccard' else int(distance),
+                'shared_symptoms': [self.catalog.main_codes[j] for j in np.flatnonzero(case_symptoms & query_symptoms)],
+            })
+        return results
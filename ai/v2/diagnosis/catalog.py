@@ -0,0 +1,98 @@
+"""
+Danh mục bệnh / triệu chứng dựng một lần từ symptoms.csv và diseases.csv.
+
+Mọi tra cứu trong một lượt hỏi đáp (câu hỏi, tên, có phải triệu chứng chính, câu hỏi con)
+đều là tra dict O(1), thay cho việc quét DataFrame ở mỗi câu trả lời. Danh mục chỉ đọc
+nên có thể dựng trước khi fork (gunicorn --preload) và dùng chung giữa các worker.
+"""
+from pathlib import Path
+from types import MappingProxyType
+
+import pandas as pd # Thư viện để làm việc với CSV
+
+from .matcher import SymptomKeywordMatcher, split_keywords
+
+
+class Symptom:
+    __slots__ = ('code', 'name', 'is_main', 'parent', 'question', 'primary_keywords', 'secondary_keywords')
+
+    def __init__(self, code, name, is_main, parent, question, primary_keywords, secondary_keywords):
+        self.code = code
+        self.name = name
+        self.is_main = is_main
+        self.parent = parent
+        self.question = question
+        self.primary_keywords = primary_keywords
+        self.secondary_keywords = secondary_keywords
+
+    def __repr__(self):
+        return f"Symptom({self.code}, {self.name!r})"
+
+
+def _optional(value):
+    return value if pd.notna(value) else None
+
+
+class SymptomCatalog:
+    def __init__(self, diseases, symptoms):
+        self.diseases = tuple(diseases)                     # TEN_BENH_LIST
+        self.symptoms = MappingProxyType({s.code: s for s in symptoms})
+
+        main_symptoms = [s for s in symptoms if s.is_main]
+        self.main_codes = tuple(s.code for s in main_symptoms)   # MA_TRIEU_CHUNG_CHINH_LIST (thứ tự feature)
+        self.main_names = tuple(s.name for s in main_symptoms)   # TEN_TRIEU_CHUNG_CHINH_LIST
+        self.main_index = MappingProxyType({code: i for i, code in enumerate(self.main_codes)})
+        self.disease_index = MappingProxyType({name: i for i, name in enumerate(self.diseases)})
+
+        self.question_by_code = MappingProxyType({s.code: s.question for s in symptoms if s.question})
+        self.name_by_code = MappingProxyType({s.code: s.name for s in symptoms})
+        self.is_main_by_code = MappingProxyType({s.code: s.is_main for s in symptoms})
+
+        # Key: MaTrieuChungChinh, Value: các MaTrieuChungCon (câu hỏi làm rõ)
+        children = {}
+        for s in symptoms:
+            if not s.is_main and s.parent:
+                children.setdefault(s.parent, []).append(s.code)
+        self.children_by_parent = MappingProxyType({parent: tuple(codes) for parent, codes in children.items()})
+
+        # Bộ so khớp từ khóa (từ khóa chính + từ khóa phụ) của các triệu chứng chính
+        self.matcher = SymptomKeywordMatcher(
+            {s.code: s.primary_keywords for s in main_symptoms},
+            {s.code: s.secondary_keywords for s in main_symptoms},
+        )
+
+    @classmethod
+    def from_csv(cls, symptoms_csv, diseases_csv):
+        diseases_df = pd.read_csv(diseases_csv)
+        symptoms_df = pd.read_csv(symptoms_csv)
+        symptoms = []
+        for row in symptoms_df.to_dict('records'):
+            primary, secondary = _optional(row.get('TuKhoaChinh')), _optional(row.get('TuKhoaPhu'))
+            symptoms.append(Symptom(
+                code=row['MaTrieuChung'],
+                name=row['TenTrieuChung'],
+                is_main=bool(row['LaTrieuChungChinh']),
+                parent=_optional(row['TrieuChungCha']),
+                question=_optional(row['CauHoi']),
+                primary_keywords=tuple(split_keywords(primary)) if primary else (),
+                secondary_keywords=tuple(split_keywords(secondary)) if secondary else (),
+            ))
+        return cls(diseases_df['TenBenh'].tolist(), symptoms)
+
+    def __len__(self):
+        return len(self.symptoms)
+
+    def __contains__(self, code):
+        return code in self.symptoms
+
+    def is_main(self, code):
+        return self.is_main_by_code.get(code, False)
+
+    def name(self, code):
+        return self.name_by_code.get(code, code)
+
+    def question(self, code):
+        return self.question_by_code.get(code, f"Bạn có bị {self.name(code).lower()} không?")
+
+    def children(self, code):
+        return self.children_by_parent.get(code, ())
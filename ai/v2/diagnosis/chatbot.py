@@ -0,0 +1,60 @@
+"""
+Chatbot hỏi đáp triệu chứng (giao diện dòng lệnh).
+"""
+from .model import MCDropoutEngine
+from .session import ChatbotSessionEngine, InMemorySessionStore
+
+
+# --- Chạy Chatbot ---
+def run_intelligent_chatbot(model, catalog, selector=None, case_index=None):
+    if model is None:
+        print("Không thể khởi chạy chatbot vì mô hình chưa được huấn luyện.")
+        return
+
+    print("\nXin chào! Tôi là robot trợ lý sức khỏe ảo. Hãy mô tả các triệu chứng chính bạn đang gặp phải.")
+    user_initial_description = input("Bạn: ")
+
+    # Cùng máy trạng thái với dịch vụ HTTP, phiên được giữ trong bộ nhớ của tiến trình
+    # selector: xem diagnosis.questions (mặc định hỏi tuần tự mọi triệu chứng chính)
+    session_engine = ChatbotSessionEngine(catalog, MCDropoutEngine(model), InMemorySessionStore(),
+                                          selector=selector, case_index=case_index)
+
+    # 1. Trích xuất triệu chứng ban đầu và xây dựng hàng đợi câu hỏi
+    response = session_engine.start(user_initial_description)
+
+    print("\n[Bot]: Dựa trên mô tả của bạn, tôi ghi nhận các triệu chứng sau:")
+    for symptom in response['detected_symptoms']:
+        print(f"- {symptom['name']}") # Lấy tên triệu chứng để hiển thị
+    if not response['detected_symptoms']:
+        print("(Không phát hiện triệu chứng nào từ mô tả ban đầu)")
+
+    # 2. Hỏi lần lượt cho tới khi có chẩn đoán
+    if not response['done']:
+        print("\n[Bot]: Để hiểu rõ hơn, tôi xin hỏi thêm một số câu:")
+    while not response['done']:
+        ans_text = input(f"[Bot]: {response['question']['text']} ")
+        response = session_engine.answer(response['session_id'], ans_text)
+
+    print("\n[Bot]: Cảm ơn bạn đã cung cấp thông tin. Đang phân tích...")
+
+    # 3. Dự đoán (đã được tính khi phiên kết thúc)
+    probabilities = {p['disease']: p for p in response['probabilities']}
+    diagnosis = response['diagnosis']
+    
+    print("\n--- Chẩn đoán với Xác suất và Độ không chắc chắn ---")
+    for benh_name in catalog.diseases:
+        print(f"{benh_name}: Xác suất = {probabilities[benh_name]['probability']:.3f}, Độ không chắc chắn (StdDev) = {probabilities[benh_name]['std_dev']:.3f}")
+
+    print(f"\nChẩn đoán sơ bộ: {diagnosis} (Độ không chắc chắn cho chẩn đoán này: ±{response['uncertainty']:.3f})")
+
+    # Các ca tham chiếu gần nhất (khoảng cách Hamming = số triệu chứng khác nhau)
+    if response.get('similar_cases'):
+        print("\n--- Các ca tương tự ---")
+        for case in response['similar_cases']:
+            shared = ", ".join(catalog.name(ma_tc) for ma_tc in case['shared_symptoms']) or "không có"
+            print(f"Ca #{case['case_id']}: {case['disease']} (khác {case['distance']} triệu chứng; trùng: {shared})")
+    
+    # (Tùy chọn) Hiển thị các khuyến nghị về xét nghiệm và thuốc (cần map từ diseases.csv)
+    # ... (Thêm logic lấy XET_NGHIEM_KHUYEN_NGHI và THUOC_KHUYEN_NGHI từ file CSV hoặc cấu trúc dữ liệu khác nếu muốn)
+
+    print(f"\nLưu ý: Đây chỉ là chẩn đoán sơ bộ dựa trên mô hình AI. Bạn nên tham khảo ý kiến của bác sĩ để có chẩn đoán chính xác và kế hoạch điều trị phù hợp.")
@@ -0,0 +1,42 @@
+"""
+Tải và chuẩn bị dữ liệu bệnh / triệu chứng từ các file CSV.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd # Thư viện để làm việc với CSV
+
+from .catalog import SymptomCatalog
+
+# --- Hằng số và Cấu hình ---
+# Mặc định đọc CSV nằm cạnh package (ai/v2/), có thể ghi đè bằng biến môi trường
+DATA_DIR = Path(os.environ.get('DIAGNOSIS_DATA_DIR', Path(__file__).resolve().parent.parent))
+DISEASES_CSV = 'diseases.csv'
+SYMPTOMS_CSV = 'symptoms.csv'
+DISEASE_SYMPTOMS_MATRIX_CSV = 'disease_symptoms_matrix.csv'
+
+# --- Tải và Chuẩn bị Dữ liệu ---
+def load_catalog(data_dir=DATA_DIR):
+    data_dir = Path(data_dir)
+    return SymptomCatalog.from_csv(data_dir / SYMPTOMS_CSV, data_dir / DISEASES_CSV)
+
+
+def load_training_data(catalog, data_dir=DATA_DIR):
+    matrix_df = pd.read_csv(Path(data_dir) / DISEASE_SYMPTOMS_MATRIX_CSV)
+
+    # Tạo X_train và y_train từ matrix_df
+    # Sắp xếp lại các cột theo đúng thứ tự của catalog.main_codes (thứ tự feature của model)
+    # Điều này quan trọng để đảm bảo tính nhất quán
+    X_train = matrix_df[list(catalog.main_codes)].values.astype(np.float32)
+
+    # Chuyển đổi TenBenh thành dạng số (label encoding) rồi one-hot encoding
+    y_labels = matrix_df['TenBenh'].map(dict(catalog.disease_index)).values
+    y_train = np.eye(len(catalog.diseases), dtype=np.float32)[y_labels] # one-hot, không cần nạp TensorFlow
+    return X_train, y_train
+
+
+def load_data(data_dir=DATA_DIR):
+    catalog = load_catalog(data_dir)
+    X_train, y_train = load_training_data(catalog, data_dir)
+    return X_train, y_train, catalog
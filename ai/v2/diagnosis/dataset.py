@@ -0,0 +1,221 @@
+"""
+Dữ liệu huấn luyện dạng luồng cho ma trận triệu chứng lớn (log khám bệnh hàng triệu dòng).
+
+load_training_data đọc cả CSV vào pandas rồi chuyển thành mảng float32, bộ nhớ tăng theo số dòng.
+Ở đây dữ liệu được đọc theo từng khối:
+
+- iter_csv_chunks: đọc thẳng CSV (cùng định dạng disease_symptoms_matrix.csv) theo từng chunk.
+- convert_matrix: ghi CSV thành các file .npy có thể memory-map (bit-packed hoặc uint8),
+  không cần parse lại CSV ở mỗi epoch.
+- make_tf_dataset: bọc bộ sinh batch (có shuffle buffer) thành tf.data.Dataset với prefetch.
+
+    python -m diagnosis.dataset --csv encounters.csv --output data/encounters
+    python -m diagnosis.train --dataset data/encounters --epochs 5
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .data import DATA_DIR, DISEASE_SYMPTOMS_MATRIX_CSV, load_catalog
+
+DATASET_METADATA_FILENAME = 'dataset.json'
+FEATURES_FILENAME = 'features.npy'
+LABELS_FILENAME = 'labels.npy'
+DATASET_FORMATS = ('packed', 'dense')
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_SHUFFLE_BUFFER = 65_536 # Số dòng được trộn cùng lúc, quyết định bộ nhớ đỉnh khi huấn luyện
+DEFAULT_BATCH_SIZE = 256
+
+
+# --- Đọc CSV theo từng khối ---
+def count_csv_rows(csv_path, block_size=1 << 20):
+    rows = 0
+    with open(csv_path, 'rb') as f:
+        last = b'\n'
+        while block := f.read(block_size):
+            rows += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':  # Dòng cuối không có ký tự xuống dòng
+        rows += 1
+    return max(rows - 1, 0)  # Bỏ dòng tiêu đề
+
+
+def iter_csv_chunks(catalog, csv_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Sinh (features uint8 (n, số triệu chứng chính), labels int (n,)) theo thứ tự dòng của CSV.
+    Cột được sắp theo catalog.main_codes, giống load_training_data.
+    """
+    columns = list(catalog.main_codes)
+    # Đóng file cả khi dừng giữa chừng (bệnh lạ, bộ sinh bị bỏ dở)
+    with pd.read_csv(
+        csv_path, usecols=['TenBenh'] + columns, chunksize=chunk_rows,
+        dtype={code: np.uint8 for code in columns},
+    ) as reader:
+        for chunk in reader:
+            labels = chunk['TenBenh'].map(dict(catalog.disease_index))
+            if labels.isna().any():
+                unknown = sorted(set(chunk['TenBenh'][labels.isna()]))
+                raise ValueError(f"Bệnh không có trong diseases.csv: {', '.join(map(str, unknown[:5]))}")
+            yield chunk[columns].to_numpy(dtype=np.uint8), labels.to_numpy(dtype=np.int32)
+
+
+# --- Chuyển CSV sang .npy memory-map ---
+def convert_matrix(catalog, csv_path, output_dir, dataset_format='packed', chunk_rows=DEFAULT_CHUNK_ROWS):
+    if dataset_format not in DATASET_FORMATS:
+        raise ValueError(f"Định dạng không hợp lệ: {dataset_format}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    num_rows = count_csv_rows(csv_path)
+    num_features = len(catalog.main_codes)
+    # 'packed': 8 triệu chứng / byte (np.packbits), 'dense': 1 byte / triệu chứng
+    row_width = (num_features + 7) // 8 if dataset_format == 'packed' else num_features
+    features = np.lib.format.open_memmap(output_dir / FEATURES_FILENAME, mode='w+', dtype=np.uint8,
+                                         shape=(num_rows, row_width))
+    labels = np.lib.format.open_memmap(output_dir / LABELS_FILENAME, mode='w+', dtype=np.int16,
+                                       shape=(num_rows,))
+
+    offset = 0
+    for chunk_features, chunk_labels in iter_csv_chunks(catalog, csv_path, chunk_rows):
+        end = offset + len(chunk_labels)
+        features[offset:end] = np.packbits(chunk_features, axis=1) if dataset_format == 'packed' else chunk_features
+        labels[offset:end] = chunk_labels
+        offset = end
+    if offset != num_rows:
+        raise ValueError(f"Số dòng đọc được ({offset}) khác số dòng đếm được ({num_rows}) trong {csv_path}")
+    features.flush()
+    labels.flush()
+    del features, labels
+
+    metadata = {
+        'format': dataset_format,
+        'rows': num_rows,
+        'num_features': num_features,
+        'symptom_codes': list(catalog.main_codes),
+        'diseases': list(catalog.diseases),
+        'source': str(csv_path),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+    with open(output_dir / DATASET_METADATA_FILENAME, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    return metadata
+
+
+class MatrixDataset:
+    """
+    Dữ liệu đã chuyển bằng convert_matrix, mở bằng memory-map: chỉ các khối đang đọc nằm trong RAM.
+    """
+    def __init__(self, dataset_dir):
+        self.dataset_dir = Path(dataset_dir)
+        with open(self.dataset_dir / DATASET_METADATA_FILENAME, encoding='utf-8') as f:
+            self.metadata = json.load(f)
+        self.format = self.metadata['format']
+        self.num_features = self.metadata['num_features']
+        self.features = np.load(self.dataset_dir / FEATURES_FILENAME, mmap_mode='r')
+        self.labels = np.load(self.dataset_dir / LABELS_FILENAME, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.labels)
+
+    def check_catalog(self, catalog):
+        if (self.metadata['symptom_codes'] != list(catalog.main_codes)
+                or self.metadata['diseases'] != list(catalog.diseases)):
+            raise ValueError(f"Dữ liệu {self.dataset_dir} không khớp với danh mục triệu chứng hiện tại. Hãy chuyển đổi lại.")
+
+    def read(self, start, stop):
+        features = np.asarray(self.features[start:stop])
+        if self.format == 'packed':
+            features = np.unpackbits(features, axis=1, count=self.num_features)
+        return features, np.asarray(self.labels[start:stop], dtype=np.int32)
+
+    def iter_blocks(self, block_rows, rng=None):
+        # Thứ tự khối ngẫu nhiên khi có rng; mỗi khối vẫn là một đoạn liên tục trên đĩa
+        starts = np.arange(0, len(self), block_rows)
+        if rng is not None:
+            rng.shuffle(starts)
+        for start in starts:
+            yield self.read(start, min(start + block_rows, len(self)))
+
+
+# --- Bộ sinh batch ---
+def iter_batches(blocks, num_classes, batch_size=DEFAULT_BATCH_SIZE, rng=None):
+    """
+    blocks: các khối (features, labels) như iter_csv_chunks / MatrixDataset.iter_blocks.
+    Trộn các dòng trong từng khối (shuffle buffer = kích thước khối) rồi cắt thành batch (X float32, y one-hot).
+    """
+    identity = np.eye(num_classes, dtype=np.float32)
+    for features, labels in blocks:
+        order = rng.permutation(len(labels)) if rng is not None else np.arange(len(labels))
+        for start in range(0, len(order), batch_size):
+            index = order[start:start + batch_size]
+            yield features[index].astype(np.float32), identity[labels[index]]
+
+
+def count_batches(num_rows, block_rows, batch_size):
+    # Số batch iter_batches sinh ra: mỗi khối (kể cả khối cuối ngắn hơn) được cắt riêng
+    full_blocks, last_block = divmod(num_rows, block_rows)
+    return full_blocks * -(-block_rows // batch_size) + -(-last_block // batch_size)
+
+
+def make_tf_dataset(batch_generator, num_features, num_classes, num_batches=None):
+    """
+    batch_generator: hàm không tham số trả về một bộ sinh batch mới (gọi lại ở mỗi epoch).
+    num_batches: số batch mỗi epoch (count_batches), để Keras biết khi nào kết thúc epoch.
+    """
+    import tensorflow as tf
+
+    dataset = tf.data.Dataset.from_generator(batch_generator, output_signature=(
+        tf.TensorSpec(shape=(None, num_features), dtype=tf.float32),
+        tf.TensorSpec(shape=(None, num_classes), dtype=tf.float32),
+    ))
+    if num_batches is not None:
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(num_batches))
+    # Chuẩn bị batch kế tiếp trong lúc mô hình đang huấn luyện batch hiện tại
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def streaming_batches(catalog, dataset_dir=None, csv_path=None, batch_size=DEFAULT_BATCH_SIZE,
+                      shuffle_buffer=DEFAULT_SHUFFLE_BUFFER, shuffle=True, seed=None):
+    """
+    Trả về (hàm sinh batch, số dòng, số batch mỗi epoch) từ dữ liệu đã chuyển đổi (dataset_dir)
+    hoặc trực tiếp từ CSV (csv_path). Mỗi lần gọi hàm sinh batch là một epoch với thứ tự trộn mới.
+    """
+    rng = np.random.default_rng(seed) if shuffle else None
+    num_classes = len(catalog.diseases)
+    if dataset_dir is not None:
+        dataset = MatrixDataset(dataset_dir)
+        dataset.check_catalog(catalog)
+
+        def generate():
+            return iter_batches(dataset.iter_blocks(shuffle_buffer, rng), num_classes, batch_size, rng)
+        return generate, len(dataset), count_batches(len(dataset), shuffle_buffer, batch_size)
+    if csv_path is not None:
+        def generate():
+            # CSV chỉ đọc tuần tự được nên chỉ trộn trong từng chunk
+            return iter_batches(iter_csv_chunks(catalog, csv_path, shuffle_buffer), num_classes, batch_size, rng)
+        num_rows = count_csv_rows(csv_path)
+        return generate, num_rows, count_batches(num_rows, shuffle_buffer, batch_size)
+    raise ValueError("Cần dataset_dir hoặc csv_path")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chuyển ma trận triệu chứng CSV sang file .npy memory-map.")
+    parser.add_argument('--csv', default=DATA_DIR / DISEASE_SYMPTOMS_MATRIX_CSV)
+    parser.add_argument('--output', required=True, help="Thư mục đích")
+    parser.add_argument('--format', choices=DATASET_FORMATS, default='packed')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Thư mục chứa symptoms.csv / diseases.csv")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    metadata = convert_matrix(load_catalog(args.data_dir), args.csv, args.output, args.format, args.chunk_rows)
+    print(f"Đã ghi {metadata['rows']} dòng ({metadata['format']}) vào {args.output} "
+          f"trong {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
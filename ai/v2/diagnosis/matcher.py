@@ -0,0 +1,115 @@
+"""
+Bộ so khớp từ khóa triệu chứng: automaton Aho-Corasick được dựng một lần cùng SymptomCatalog,
+tìm tất cả từ khóa (chính và phụ) trong MỘT lần duyệt văn bản.
+
+Chi phí mỗi câu chỉ phụ thuộc độ dài văn bản, không còn nhân với số triệu chứng x số từ khóa
+như khi gọi re.search cho từng pattern.
+"""
+import re
+import unicodedata
+from collections import deque
+
+KEYWORD_SEPARATORS = re.compile(r'[,;]') # CSV dùng lẫn cả ',' và ';'
+
+
+def normalize_text(text):
+    # NFC để chữ tiếng Việt gõ kiểu tổ hợp (NFD) vẫn khớp với từ khóa
+    return unicodedata.normalize('NFC', text).lower()
+
+
+def split_keywords(keywords_str):
+    return [kw.strip() for kw in KEYWORD_SEPARATORS.split(keywords_str) if kw.strip()]
+
+
+def _is_word_char(ch):
+    # Tương đương \w của re với chuỗi Unicode
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatch:
+    __slots__ = ('code', 'keyword', 'start', 'end', 'is_primary')
+
+    def __init__(self, code, keyword, start, end, is_primary):
+        self.code = code
+        self.keyword = keyword
+        self.start = start
+        self.end = end
+        self.is_primary = is_primary
+
+    def __repr__(self):
+        kind = 'chính' if self.is_primary else 'phụ'
+        return f"KeywordMatch({self.code}, {self.keyword!r}, {self.start}:{self.end}, {kind})"
+
+
+class SymptomKeywordMatcher:
+    """
+    primary_keywords / secondary_keywords: {MaTrieuChung: [từ khóa, ...]} (TuKhoaChinh / TuKhoaPhu).
+    Một từ khóa chỉ được tính khi đứng riêng như một từ (giống \\b...\\b trước đây).
+    """
+    def __init__(self, primary_keywords, secondary_keywords=None):
+        self.primary_keywords = primary_keywords
+        self.secondary_keywords = secondary_keywords or {}
+
+        self._goto = [{}]      # Chuyển trạng thái theo ký tự
+        self._fail = [0]       # Liên kết thất bại
+        self._output = [[]]    # Các từ khóa kết thúc tại trạng thái (kể cả qua liên kết thất bại)
+        self._entries = []     # (code, keyword, is_primary)
+        for keywords_map, is_primary in ((self.primary_keywords, True), (self.secondary_keywords, False)):
+            for code, keywords in keywords_map.items():
+                for keyword in keywords:
+                    self._add_keyword(code, normalize_text(keyword), is_primary)
+        self._build_failure_links()
+
+    def _add_keyword(self, code, keyword, is_primary):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._output[state].append(len(self._entries))
+        self._entries.append((code, keyword, is_primary))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        text = normalize_text(text)
+        goto, fail, output, entries = self._goto, self._fail, self._output, self._entries
+        text_length = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            for entry_index in output[state]:
+                code, keyword, is_primary = entries[entry_index]
+                start, end = i - len(keyword) + 1, i + 1
+                # Kiểm tra ranh giới từ ở hai đầu, cùng ngữ nghĩa với \b
+                before = start > 0 and _is_word_char(text[start - 1])
+                after = end < text_length and _is_word_char(text[end])
+                if before != _is_word_char(keyword[0]) and after != _is_word_char(keyword[-1]):
+                    yield KeywordMatch(code, keyword, start, end, is_primary)
+
+    def match(self, text, include_secondary=True):
+        return {
+            m.code for m in self.iter_matches(text)
+            if include_secondary or m.is_primary
+        }
@@ -0,0 +1,122 @@
+"""
+Mô hình chẩn đoán: xây dựng / huấn luyện, suy luận MC dropout và lưu / tải artifact đã huấn luyện.
+"""
+import time
+import weakref
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+from .artifacts import (
+    LATEST_FILENAME, MODEL_FILENAME, MODELS_DIR, get_artifact_dir, load_model_metadata, save_model_metadata,
+)
+
+
+# --- Xây dựng và huấn luyện mô hình ---
+def build_model(num_features, num_classes):
+    inputs = tf.keras.Input(shape=(num_features,))
+    x = tf.keras.layers.Dense(32, activation='relu')(inputs) # Tăng số neuron một chút
+    x = tf.keras.layers.Dropout(0.5)(x, training=True)
+    x = tf.keras.layers.Dense(32, activation='relu')(x)
+    x = tf.keras.layers.Dropout(0.5)(x, training=True)
+    outputs = tf.keras.layers.Dense(num_classes, activation='softmax')(x)
+    model = tf.keras.Model(inputs, outputs)
+    
+    model.compile(optimizer='adam',
+                  loss='categorical_crossentropy',
+                  metrics=['accuracy'])
+    return model
+
+
+def build_and_train_model(X_train, y_train, num_features, num_classes, epochs=150):
+    model = build_model(num_features, num_classes)
+    
+    # Kiểm tra nếu X_train và y_train không rỗng
+    if X_train.shape[0] == 0 or y_train.shape[0] == 0:
+        print("LỖI: Dữ liệu huấn luyện X_train hoặc y_train rỗng. Vui lòng kiểm tra file CSV.")
+        return None
+    if X_train.shape[0] != y_train.shape[0]:
+        print(f"LỖI: Số lượng mẫu trong X_train ({X_train.shape[0]}) và y_train ({y_train.shape[0]}) không khớp.")
+        return None
+
+    print(f"Huấn luyện mô hình với {X_train.shape[0]} mẫu, {X_train.shape[1]} đặc trưng, và {y_train.shape[1]} lớp bệnh.")
+    model.fit(X_train, y_train, epochs=epochs, verbose=0, batch_size=min(32, X_train.shape[0])) # Thêm batch_size
+    return model
+
+
+def train_model_on_dataset(dataset, num_samples, num_features, num_classes, epochs=150):
+    # dataset: tf.data.Dataset trả về batch (X, y one-hot), xem diagnosis.dataset.make_tf_dataset
+    if num_samples == 0:
+        print("LỖI: Dữ liệu huấn luyện rỗng. Vui lòng kiểm tra dữ liệu đầu vào.")
+        return None
+
+    model = build_model(num_features, num_classes)
+    print(f"Huấn luyện mô hình (dạng luồng) với {num_samples} mẫu, {num_features} đặc trưng, và {num_classes} lớp bệnh.")
+    model.fit(dataset, epochs=epochs, verbose=0, shuffle=False) # Đã trộn trong bộ sinh batch
+    return model
+
+
+# --- Dự đoán với độ không chắc chắn (Monte Carlo Dropout) ---
+class MCDropoutEngine:
+    """
+    Chạy MC dropout theo lô: nhân bản đầu vào thành tensor (n_iter x batch x features)
+    và đưa qua mô hình trong MỘT lần forward đã được biên dịch (tf.function),
+    thay vì gọi model n_iter lần trong vòng lặp Python.
+    """
+    def __init__(self, model, max_rows=65536):
+        self.model = model
+        # Giới hạn số dòng (n_iter * batch) cho mỗi lần forward để không tràn bộ nhớ
+        self.max_rows = max_rows
+        self._forward = tf.function(self._mc_forward, reduce_retracing=True)
+
+    def _mc_forward(self, x, n_iter):
+        batch_size = tf.shape(x)[0]
+        num_features = tf.shape(x)[1]
+        tiled = tf.tile(tf.expand_dims(x, axis=0), [n_iter, 1, 1]) # (n_iter, batch, features)
+        preds = self.model(tf.reshape(tiled, [-1, num_features]), training=True)
+        preds = tf.reshape(preds, [n_iter, batch_size, -1])
+        return tf.reduce_mean(preds, axis=0), tf.math.reduce_std(preds, axis=0)
+
+    def predict(self, x_input, n_iter=100):
+        x_input = np.asarray(x_input, dtype=np.float32)
+        if x_input.ndim == 1: # Nếu chỉ là 1 mẫu, reshape lại
+            x_input = np.expand_dims(x_input, axis=0)
+
+        # Nhiều bệnh nhân (hàng đợi phân loại) được chia thành các lô vừa với max_rows
+        chunk_size = max(1, self.max_rows // n_iter)
+        n_iter_tensor = tf.constant(n_iter, dtype=tf.int32)
+        mean_chunks, std_chunks = [], []
+        for start in range(0, x_input.shape[0], chunk_size):
+            mean_probs, std_devs = self._forward(x_input[start:start + chunk_size], n_iter_tensor)
+            mean_chunks.append(mean_probs.numpy())
+            std_chunks.append(std_devs.numpy())
+        return np.concatenate(mean_chunks, axis=0), np.concatenate(std_chunks, axis=0)
+
+
+_MC_ENGINES = weakref.WeakKeyDictionary() # Mỗi model dùng lại một engine (và graph đã biên dịch)
+
+def predict_with_uncertainty(model, x_input, n_iter=100):
+    # x_input có thể là 1 vector triệu chứng hoặc ma trận (số bệnh nhân x số triệu chứng)
+    engine = _MC_ENGINES.get(model)
+    if engine is None:
+        engine = _MC_ENGINES[model] = MCDropoutEngine(model)
+    return engine.predict(x_input, n_iter=n_iter)
+
+
+def save_model_artifact(model, metadata, version=None, models_dir=MODELS_DIR):
+    models_dir = Path(models_dir)
+    version = version or time.strftime('%Y%m%d%H%M%S')
+    artifact_dir = models_dir / version
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+
+    model.save(artifact_dir / MODEL_FILENAME)
+    save_model_metadata(artifact_dir, dict(metadata, version=version))
+    (models_dir / LATEST_FILENAME).write_text(version)
+    return artifact_dir
+
+
+def load_model_artifact(version=None, models_dir=MODELS_DIR):
+    artifact_dir = get_artifact_dir(version, models_dir)
+    model = tf.keras.models.load_model(artifact_dir / MODEL_FILENAME)
+    return model, load_model_metadata(artifact_dir.name, models_dir)
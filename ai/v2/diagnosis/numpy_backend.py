@@ -0,0 +1,130 @@
+"""
+Suy luận chỉ dùng NumPy cho mạng Dense/Dropout nhỏ của robot v2.
+
+Trọng số được xuất từ mô hình Keras ra file .npz, nhờ đó worker phục vụ chẩn đoán
+không phải nạp TensorFlow (chậm khởi động và tốn vài trăm MB RSS mỗi worker).
+
+    python -m diagnosis.numpy_backend --version v1   # xuất model.npz cho artifact có sẵn
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .artifacts import MODELS_DIR, NUMPY_WEIGHTS_FILENAME, get_artifact_dir, load_model_metadata
+
+ACTIVATIONS = {
+    'linear': lambda z: z,
+    'relu': lambda z: np.maximum(z, 0),
+    'softmax': lambda z: _softmax(z),
+}
+
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    np.exp(z, out=z)
+    z /= z.sum(axis=-1, keepdims=True)
+    return z
+
+
+# --- Xuất trọng số ---
+def export_numpy_weights(model, path):
+    # Chỉ hỗ trợ chuỗi Dense / Dropout như build_and_train_model tạo ra
+    layers, arrays = [], {}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == 'InputLayer':
+            continue
+        if kind == 'Dense':
+            kernel, bias = layer.get_weights()
+            index = len(layers)
+            arrays[f'kernel_{index}'] = kernel.astype(np.float32)
+            arrays[f'bias_{index}'] = bias.astype(np.float32)
+            layers.append({'type': 'dense', 'activation': layer.get_config()['activation']})
+        elif kind == 'Dropout':
+            layers.append({'type': 'dropout', 'rate': float(layer.rate)})
+        else:
+            raise ValueError(f"Lớp {kind} không được hỗ trợ bởi backend NumPy")
+    np.savez_compressed(path, layers=np.array(json.dumps(layers)), **arrays)
+    return Path(path)
+
+
+# --- Forward pass với MC dropout ---
+class NumpyMCDropoutModel:
+    """
+    Cùng giao diện predict(x_input, n_iter) với MCDropoutEngine nhưng không cần TensorFlow.
+    """
+    def __init__(self, layers, arrays, max_rows=65536, seed=None):
+        self.layers = []
+        for index, spec in enumerate(layers):
+            if spec['type'] == 'dense':
+                if spec['activation'] not in ACTIVATIONS:
+                    raise ValueError(f"Activation {spec['activation']} không được hỗ trợ bởi backend NumPy")
+                spec = dict(spec, kernel=arrays[f'kernel_{index}'], bias=arrays[f'bias_{index}'])
+            self.layers.append(spec)
+        self.max_rows = max_rows
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path) as data:
+            layers = json.loads(str(data['layers']))
+            arrays = {name: data[name] for name in data.files if name != 'layers'}
+        return cls(layers, arrays, **kwargs)
+
+    def _mc_forward(self, x, n_iter):
+        h = x
+        for spec in self.layers:
+            if spec['type'] == 'dense':
+                h = ACTIVATIONS[spec['activation']](h @ spec['kernel'] + spec['bias'])
+            else:
+                # Trước lớp Dropout đầu tiên mọi lần lặp giống nhau, chỉ nhân bản khi bắt đầu có nhiễu
+                if h.ndim == 2:
+                    h = np.broadcast_to(h, (n_iter,) + h.shape)
+                keep = 1.0 - spec['rate']
+                mask = self.rng.random(h.shape, dtype=np.float32) < keep
+                h = h * mask * np.float32(1.0 / keep)
+        if h.ndim == 2:
+            h = np.broadcast_to(h, (n_iter,) + h.shape)
+        return h.mean(axis=0), h.std(axis=0)
+
+    def predict(self, x_input, n_iter=100):
+        x_input = np.asarray(x_input, dtype=np.float32)
+        if x_input.ndim == 1: # Nếu chỉ là 1 mẫu, reshape lại
+            x_input = np.expand_dims(x_input, axis=0)
+
+        chunk_size = max(1, self.max_rows // n_iter)
+        mean_chunks, std_chunks = [], []
+        for start in range(0, x_input.shape[0], chunk_size):
+            mean_probs, std_devs = self._mc_forward(x_input[start:start + chunk_size], n_iter)
+            mean_chunks.append(mean_probs)
+            std_chunks.append(std_devs)
+        return np.concatenate(mean_chunks, axis=0), np.concatenate(std_chunks, axis=0)
+
+
+def load_numpy_model(version=None, models_dir=MODELS_DIR, **kwargs):
+    artifact_dir = get_artifact_dir(version, models_dir)
+    weights_path = artifact_dir / NUMPY_WEIGHTS_FILENAME
+    if not weights_path.exists():
+        raise FileNotFoundError(
+            f"Không tìm thấy {weights_path}. Hãy chạy 'python -m diagnosis.numpy_backend --version {artifact_dir.name}'."
+        )
+    return NumpyMCDropoutModel.load(weights_path, **kwargs), load_model_metadata(artifact_dir.name, models_dir)
+
+
+def main(argv=None):
+    from .model import load_model_artifact
+
+    parser = argparse.ArgumentParser(description="Xuất trọng số mô hình Keras sang .npz cho backend NumPy.")
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    args = parser.parse_args(argv)
+
+    model, metadata = load_model_artifact(args.version, args.models_dir)
+    path = export_numpy_weights(model, get_artifact_dir(metadata['version'], args.models_dir) / NUMPY_WEIGHTS_FILENAME)
+    print(f"Đã xuất trọng số sang {path} ({path.stat().st_size} bytes).")
+
+
+if __name__ == "__main__":
+    main()
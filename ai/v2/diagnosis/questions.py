@@ -0,0 +1,113 @@
+"""
+Chọn câu hỏi tiếp theo cho phiên hỏi đáp.
+
+- SequentialQuestionSelector: hỏi lần lượt mọi triệu chứng chính theo thứ tự CSV (hành vi cũ, tối đa 34 câu).
+- InformationGainSelector: sau mỗi câu trả lời, cập nhật phân phối hậu nghiệm trên các bệnh và hỏi
+  triệu chứng có lượng thông tin kỳ vọng (expected information gain) lớn nhất; dừng sớm khi chẩn đoán
+  dẫn đầu đủ chắc chắn và mô hình MC dropout cũng đưa ra cùng chẩn đoán.
+
+Xác suất P(triệu chứng | bệnh) được ước lượng từ disease_symptoms_matrix.csv (cùng dữ liệu huấn luyện
+mô hình), có làm trơn Laplace vì mỗi bệnh chỉ có vài dòng.
+"""
+import os
+
+import numpy as np
+
+QUESTION_STRATEGIES = ('information_gain', 'sequential')
+DEFAULT_QUESTION_STRATEGY = os.environ.get('DIAGNOSIS_QUESTION_STRATEGY', 'information_gain')
+# Dừng hỏi khi xác suất hậu nghiệm của bệnh dẫn đầu đạt ngưỡng này
+DEFAULT_STOP_CONFIDENCE = float(os.environ.get('DIAGNOSIS_STOP_CONFIDENCE', 0.9))
+LIKELIHOOD_SMOOTHING = 0.5
+
+
+def entropy(probabilities, axis=-1):
+    p = np.clip(probabilities, 1e-12, 1.0)
+    return -(p * np.log2(p)).sum(axis=axis)
+
+
+class SequentialQuestionSelector:
+    """
+    Hỏi các triệu chứng chính chưa được đề cập theo thứ tự catalog.main_codes, không dừng sớm.
+    """
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def _unasked(self, symptom_values, asked_questions):
+        return [ma_tc for ma_tc in self.catalog.main_codes
+                if symptom_values.get(ma_tc, 0) == 0 and ma_tc not in asked_questions]
+
+    def next_question(self, symptom_values, asked_questions, predict):
+        # Trả về (mã triệu chứng cần hỏi hoặc None, kết quả dự đoán nếu đã tính)
+        unasked = self._unasked(symptom_values, asked_questions)
+        return (unasked[0] if unasked else None), None
+
+    def remaining(self, symptom_values, asked_questions):
+        return len(self._unasked(symptom_values, asked_questions))
+
+
+class InformationGainSelector(SequentialQuestionSelector):
+    """
+    likelihoods: ma trận (số bệnh, số triệu chứng chính), likelihoods[d, j] = P(triệu chứng j | bệnh d),
+    thứ tự hàng / cột khớp với catalog.diseases / catalog.main_codes.
+    """
+    def __init__(self, catalog, likelihoods, confidence=DEFAULT_STOP_CONFIDENCE):
+        super().__init__(catalog)
+        self.likelihoods = np.asarray(likelihoods, dtype=np.float64)
+        self.confidence = confidence
+        expected_shape = (len(catalog.diseases), len(catalog.main_codes))
+        if self.likelihoods.shape != expected_shape:
+            raise ValueError(f"Ma trận likelihood phải có kích thước {expected_shape}, nhận {self.likelihoods.shape}")
+        self._log_present = np.log(self.likelihoods)
+        self._log_absent = np.log1p(-self.likelihoods)
+
+    @classmethod
+    def from_training_data(cls, catalog, X_train, y_train, smoothing=LIKELIHOOD_SMOOTHING, **kwargs):
+        # Đếm số dòng có triệu chứng theo từng bệnh (y_train là one-hot)
+        counts = y_train.T @ X_train
+        totals = y_train.sum(axis=0)[:, None]
+        return cls(catalog, (counts + smoothing) / (totals + 2 * smoothing), **kwargs)
+
+    def posterior(self, symptom_values, asked_questions):
+        # Chỉ dùng các triệu chứng đã biết: phát hiện từ mô tả ban đầu hoặc đã được hỏi
+        log_posterior = np.zeros(len(self.catalog.diseases))
+        for ma_tc, j in self.catalog.main_index.items():
+            if symptom_values.get(ma_tc, 0) == 1:
+                log_posterior += self._log_present[:, j]
+            elif ma_tc in asked_questions:
+                log_posterior += self._log_absent[:, j]
+        posterior = np.exp(log_posterior - log_posterior.max())
+        return posterior / posterior.sum()
+
+    def expected_information_gain(self, posterior, candidate_indices):
+        # IG(j) = H(P) - [P(có) * H(P | có) + P(không) * H(P | không)], tính cho mọi ứng viên cùng lúc
+        theta = self.likelihoods[:, candidate_indices]
+        p_present = posterior @ theta
+        posterior_present = posterior[:, None] * theta / p_present
+        posterior_absent = posterior[:, None] * (1 - theta) / (1 - p_present)
+        expected_entropy = (p_present * entropy(posterior_present, axis=0)
+                            + (1 - p_present) * entropy(posterior_absent, axis=0))
+        return entropy(posterior) - expected_entropy
+
+    def next_question(self, symptom_values, asked_questions, predict):
+        posterior = self.posterior(symptom_values, asked_questions)
+        if posterior.max() >= self.confidence:
+            # Đủ chắc chắn: chỉ dừng khi mô hình cũng chọn cùng bệnh, nếu không thì hỏi tiếp
+            prediction = predict()
+            if int(np.argmax(prediction[0][0])) == int(np.argmax(posterior)):
+                return None, prediction
+
+        unasked = self._unasked(symptom_values, asked_questions)
+        if not unasked:
+            return None, None
+        gains = self.expected_information_gain(posterior, [self.catalog.main_index[ma_tc] for ma_tc in unasked])
+        return unasked[int(np.argmax(gains))], None
+
+
+def create_question_selector(catalog, strategy=DEFAULT_QUESTION_STRATEGY, X_train=None, y_train=None):
+    if strategy == 'sequential':
+        return SequentialQuestionSelector(catalog)
+    if strategy == 'information_gain':
+        if X_train is None or y_train is None:
+            raise ValueError("Chiến lược information_gain cần dữ liệu huấn luyện để ước lượng likelihood")
+        return InformationGainSelector.from_training_data(catalog, X_train, y_train)
+    raise ValueError(f"Chiến lược chọn câu hỏi không hợp lệ: {strategy}")
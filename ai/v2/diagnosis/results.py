@@ -0,0 +1,31 @@
+"""
+Định dạng kết quả chẩn đoán (dùng chung cho /diagnose và phiên hỏi đáp).
+"""
+import numpy as np
+
+
+def symptom_vector(catalog, symptom_values):
+    # Thứ tự phải khớp với catalog.main_codes (thứ tự feature của model)
+    return np.array([symptom_values.get(ma_tc, 0) for ma_tc in catalog.main_codes], dtype=np.float32)
+
+
+def summarize_prediction(catalog, mean_probabilities, std_dev_probabilities, symptom_values):
+    ranking = np.argsort(-mean_probabilities)
+    most_likely_index = int(ranking[0])
+    return {
+        'diagnosis': catalog.diseases[most_likely_index],
+        'probability': float(mean_probabilities[most_likely_index]),
+        'uncertainty': float(std_dev_probabilities[most_likely_index]),
+        'probabilities': [
+            {
+                'disease': catalog.diseases[i],
+                'probability': float(mean_probabilities[i]),
+                'std_dev': float(std_dev_probabilities[i]),
+            }
+            for i in ranking
+        ],
+        'detected_symptoms': [
+            {'code': ma_tc, 'name': catalog.name(ma_tc)}
+            for ma_tc, present in symptom_values.items() if present
+        ],
+    }
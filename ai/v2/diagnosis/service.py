@@ -0,0 +1,241 @@
+"""
+Dịch vụ HTTP chẩn đoán: nạp mô hình đã huấn luyện và dữ liệu triệu chứng MỘT lần khi khởi động,
+sau đó phục vụ các request /diagnose từ trạng thái đã "nóng".
+
+    gunicorn --preload --bind 0.0.0.0:8001 "diagnosis.service:create_app()"
+    python -m diagnosis.service --port 8001   # chạy thử với wsgiref
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .artifacts import MODELS_DIR
+from .cases import CaseIndex
+from .data import DATA_DIR, load_catalog, load_training_data
+from .questions import DEFAULT_QUESTION_STRATEGY, create_question_selector
+from .results import summarize_prediction, symptom_vector
+from .session import ChatbotSessionEngine, SessionNotFound, create_session_store
+from .text import extract_initial_symptoms_from_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_ITER = int(os.environ.get('DIAGNOSIS_N_ITER', 100))
+# 'numpy' (mặc định) phục vụ từ model.npz mà không nạp TensorFlow; 'tensorflow' dùng model.keras
+DEFAULT_BACKEND = os.environ.get('DIAGNOSIS_BACKEND', 'numpy')
+MAX_N_ITER = 1000
+LATENCY_WINDOW = 10000 # Số request gần nhất dùng để tính p50/p99
+
+
+def load_engine(backend, version=None, models_dir=MODELS_DIR):
+    # Engine nào cũng có predict(x_input, n_iter) -> (mean, std)
+    if backend == 'numpy':
+        from .numpy_backend import load_numpy_model
+        return load_numpy_model(version, models_dir)
+    if backend == 'tensorflow':
+        from .model import MCDropoutEngine, load_model_artifact
+        model, metadata = load_model_artifact(version, models_dir)
+        return MCDropoutEngine(model), metadata
+    raise ValueError(f"Backend không hợp lệ: {backend}")
+
+
+class DiagnosisService:
+    """
+    Giữ mô hình, engine MC dropout và metadata triệu chứng trong bộ nhớ của worker.
+    """
+    def __init__(self, version=None, models_dir=MODELS_DIR, data_dir=DATA_DIR, n_iter=DEFAULT_N_ITER,
+                 backend=DEFAULT_BACKEND, question_strategy=DEFAULT_QUESTION_STRATEGY):
+        start = time.perf_counter()
+        self.engine, self.metadata = load_engine(backend, version, models_dir)
+        self.backend = backend
+        self.version = self.metadata['version']
+        self.n_iter = n_iter
+
+        self.catalog = load_catalog(data_dir)
+
+        # Thứ tự bệnh / triệu chứng của CSV phải khớp với lúc huấn luyện
+        if (self.metadata['diseases'] != list(self.catalog.diseases)
+                or self.metadata['symptom_codes'] != list(self.catalog.main_codes)):
+            raise ValueError(f"Dữ liệu CSV không khớp với mô hình phiên bản {self.version}. Hãy huấn luyện lại.")
+
+        # Phiên hỏi đáp nhiều lượt; trạng thái nằm trong kho phiên (Redis khi chạy nhiều worker)
+        # Ma trận huấn luyện làm ca tham chiếu (bit-packed) và để ước lượng P(triệu chứng | bệnh) khi chọn câu hỏi
+        X_train, y_train = load_training_data(self.catalog, data_dir)
+        self.case_index = CaseIndex.from_training_data(self.catalog, X_train, y_train)
+        self.question_strategy = question_strategy
+        self.sessions = ChatbotSessionEngine(
+            self.catalog, self.engine, create_session_store(), n_iter=n_iter,
+            selector=create_question_selector(self.catalog, question_strategy, X_train, y_train),
+            case_index=self.case_index,
+        )
+
+        # Khởi động trước để biên dịch graph, tránh request đầu tiên bị chậm
+        self.engine.predict(np.zeros(len(self.catalog.main_codes), dtype=np.float32), n_iter=self.n_iter)
+
+        self.cold_start_seconds = time.perf_counter() - start
+        self.started_at = time.time()
+        self._latencies_ms = deque(maxlen=LATENCY_WINDOW)
+        self._request_count = 0
+        self._lock = threading.Lock()
+        logger.info("Diagnosis model %s ready in %.3fs", self.version, self.cold_start_seconds)
+
+    def build_symptom_vector(self, text='', symptoms=None):
+        # symptoms: danh sách mã triệu chứng hoặc {mã: true/false}, lấy từ JSON nên phải kiểm tra kiểu
+        if isinstance(symptoms, dict):
+            symptoms = [code for code, present in symptoms.items() if present]
+        elif symptoms is not None and not isinstance(symptoms, list):
+            raise ValueError("symptoms phải là danh sách mã triệu chứng hoặc object {mã: true/false}")
+        if not all(isinstance(code, str) for code in symptoms or []):
+            raise ValueError("Mỗi phần tử của symptoms phải là một mã triệu chứng (chuỗi)")
+
+        values = extract_initial_symptoms_from_text(text or '', self.catalog.matcher, self.catalog.main_codes)
+        for code in symptoms or []:
+            if code not in values:
+                raise ValueError(f"Mã triệu chứng không hợp lệ: {code}")
+            values[code] = 1
+        return values
+
+    def diagnose(self, text='', symptoms=None, n_iter=None):
+        start = time.perf_counter()
+        if n_iter is None:
+            n_iter = self.n_iter
+        if not 1 <= n_iter <= MAX_N_ITER:
+            raise ValueError(f"n_iter phải nằm trong khoảng 1..{MAX_N_ITER}")
+
+        values = self.build_symptom_vector(text, symptoms)
+        mean_probabilities, std_dev_probabilities = self.engine.predict(
+            symptom_vector(self.catalog, values), n_iter=n_iter
+        )
+        result = summarize_prediction(self.catalog, mean_probabilities[0], std_dev_probabilities[0], values)
+        result['similar_cases'] = self.case_index.similar_cases(values)
+        latency_ms = (time.perf_counter() - start) * 1000
+        self._record_latency(latency_ms)
+
+        result.update({
+            'n_iter': n_iter,
+            'model_version': self.version,
+            'latency_ms': round(latency_ms, 3),
+        })
+        return result
+
+    def _record_latency(self, latency_ms):
+        with self._lock:
+            self._latencies_ms.append(latency_ms)
+            self._request_count += 1
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies_ms)
+            request_count = self._request_count
+        p50, p99 = np.percentile(latencies, [50, 99]) if latencies.size else (None, None)
+        return {
+            'model_version': self.version,
+            'backend': self.backend,
+            'question_strategy': self.question_strategy,
+            'cold_start_seconds': round(self.cold_start_seconds, 3),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'requests': request_count,
+            'latency_ms': {
+                'window': int(latencies.size),
+                'p50': None if p50 is None else round(float(p50), 3),
+                'p99': None if p99 is None else round(float(p99), 3),
+            },
+        }
+
+
+# --- Ứng dụng WSGI ---
+class DiagnosisApp:
+    def __init__(self, service):
+        self.service = service
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        path = environ.get('PATH_INFO', '').rstrip('/') or '/'
+        try:
+            if path == '/diagnose' and method == 'POST':
+                status, body = '200 OK', self.handle_diagnose(environ)
+            elif path == '/sessions' and method == 'POST':
+                data = self.read_json(environ)
+                status, body = '201 Created', self.service.sessions.start(data.get('text') or '')
+            elif path.startswith('/sessions/') and path.endswith('/answers') and method == 'POST':
+                session_id = path[len('/sessions/'):-len('/answers')]
+                data = self.read_json(environ)
+                status, body = '200 OK', self.service.sessions.answer(session_id, data.get('text') or '')
+            elif path == '/health' and method == 'GET':
+                status, body = '200 OK', {'status': 'healthy', 'service': 'DiagnosisService',
+                                          'model_version': self.service.version}
+            elif path == '/metrics' and method == 'GET':
+                status, body = '200 OK', self.service.stats()
+            else:
+                status, body = '404 Not Found', {'error': 'Not found'}
+        except SessionNotFound:
+            status, body = '404 Not Found', {'error': 'Phiên không tồn tại hoặc đã hết hạn'}
+        except ValueError as e:
+            status, body = '400 Bad Request', {'error': str(e)}
+        except Exception:
+            logger.exception("Diagnosis request failed")
+            status, body = '500 Internal Server Error', {'error': 'Internal server error'}
+
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        start_response(status, [
+            ('Content-Type', 'application/json; charset=utf-8'),
+            ('Content-Length', str(len(payload))),
+        ])
+        return [payload]
+
+    def read_json(self, environ):
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            data = json.loads(environ['wsgi.input'].read(length) or b'{}')
+        except (TypeError, ValueError):
+            raise ValueError("Request body phải là JSON hợp lệ")
+        if not isinstance(data, dict):
+            raise ValueError("Request body phải là một JSON object")
+        if data.get('text') is not None and not isinstance(data['text'], str):
+            raise ValueError("text phải là chuỗi")
+        return data
+
+    def handle_diagnose(self, environ):
+        data = self.read_json(environ)
+        n_iter = data.get('n_iter')
+        try:
+            n_iter = int(n_iter) if n_iter is not None else None
+        except (TypeError, ValueError):
+            raise ValueError("n_iter phải là số nguyên")
+        return self.service.diagnose(text=data.get('text', ''), symptoms=data.get('symptoms'), n_iter=n_iter)
+
+
+def create_app(version=None, backend=DEFAULT_BACKEND):
+    version = version or os.environ.get('DIAGNOSIS_MODEL_VERSION') or None
+    app = DiagnosisApp(DiagnosisService(version=version, backend=backend))
+    # Với gunicorn --preload, danh mục và trọng số được dựng trước khi fork; gc.freeze() để GC
+    # không chạm vào các đối tượng này, giữ trang nhớ dùng chung giữa các worker (copy-on-write)
+    gc.freeze()
+    return app
+
+
+def main(argv=None):
+    from wsgiref.simple_server import make_server
+
+    parser = argparse.ArgumentParser(description="Chạy thử dịch vụ chẩn đoán.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--version', help="Phiên bản mô hình (mặc định: LATEST)")
+    parser.add_argument('--backend', choices=['numpy', 'tensorflow'], default=DEFAULT_BACKEND)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(args.version, args.backend)
+    print(f"Mô hình {app.service.version} sẵn sàng sau {app.service.cold_start_seconds:.3f}s, "
+          f"lắng nghe tại http://{args.host}:{args.port}")
+    make_server(args.host, args.port, app).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Phiên hỏi đáp không trạng thái trong tiến trình: toàn bộ trạng thái hội thoại (hàng đợi câu hỏi,
+các câu đã hỏi, câu trả lời) được tuần tự hóa vào kho phiên (Redis hoặc bộ nhớ có TTL).
+
+    start(text)              -> câu hỏi đầu tiên (hoặc chẩn đoán nếu không còn gì để hỏi)
+    answer(session_id, text) -> câu hỏi tiếp theo hoặc chẩn đoán
+
+Nhờ vậy một worker có thể xen kẽ hàng nghìn cuộc hội thoại, và bất kỳ worker nào cũng có thể
+trả lời lượt tiếp theo của một phiên.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+from .questions import SequentialQuestionSelector
+from .results import summarize_prediction, symptom_vector
+from .text import extract_initial_symptoms_from_text, interpret_yes_no_vietnamese
+
+DEFAULT_SESSION_TTL = int(os.environ.get('DIAGNOSIS_SESSION_TTL', 1800)) # giây
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+class ChatSession:
+    __slots__ = ('session_id', 'symptom_values', 'question_queue', 'asked_questions', 'detailed_answers', 'created_at')
+
+    def __init__(self, session_id, symptom_values, question_queue, asked_questions, detailed_answers, created_at):
+        self.session_id = session_id
+        self.symptom_values = symptom_values        # {MaTrieuChungChinh: 0 hoặc 1}
+        self.question_queue = question_queue        # list, phần tử đầu là câu đang chờ trả lời
+        self.asked_questions = asked_questions      # set, để tránh hỏi lặp lại
+        self.detailed_answers = detailed_answers    # câu trả lời cho các câu hỏi làm rõ
+        self.created_at = created_at
+
+    def to_json(self):
+        return json.dumps({
+            'session_id': self.session_id,
+            'symptom_values': self.symptom_values,
+            'question_queue': self.question_queue,
+            'asked_questions': sorted(self.asked_questions),
+            'detailed_answers': self.detailed_answers,
+            'created_at': self.created_at,
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, payload):
+        data = json.loads(payload)
+        data['asked_questions'] = set(data['asked_questions'])
+        return cls(**data)
+
+
+# --- Kho phiên ---
+class InMemorySessionStore:
+    """
+    Kho phiên trong bộ nhớ của một tiến trình, hết hạn sau ttl giây không hoạt động.
+    Lưu dạng JSON giống RedisSessionStore để hai kho có thể thay thế nhau.
+    """
+    def __init__(self, ttl=DEFAULT_SESSION_TTL, purge_interval=60):
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._sessions = {}  # session_id -> (expires_at, payload)
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + purge_interval
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or entry[0] < now:
+                self._sessions.pop(session_id, None)
+                raise SessionNotFound(session_id)
+        return ChatSession.from_json(entry[1])
+
+    def save(self, session):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session.session_id] = (now + self.ttl, session.to_json())
+            if now >= self._next_purge:
+                self._purge_expired(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _purge_expired(self, now):
+        expired = [sid for sid, (expires_at, _) in self._sessions.items() if expires_at < now]
+        for sid in expired:
+            del self._sessions[sid]
+        self._next_purge = now + self.purge_interval
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class RedisSessionStore:
+    """
+    Kho phiên dùng Redis (service redis trong docker-compose), mỗi phiên là một key có TTL.
+    """
+    def __init__(self, client, ttl=DEFAULT_SESSION_TTL, prefix='diagnosis:session:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, session_id):
+        payload = self.client.get(self.prefix + session_id)
+        if payload is None:
+            raise SessionNotFound(session_id)
+        return ChatSession.from_json(payload)
+
+    def save(self, session):
+        self.client.set(self.prefix + session.session_id, session.to_json(), ex=self.ttl)
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+def create_session_store(backend=None, ttl=DEFAULT_SESSION_TTL):
+    backend = backend or os.environ.get('DIAGNOSIS_SESSION_STORE', 'memory')
+    if backend == 'memory':
+        return InMemorySessionStore(ttl=ttl)
+    if backend == 'redis':
+        return RedisSessionStore.from_url(os.environ.get('REDIS_URL', 'redis://redis:6379/1'), ttl=ttl)
+    raise ValueError(f"Kho phiên không hợp lệ: {backend}")
+
+
+# --- Máy trạng thái hội thoại ---
+class ChatbotSessionEngine:
+    """
+    Cùng luồng hỏi đáp với run_intelligent_chatbot, nhưng mỗi lượt là một lời gọi độc lập.
+    predictor: đối tượng có predict(x_input, n_iter) -> (mean, std) (MCDropoutEngine hoặc backend NumPy).
+    selector: chọn triệu chứng chính tiếp theo (xem questions.py), mặc định hỏi tuần tự như trước.
+    case_index: CaseIndex (cases.py) để kèm các ca tương tự vào kết quả, có thể bỏ qua.
+    """
+    def __init__(self, catalog, predictor, store, n_iter=100, selector=None, case_index=None):
+        self.catalog = catalog
+        self.predictor = predictor
+        self.store = store
+        self.n_iter = n_iter
+        self.selector = selector or SequentialQuestionSelector(catalog)
+        self.case_index = case_index
+
+    def start(self, text):
+        catalog = self.catalog
+        # 1. Trích xuất triệu chứng ban đầu
+        symptom_values = extract_initial_symptoms_from_text(text, catalog.matcher, catalog.main_codes)
+
+        # 2. Hàng đợi ban đầu: câu hỏi làm rõ cho triệu chứng đã báo cáo; các triệu chứng chính
+        # chưa được đề cập do selector chọn dần khi hàng đợi trống
+        question_queue, asked_questions = [], set()
+        for ma_tc_chinh, present in symptom_values.items():
+            if present:
+                for ma_tc_con in catalog.children(ma_tc_chinh):
+                    if ma_tc_con not in asked_questions:
+                        question_queue.append(ma_tc_con)
+                        asked_questions.add(ma_tc_con)
+
+        session = ChatSession(uuid.uuid4().hex, symptom_values, question_queue, asked_questions, {}, time.time())
+        response = self._next_step(session)
+        response['detected_symptoms'] = [
+            {'code': ma_tc, 'name': catalog.name(ma_tc)} for ma_tc, present in symptom_values.items() if present
+        ]
+        return response
+
+    def answer(self, session_id, text):
+        session = self.store.get(session_id)
+        if not session.question_queue:
+            raise SessionNotFound(session_id)
+        ma_tc_to_ask = session.question_queue.pop(0)
+
+        if self.catalog.is_main(ma_tc_to_ask):
+            answer_value = interpret_yes_no_vietnamese(text)
+            session.symptom_values[ma_tc_to_ask] = answer_value
+            # Trả lời "Có" cho triệu chứng chính thì ưu tiên hỏi ngay các câu hỏi con chưa hỏi
+            if answer_value == 1:
+                for ma_tc_con in self.catalog.children(ma_tc_to_ask):
+                    if ma_tc_con not in session.asked_questions:
+                        session.question_queue.insert(0, ma_tc_con)
+                        session.asked_questions.add(ma_tc_con)
+        else:
+            # Câu hỏi làm rõ, lưu câu trả lời text (có thể xử lý sau này)
+            session.detailed_answers[ma_tc_to_ask] = text.strip()
+
+        return self._next_step(session)
+
+    def _predict(self, session):
+        return self.predictor.predict(symptom_vector(self.catalog, session.symptom_values), n_iter=self.n_iter)
+
+    def _next_step(self, session):
+        prediction = None
+        if not session.question_queue:
+            ma_tc, prediction = self.selector.next_question(
+                session.symptom_values, session.asked_questions, lambda: self._predict(session)
+            )
+            if ma_tc is not None:
+                session.question_queue.append(ma_tc)
+                session.asked_questions.add(ma_tc)
+
+        if session.question_queue:
+            self.store.save(session)
+            ma_tc = session.question_queue[0]
+            return {
+                'session_id': session.session_id,
+                'done': False,
+                'question': {'code': ma_tc, 'text': self.catalog.question(ma_tc)},
+                # Với information_gain đây là số câu tối đa, phiên thường kết thúc sớm hơn
+                'remaining_questions': len(session.question_queue)
+                                       + self.selector.remaining(session.symptom_values, session.asked_questions),
+            }
+
+        # 3. Hết câu hỏi: dự đoán (nếu selector chưa tính) và kết thúc phiên
+        self.store.delete(session.session_id)
+        mean_probabilities, std_dev_probabilities = prediction or self._predict(session)
+        result = summarize_prediction(
+            self.catalog, mean_probabilities[0], std_dev_probabilities[0], session.symptom_values
+        )
+        result.update({
+            'session_id': session.session_id,
+            'done': True,
+            'questions_asked': len(session.asked_questions),
+            'detailed_answers': session.detailed_answers,
+        })
+        if self.case_index is not None:
+            result['similar_cases'] = self.case_index.similar_cases(session.symptom_values)
+        return result
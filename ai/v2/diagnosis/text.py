@@ -0,0 +1,41 @@
+"""
+Xử lý văn bản tiếng Việt của người dùng: câu trả lời Có/Không và trích xuất triệu chứng.
+"""
+
+
+# --- Xử lý đầu vào ngôn ngữ tự nhiên đơn giản cho câu hỏi Có/Không ---
+def interpret_yes_no_vietnamese(answer_text):
+    answer = answer_text.strip().lower()
+    positive_responses = ["có", "c", "yes", "y", "đúng", "phải", "roi", "co", " bị"]
+    # Thêm một số từ phủ định cơ bản
+    negative_responses = ["không", "k", "no", "n", "sai", "chưa", "khong", "ko", "đéo"] 
+    
+    for neg_word in negative_responses:
+        if neg_word in answer:
+            # Xử lý trường hợp "không có" vs "có"
+            is_truly_negative = True
+            for pos_word in positive_responses:
+                if pos_word in answer and answer.find(pos_word) < answer.find(neg_word): # "có ... không"
+                    # Đây có thể là một câu hỏi, hoặc "có nhưng không nhiều", cần xử lý tinh vi hơn
+                    # Tạm thời, nếu "có" xuất hiện trước "không" thì vẫn coi là có
+                    # is_truly_negative = False # Cân nhắc lại logic này
+                    pass
+            if is_truly_negative:
+                return 0 # Nếu có từ phủ định và không bị ghi đè bởi từ khẳng định đứng trước
+
+    for pos_word in positive_responses:
+        if pos_word in answer:
+            return 1
+            
+    # Nếu không rõ ràng, hỏi lại hoặc mặc định là không
+    # print("[Bot]: Xin lỗi, tôi chưa hiểu rõ câu trả lời của bạn. Bạn có thể nói rõ hơn là 'Có' hay 'Không' được không?")
+    return 0 # Mặc định là không nếu không rõ
+
+# --- Trích xuất triệu chứng cơ bản từ văn bản tự do ---
+def extract_initial_symptoms_from_text(text_input, symptom_matcher, ma_trieu_chung_chinh_list):
+    # symptom_matcher: SymptomKeywordMatcher dựng sẵn trong SymptomCatalog, duyệt văn bản đúng một lần
+    detected_symptoms_values = {ma_tc: 0 for ma_tc in ma_trieu_chung_chinh_list}
+    for ma_tc in symptom_matcher.match(text_input):
+        if ma_tc in detected_symptoms_values: # Chỉ xét các triệu chứng chính
+            detected_symptoms_values[ma_tc] = 1
+    return detected_symptoms_values
@@ -0,0 +1,78 @@
+"""
+Huấn luyện mô hình ngoại tuyến và ghi artifact có phiên bản.
+
+    python -m diagnosis.train --version v1
+    python -m diagnosis.train --version v2 --dataset data/encounters --epochs 5   # dữ liệu lớn, đọc dạng luồng
+"""
+import argparse
+import time
+
+import tensorflow as tf
+
+from .data import DATA_DIR, load_catalog, load_data
+from .artifacts import MODELS_DIR, NUMPY_WEIGHTS_FILENAME
+from .dataset import DEFAULT_BATCH_SIZE, DEFAULT_SHUFFLE_BUFFER, make_tf_dataset, streaming_batches
+from .model import build_and_train_model, save_model_artifact, train_model_on_dataset
+from .numpy_backend import export_numpy_weights
+
+
+def train(version=None, epochs=150, data_dir=DATA_DIR, models_dir=MODELS_DIR, dataset_dir=None, csv_path=None,
+          batch_size=DEFAULT_BATCH_SIZE, shuffle_buffer=DEFAULT_SHUFFLE_BUFFER):
+    start = time.perf_counter()
+    if dataset_dir is None and csv_path is None:
+        # Ma trận nhỏ mặc định: nạp toàn bộ vào bộ nhớ như trước
+        X_train, y_train, catalog = load_data(data_dir)
+        num_samples = X_train.shape[0]
+        model = build_and_train_model(X_train, y_train, X_train.shape[1], len(catalog.diseases), epochs=epochs)
+        evaluate_args = (X_train, y_train)
+    else:
+        # Dữ liệu lớn: đọc theo khối, bộ nhớ đỉnh phụ thuộc shuffle_buffer chứ không phụ thuộc số dòng
+        catalog = load_catalog(data_dir)
+        num_features, num_classes = len(catalog.main_codes), len(catalog.diseases)
+        batches, num_samples, num_batches = streaming_batches(catalog, dataset_dir, csv_path, batch_size, shuffle_buffer)
+        model = train_model_on_dataset(make_tf_dataset(batches, num_features, num_classes, num_batches),
+                                       num_samples, num_features, num_classes, epochs=epochs)
+        eval_batches, _, _ = streaming_batches(catalog, dataset_dir, csv_path, batch_size, shuffle_buffer, shuffle=False)
+        evaluate_args = (make_tf_dataset(eval_batches, num_features, num_classes, num_batches),)
+    if model is None:
+        raise SystemExit("Kết thúc chương trình do lỗi huấn luyện mô hình.")
+    training_seconds = time.perf_counter() - start
+
+    _, accuracy = model.evaluate(*evaluate_args, verbose=0)
+    metadata = {
+        'diseases': list(catalog.diseases),
+        'symptom_codes': list(catalog.main_codes),
+        'symptom_names': list(catalog.main_names),
+        'epochs': epochs,
+        'train_samples': int(num_samples),
+        'train_accuracy': float(accuracy),
+        'training_seconds': round(training_seconds, 3),
+        'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'tensorflow_version': tf.__version__,
+    }
+    artifact_dir = save_model_artifact(model, metadata, version=version, models_dir=models_dir)
+    # Trọng số dạng .npz để worker phục vụ chỉ cần NumPy
+    export_numpy_weights(model, artifact_dir / NUMPY_WEIGHTS_FILENAME)
+    print(f"Đã lưu mô hình vào {artifact_dir} (độ chính xác huấn luyện = {accuracy:.3f}, {training_seconds:.1f}s).")
+    return artifact_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Huấn luyện mô hình chẩn đoán và ghi artifact.")
+    parser.add_argument('--version', help="Tên phiên bản (mặc định: thời điểm huấn luyện)")
+    parser.add_argument('--epochs', type=int, default=150)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--dataset', help="Thư mục dữ liệu .npy tạo bởi 'python -m diagnosis.dataset'")
+    source.add_argument('--stream-csv', help="Đọc trực tiếp file CSV lớn theo từng khối")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--shuffle-buffer', type=int, default=DEFAULT_SHUFFLE_BUFFER)
+    args = parser.parse_args(argv)
+    train(version=args.version, epochs=args.epochs, data_dir=args.data_dir, models_dir=args.models_dir,
+          dataset_dir=args.dataset, csv_path=args.stream_csv, batch_size=args.batch_size,
+          shuffle_buffer=args.shuffle_buffer)
+
+
+if __name__ == "__main__":
+    main()
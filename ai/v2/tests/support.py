@@ -0,0 +1,45 @@
+"""
+Dữ liệu và mô hình dùng chung cho các test.
+
+Mô hình được huấn luyện MỘT lần cho cả lượt chạy (vài giây trên disease_symptoms_matrix.csv),
+với hạt giống cố định, và ghi vào thư mục tạm như một artifact thật (model.keras, model.npz, metadata.json).
+"""
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from functools import lru_cache
+
+os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+TEST_VERSION = 'test'
+TEST_EPOCHS = 50
+
+requires_tensorflow = unittest.skipUnless(importlib.util.find_spec('tensorflow'), "Cần TensorFlow")
+
+_models_dir = tempfile.TemporaryDirectory(prefix='diagnosis-tests-')
+
+
+@lru_cache(maxsize=None)
+def trained_models_dir():
+    # Thư mục artifact chứa phiên bản TEST_VERSION (cũng là LATEST)
+    import tensorflow as tf
+    from diagnosis.train import train
+
+    tf.keras.utils.set_random_seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        train(version=TEST_VERSION, epochs=TEST_EPOCHS, models_dir=_models_dir.name)
+    return _models_dir.name
+
+
+def assert_close_mc(testcase, actual, expected, max_tolerance, mean_tolerance):
+    """
+    So sánh hai ước lượng MC dropout độc lập: sai khác lớn nhất chịu nhiễu lấy mẫu,
+    sai khác trung bình thì nhỏ hơn nhiều và bắt được sai lệch có hệ thống.
+    """
+    difference = abs(actual - expected)
+    testcase.assertEqual(actual.shape, expected.shape)
+    testcase.assertLessEqual(float(difference.max()), max_tolerance)
+    testcase.assertLessEqual(float(difference.mean()), mean_tolerance)
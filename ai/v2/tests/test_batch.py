@@ -0,0 +1,101 @@
+import importlib.util
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from diagnosis.batch import format_scores_csv, rescore, score_columns, score_frame
+from diagnosis.data import DATA_DIR, DISEASE_SYMPTOMS_MATRIX_CSV, load_catalog
+
+from .support import TEST_VERSION, requires_tensorflow, trained_models_dir
+
+
+class ScoreFormattingTests(unittest.TestCase):
+    def test_csv_matches_pandas(self):
+        diseases = ['Cúm', 'Sốt xuất huyết', 'Viêm "họng", cấp']
+        rng = np.random.default_rng(0)
+        mean_probabilities = rng.dirichlet(np.ones(3), size=4)
+        std_dev_probabilities = rng.random((4, 3)) / 10
+        frame = pd.DataFrame({
+            'encounter_id': [1, 2, 3, 4],
+            'note': ['a,b', None, 'dòng "trích dẫn"', ''],
+            'weight': [60.5, np.nan, 70.0, 1e-7],
+        })
+
+        expected = score_frame(frame, mean_probabilities, std_dev_probabilities, diseases)
+        actual = pd.read_csv(io.StringIO(
+            format_scores_csv(frame, mean_probabilities, std_dev_probabilities, diseases, header=True)
+        ))
+
+        # Các cột gốc giữ nguyên (ô trống vẫn rỗng), khối điểm số làm tròn 6 chữ số
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        pd.testing.assert_frame_equal(actual[frame.columns], pd.read_csv(io.StringIO(frame.to_csv(index=False))))
+        self.assertEqual(actual['diagnosis'].tolist(), expected['diagnosis'].tolist())
+        score_values = score_columns(diseases)[1:]
+        np.testing.assert_allclose(actual[score_values], expected[score_values], atol=5e-7)
+
+
+@requires_tensorflow
+class RescoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = load_catalog()
+        cls.models_dir = trained_models_dir()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.input_path = Path(self.tmp.name) / 'encounters.csv'
+        matrix_df = pd.read_csv(DATA_DIR / DISEASE_SYMPTOMS_MATRIX_CSV)
+        matrix_df.insert(0, 'encounter_id', range(1000, 1000 + len(matrix_df)))
+        matrix_df.to_csv(self.input_path, index=False)
+        self.matrix_df = matrix_df
+
+    def run_rescore(self, name, **kwargs):
+        output_path = Path(self.tmp.name) / name
+        kwargs.setdefault('workers', 0)
+        stats = rescore(self.input_path, output_path, version=TEST_VERSION, models_dir=self.models_dir,
+                        n_iter=20, chunk_rows=10, **kwargs)
+        self.assertEqual(stats['rows'], len(self.matrix_df))
+        self.assertEqual(stats['model_version'], TEST_VERSION)
+        return pd.read_parquet(output_path) if output_path.suffix == '.parquet' else pd.read_csv(output_path)
+
+    def test_inline_output(self):
+        scores = self.run_rescore('scores.csv')
+
+        self.assertEqual(list(scores.columns), ['encounter_id', 'TenBenh'] + score_columns(self.catalog.diseases))
+        self.assertEqual(scores['encounter_id'].tolist(), self.matrix_df['encounter_id'].tolist())
+        probabilities = scores[[f'p_{disease}' for disease in self.catalog.diseases]].to_numpy()
+        np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, atol=1e-4)
+        np.testing.assert_allclose(scores['probability'], probabilities.max(axis=1))
+        self.assertEqual(scores['diagnosis'].tolist(),
+                         [self.catalog.diseases[i] for i in probabilities.argmax(axis=1)])
+
+    def test_keep_symptoms(self):
+        scores = self.run_rescore('scores.csv', keep_symptoms=True)
+
+        self.assertEqual(list(scores.columns[:len(self.matrix_df.columns)]), list(self.matrix_df.columns))
+
+    def test_deterministic_by_seed_and_independent_of_workers(self):
+        inline = self.run_rescore('inline.csv', seed=3)
+
+        pd.testing.assert_frame_equal(self.run_rescore('again.csv', seed=3), inline)
+        pd.testing.assert_frame_equal(self.run_rescore('pool.csv', seed=3, workers=2), inline)
+        self.assertFalse(self.run_rescore('other.csv', seed=4)['probability'].equals(inline['probability']))
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), "Cần pyarrow")
+    def test_parquet_matches_csv(self):
+        csv_scores = self.run_rescore('scores.csv')
+        parquet_scores = self.run_rescore('scores.parquet')
+
+        self.assertEqual(list(parquet_scores.columns), list(csv_scores.columns))
+        np.testing.assert_allclose(parquet_scores['probability'], csv_scores['probability'], atol=1e-6)
+
+    def test_missing_symptom_columns(self):
+        self.matrix_df.drop(columns=['TC001']).to_csv(self.input_path, index=False)
+
+        with self.assertRaises(ValueError):
+            self.run_rescore('scores.csv')
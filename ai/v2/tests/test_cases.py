@@ -0,0 +1,98 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from diagnosis import cases
+from diagnosis.cases import CaseIndex, pack_symptom_vectors, popcount, unpack_symptom_vectors
+from diagnosis.data import load_data
+
+
+class NumpyWithoutBitwiseCount:
+    """
+    numpy như trước 2.0, để chạy nhánh bảng tra của popcount
+    """
+    def __getattr__(self, name):
+        if name == 'bitwise_count':
+            raise AttributeError(name)
+        return getattr(np, name)
+
+
+class BitPackingTests(unittest.TestCase):
+    def setUp(self):
+        self.vectors = np.random.default_rng(0).integers(0, 2, size=(50, 130), dtype=np.uint8)
+
+    def test_round_trip_beyond_one_word(self):
+        words = pack_symptom_vectors(self.vectors)
+
+        self.assertEqual(words.shape, (50, 3))
+        self.assertEqual(words.dtype, np.uint64)
+        np.testing.assert_array_equal(unpack_symptom_vectors(words, 130), self.vectors)
+        np.testing.assert_array_equal(unpack_symptom_vectors(pack_symptom_vectors(self.vectors[0]), 130), self.vectors[0])
+
+    def test_bit_order(self):
+        vector = np.zeros(70, dtype=np.uint8)
+        vector[[0, 3, 64]] = 1
+
+        np.testing.assert_array_equal(pack_symptom_vectors(vector), [0b1001, 1])
+
+    def test_popcount_fallback(self):
+        words = pack_symptom_vectors(self.vectors)
+        expected = self.vectors.sum(axis=1)
+
+        np.testing.assert_array_equal(popcount(words), expected)
+        with mock.patch.object(cases, 'np', NumpyWithoutBitwiseCount()):
+            np.testing.assert_array_equal(popcount(words), expected)
+            np.testing.assert_array_equal(popcount(words[0]), expected[0])
+
+
+class CaseIndexTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.X_train, cls.y_train, cls.catalog = load_data()
+        cls.index = CaseIndex.from_training_data(cls.catalog, cls.X_train, cls.y_train)
+
+    def test_distances_match_brute_force(self):
+        cases_bool = self.X_train.astype(bool)
+        for query in (self.X_train[0], np.zeros(34), np.ones(34), self.X_train[5] * (np.arange(34) % 2)):
+            with self.subTest(query=query):
+                query_bool = query.astype(bool)
+                packed = pack_symptom_vectors(query)
+
+                np.testing.assert_array_equal(self.index.distances(packed), (cases_bool != query_bool).sum(axis=1))
+                union = (cases_bool | query_bool).sum(axis=1)
+                shared = (cases_bool & query_bool).sum(axis=1)
+                expected = np.where(union > 0, 1 - shared / np.maximum(union, 1), 0.0)
+                np.testing.assert_allclose(self.index.distances(packed, 'jaccard'), expected)
+        with self.assertRaises(ValueError):
+            self.index.distances(pack_symptom_vectors(self.X_train[0]), 'cosine')
+
+    def test_nearest_ordering(self):
+        query = pack_symptom_vectors(self.X_train[7])
+        distances = self.index.distances(query)
+
+        indices, nearest_distances = self.index.nearest(query, k=10)
+
+        # Sắp theo (khoảng cách, chỉ số ca) như một lần sort ổn định
+        expected = np.lexsort((np.arange(len(distances)), distances))[:10]
+        np.testing.assert_array_equal(indices, expected)
+        np.testing.assert_array_equal(nearest_distances, distances[expected])
+        self.assertEqual(nearest_distances[0], 0)
+        self.assertEqual(len(self.index.nearest(query, k=0)[0]), 0)
+        self.assertEqual(len(self.index.nearest(query, k=1000)[0]), len(self.index))
+
+    def test_similar_cases(self):
+        row = self.X_train[3]
+        symptom_values = {code: int(row[j]) for code, j in self.catalog.main_index.items()}
+
+        results = self.index.similar_cases(symptom_values, k=2)
+
+        self.assertEqual(results, self.index.similar_cases(row, k=2))
+        self.assertEqual(results[0]['distance'], 0)
+        self.assertIn(results[0]['disease'], self.catalog.diseases)
+        self.assertEqual(results[0]['shared_symptoms'], [code for code, value in symptom_values.items() if value])
+        self.assertIsInstance(self.index.similar_cases(symptom_values, metric='jaccard')[0]['distance'], float)
+
+    def test_mismatched_labels(self):
+        with self.assertRaises(ValueError):
+            CaseIndex(self.catalog, pack_symptom_vectors(self.X_train), [0])
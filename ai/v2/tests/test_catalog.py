@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from diagnosis.catalog import Symptom, SymptomCatalog
+from diagnosis.data import DATA_DIR, DISEASE_SYMPTOMS_MATRIX_CSV, SYMPTOMS_CSV, load_data
+
+
+class SymptomCatalogTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.X_train, cls.y_train, cls.catalog = load_data()
+        cls.symptoms_df = pd.read_csv(DATA_DIR / SYMPTOMS_CSV)
+
+    def test_counts_and_indices(self):
+        main_df = self.symptoms_df[self.symptoms_df['LaTrieuChungChinh'].astype(bool)]
+
+        self.assertEqual(len(self.catalog), len(self.symptoms_df))
+        self.assertEqual(self.catalog.main_codes, tuple(main_df['MaTrieuChung']))
+        self.assertEqual(len(self.catalog.main_codes), 34)
+        self.assertEqual(len(self.catalog.diseases), 18)
+        for i, code in enumerate(self.catalog.main_codes):
+            self.assertEqual(self.catalog.main_index[code], i)
+        for i, disease in enumerate(self.catalog.diseases):
+            self.assertEqual(self.catalog.disease_index[disease], i)
+
+    def test_lookups(self):
+        row = self.symptoms_df.iloc[0]
+
+        self.assertIn(row['MaTrieuChung'], self.catalog)
+        self.assertEqual(self.catalog.name(row['MaTrieuChung']), row['TenTrieuChung'])
+        self.assertEqual(self.catalog.question(row['MaTrieuChung']), row['CauHoi'])
+        self.assertEqual(self.catalog.is_main(row['MaTrieuChung']), bool(row['LaTrieuChungChinh']))
+        self.assertEqual(self.catalog.name('TC999'), 'TC999')
+        self.assertFalse(self.catalog.is_main('TC999'))
+        self.assertNotIn('TC999', self.catalog)
+
+    def test_children(self):
+        child_df = self.symptoms_df[self.symptoms_df['TrieuChungCha'].notna()]
+
+        for parent, rows in child_df.groupby('TrieuChungCha', sort=False):
+            self.assertEqual(self.catalog.children(parent), tuple(rows['MaTrieuChung']))
+        self.assertEqual(self.catalog.children('TC999'), ())
+
+    def test_question_fallback(self):
+        catalog = SymptomCatalog(['Cúm'], [Symptom('TC001', 'Đau Đầu', True, None, None, ('đau đầu',), ())])
+
+        self.assertEqual(catalog.question('TC001'), 'Bạn có bị đau đầu không?')
+        self.assertEqual(catalog.matcher.match('tôi bị đau đầu'), {'TC001'})
+
+    def test_training_data_follows_catalog_order(self):
+        matrix_df = pd.read_csv(DATA_DIR / DISEASE_SYMPTOMS_MATRIX_CSV)
+
+        self.assertEqual(self.X_train.shape, (len(matrix_df), len(self.catalog.main_codes)))
+        np.testing.assert_array_equal(self.X_train[:, self.catalog.main_index['TC001']], matrix_df['TC001'])
+        self.assertEqual(
+            [self.catalog.diseases[i] for i in self.y_train.argmax(axis=1)], matrix_df['TenBenh'].tolist(),
+        )
+        np.testing.assert_array_equal(self.y_train.sum(axis=1), 1.0)
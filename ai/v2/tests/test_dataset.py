@@ -0,0 +1,93 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from diagnosis.data import DATA_DIR, DISEASE_SYMPTOMS_MATRIX_CSV, load_data
+from diagnosis.dataset import (
+    MatrixDataset, convert_matrix, count_batches, count_csv_rows, iter_batches, iter_csv_chunks,
+    streaming_batches,
+)
+
+MATRIX_CSV = DATA_DIR / DISEASE_SYMPTOMS_MATRIX_CSV
+
+
+class StreamingDatasetTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.X_train, cls.y_train, cls.catalog = load_data()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_count_csv_rows(self):
+        self.assertEqual(count_csv_rows(MATRIX_CSV), len(self.X_train))
+        path = Path(self.tmp.name) / 'no_newline.csv'
+        path.write_bytes(b'TenBenh,TC001\nC\xc3\xbam,1\nC\xc3\xbam,0')
+        self.assertEqual(count_csv_rows(path, block_size=4), 2)
+
+    def test_csv_chunks_match_load_training_data(self):
+        chunks = list(iter_csv_chunks(self.catalog, MATRIX_CSV, chunk_rows=10))
+
+        self.assertEqual([len(labels) for _, labels in chunks], [10] * 5 + [3])
+        np.testing.assert_array_equal(np.concatenate([f for f, _ in chunks]), self.X_train)
+        np.testing.assert_array_equal(np.concatenate([l for _, l in chunks]), self.y_train.argmax(axis=1))
+
+    def test_unknown_disease(self):
+        path = Path(self.tmp.name) / 'unknown.csv'
+        path.write_text('TenBenh,' + ','.join(self.catalog.main_codes) + '\nBệnh lạ,' + ','.join(['0'] * 34) + '\n',
+                        encoding='utf-8')
+        with self.assertRaises(ValueError):
+            list(iter_csv_chunks(self.catalog, path))
+
+    def test_convert_round_trip(self):
+        for dataset_format in ('packed', 'dense'):
+            with self.subTest(dataset_format=dataset_format):
+                output_dir = Path(self.tmp.name) / dataset_format
+                metadata = convert_matrix(self.catalog, MATRIX_CSV, output_dir, dataset_format, chunk_rows=7)
+                dataset = MatrixDataset(output_dir)
+                dataset.check_catalog(self.catalog)
+
+                self.assertEqual(metadata['rows'], len(self.X_train))
+                self.assertEqual(dataset.features.shape[1], 5 if dataset_format == 'packed' else 34)
+                features, labels = dataset.read(0, len(dataset))
+                np.testing.assert_array_equal(features, self.X_train)
+                np.testing.assert_array_equal(labels, self.y_train.argmax(axis=1))
+        with self.assertRaises(ValueError):
+            convert_matrix(self.catalog, MATRIX_CSV, self.tmp.name, 'parquet')
+
+    def test_iter_batches_and_count(self):
+        output_dir = Path(self.tmp.name) / 'packed'
+        convert_matrix(self.catalog, MATRIX_CSV, output_dir)
+        dataset = MatrixDataset(output_dir)
+        for block_rows, batch_size in ((53, 16), (20, 8), (7, 7), (100, 256)):
+            with self.subTest(block_rows=block_rows, batch_size=batch_size):
+                rng = np.random.default_rng(0)
+                batches = list(iter_batches(dataset.iter_blocks(block_rows, rng), 18, batch_size, rng))
+
+                self.assertEqual(len(batches), count_batches(len(dataset), block_rows, batch_size))
+                self.assertTrue(all(len(X) <= batch_size and X.dtype == np.float32 for X, _ in batches))
+                # Mỗi dòng xuất hiện đúng một lần, chỉ đổi thứ tự
+                rows = sorted(map(tuple, np.hstack([np.concatenate(X) for X in zip(*batches)])))
+                self.assertEqual(rows, sorted(map(tuple, np.hstack([self.X_train, self.y_train]))))
+
+    def test_streaming_batches(self):
+        output_dir = Path(self.tmp.name) / 'dense'
+        convert_matrix(self.catalog, MATRIX_CSV, output_dir, 'dense')
+        for source in ({'dataset_dir': output_dir}, {'csv_path': MATRIX_CSV}):
+            with self.subTest(source=source):
+                generate, num_rows, num_batches = streaming_batches(
+                    self.catalog, batch_size=10, shuffle_buffer=25, seed=0, **source,
+                )
+                first_epoch, second_epoch = list(generate()), list(generate())
+
+                self.assertEqual(num_rows, len(self.X_train))
+                self.assertEqual(len(first_epoch), num_batches)
+                self.assertEqual(len(second_epoch), num_batches)
+                self.assertEqual(sum(len(X) for X, _ in first_epoch), num_rows)
+                # Mỗi epoch trộn lại
+                self.assertFalse(np.array_equal(first_epoch[0][0], second_epoch[0][0]))
+        with self.assertRaises(ValueError):
+            streaming_batches(self.catalog)
@@ -0,0 +1,69 @@
+import random
+import re
+import unicodedata
+import unittest
+
+from diagnosis.data import load_catalog
+from diagnosis.matcher import SymptomKeywordMatcher, normalize_text, split_keywords
+
+
+def regex_match(keywords_map, text):
+    # Cách so khớp cũ: một re.search \b...\b cho từng từ khóa
+    text = normalize_text(text)
+    return {
+        code for code, keywords in keywords_map.items()
+        if any(re.search(r'\b' + re.escape(normalize_text(keyword)) + r'\b', text) for keyword in keywords)
+    }
+
+
+class SymptomKeywordMatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.matcher = SymptomKeywordMatcher(
+            {'TC001': ['sốt', 'sốt cao'], 'TC002': ['đau đầu'], 'TC003': ['đau']},
+            {'TC004': ['mệt']},
+        )
+
+    def test_whole_words_only(self):
+        self.assertEqual(self.matcher.match('tôi bị sốt'), {'TC001'})
+        self.assertEqual(self.matcher.match('sốtcao'), set())
+        self.assertEqual(self.matcher.match('mệtmỏi'), set())
+        self.assertEqual(self.matcher.match('(sốt), đau.'), {'TC001', 'TC003'})
+
+    def test_overlapping_keywords(self):
+        matches = sorted((m.code, m.keyword, m.start) for m in self.matcher.iter_matches('sốt cao và đau đầu'))
+
+        self.assertEqual(matches, [
+            ('TC001', 'sốt', 0), ('TC001', 'sốt cao', 0), ('TC002', 'đau đầu', 11), ('TC003', 'đau', 11),
+        ])
+
+    def test_include_secondary(self):
+        self.assertEqual(self.matcher.match('hơi mệt và sốt'), {'TC001', 'TC004'})
+        self.assertEqual(self.matcher.match('hơi mệt và sốt', include_secondary=False), {'TC001'})
+        self.assertTrue(all(m.is_primary for m in self.matcher.iter_matches('sốt')))
+
+    def test_decomposed_and_upper_case_input(self):
+        text = unicodedata.normalize('NFD', 'Tôi bị SỐT CAO')
+
+        self.assertNotEqual(text, unicodedata.normalize('NFC', text))
+        self.assertEqual(self.matcher.match(text), {'TC001'})
+
+    def test_split_keywords(self):
+        self.assertEqual(split_keywords(' sốt, sốt cao ;nóng người,, '), ['sốt', 'sốt cao', 'nóng người'])
+
+    def test_catalog_keywords_match_regex(self):
+        matcher = load_catalog().matcher
+        keywords_map = {}
+        for keywords in (matcher.primary_keywords, matcher.secondary_keywords):
+            for code, code_keywords in keywords.items():
+                keywords_map.setdefault(code, []).extend(code_keywords)
+        vocabulary = [keyword for code_keywords in keywords_map.values() for keyword in code_keywords]
+        fillers = ['tôi', 'bị', 'và', 'hơi', 'không', 'x', ',', '.', '!']
+
+        rng = random.Random(0)
+        for _ in range(300):
+            words = rng.choices(vocabulary, k=3) + rng.choices(fillers, k=4)
+            rng.shuffle(words)
+            # Có lúc dính liền các từ để kiểm tra ranh giới từ
+            text = ''.join(word + rng.choice([' ', ' ', '']) for word in words)
+            with self.subTest(text=text):
+                self.assertEqual(matcher.match(text), regex_match(keywords_map, text))
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from diagnosis.data import load_data
+
+from .support import TEST_VERSION, assert_close_mc, requires_tensorflow, trained_models_dir
+
+
+@requires_tensorflow
+class MCDropoutEngineTests(unittest.TestCase):
+    """
+    MC dropout theo lô (một forward đã biên dịch) so với vòng lặp Python gọi model n_iter lần
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from diagnosis.model import load_model_artifact
+
+        cls.X_train = load_data()[0]
+        cls.model, _ = load_model_artifact(TEST_VERSION, trained_models_dir())
+
+    def setUp(self):
+        import tensorflow as tf
+
+        tf.keras.utils.set_random_seed(0)
+
+    def test_batched_matches_loop(self):
+        from diagnosis.model import predict_with_uncertainty
+
+        x = self.X_train[:8]
+        looped = np.stack([self.model(x, training=True).numpy() for _ in range(500)])
+        mean_probabilities, std_dev_probabilities = predict_with_uncertainty(self.model, x, n_iter=500)
+
+        assert_close_mc(self, mean_probabilities, looped.mean(axis=0), max_tolerance=0.02, mean_tolerance=0.002)
+        assert_close_mc(self, std_dev_probabilities, looped.std(axis=0), max_tolerance=0.02, mean_tolerance=0.002)
+        np.testing.assert_allclose(mean_probabilities.sum(axis=1), 1.0, atol=1e-5)
+
+    def test_chunked_queue_matches_single_pass(self):
+        from diagnosis.model import MCDropoutEngine
+
+        # max_rows=4000, n_iter=1000: lô 4 bệnh nhân, 14 lần forward cho cả ma trận
+        chunked = MCDropoutEngine(self.model, max_rows=4000).predict(self.X_train, n_iter=1000)
+        single = MCDropoutEngine(self.model).predict(self.X_train, n_iter=1000)
+
+        for actual, expected in zip(chunked, single):
+            assert_close_mc(self, actual, expected, max_tolerance=0.02, mean_tolerance=0.0015)
+
+    def test_single_vector(self):
+        from diagnosis.model import predict_with_uncertainty
+
+        mean_probabilities, std_dev_probabilities = predict_with_uncertainty(self.model, self.X_train[0], n_iter=10)
+
+        self.assertEqual(mean_probabilities.shape, (1, self.model.output_shape[-1]))
+        self.assertEqual(std_dev_probabilities.shape, mean_probabilities.shape)
@@ -0,0 +1,65 @@
+import os
+import unittest
+
+import numpy as np
+
+from diagnosis.data import load_data
+from diagnosis.numpy_backend import NumpyMCDropoutModel, load_numpy_model
+
+from .support import TEST_VERSION, assert_close_mc, requires_tensorflow, trained_models_dir
+
+
+@requires_tensorflow
+class NumpyBackendParityTests(unittest.TestCase):
+    """
+    Backend NumPy (model.npz) so với MC dropout của TensorFlow trên cùng artifact
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from diagnosis.model import load_model_artifact
+
+        cls.X_train = load_data()[0]
+        cls.model, _ = load_model_artifact(TEST_VERSION, trained_models_dir())
+        cls.npz_path = os.path.join(trained_models_dir(), TEST_VERSION, 'model.npz')
+
+    def test_forward_without_dropout_is_exact(self):
+        numpy_model = NumpyMCDropoutModel.load(self.npz_path)
+        for spec in numpy_model.layers:
+            if spec['type'] == 'dropout':
+                spec['rate'] = 0.0
+
+        mean_probabilities, std_dev_probabilities = numpy_model.predict(self.X_train, n_iter=2)
+
+        np.testing.assert_allclose(mean_probabilities, self.model(self.X_train, training=False).numpy(), atol=1e-5)
+        np.testing.assert_allclose(std_dev_probabilities, 0.0, atol=1e-6)
+
+    def test_mc_dropout_matches_tensorflow(self):
+        import tensorflow as tf
+        from diagnosis.model import predict_with_uncertainty
+
+        # Hai ước lượng độc lập với n_iter=2000: trên nhiều hạt giống sai khác lớn nhất là 0,003-0,008
+        # (cả mean lẫn std), sai khác trung bình khoảng 0,0005
+        tf.keras.utils.set_random_seed(0)
+        expected_mean, expected_std = predict_with_uncertainty(self.model, self.X_train, n_iter=2000)
+        numpy_model, _ = load_numpy_model(TEST_VERSION, trained_models_dir(), seed=0)
+        mean_probabilities, std_dev_probabilities = numpy_model.predict(self.X_train, n_iter=2000)
+
+        assert_close_mc(self, mean_probabilities, expected_mean, max_tolerance=0.01, mean_tolerance=0.001)
+        assert_close_mc(self, std_dev_probabilities, expected_std, max_tolerance=0.01, mean_tolerance=0.001)
+
+    def test_chunks_do_not_change_shape(self):
+        numpy_model = NumpyMCDropoutModel.load(self.npz_path, max_rows=100, seed=0)
+
+        mean_probabilities, std_dev_probabilities = numpy_model.predict(self.X_train, n_iter=50)
+
+        self.assertEqual(mean_probabilities.shape, (len(self.X_train), self.model.output_shape[-1]))
+        self.assertEqual(std_dev_probabilities.shape, mean_probabilities.shape)
+        np.testing.assert_allclose(mean_probabilities.sum(axis=1), 1.0, atol=1e-5)
+
+    def test_seed_is_reproducible(self):
+        first = NumpyMCDropoutModel.load(self.npz_path, seed=7).predict(self.X_train[:4], n_iter=20)
+        second = NumpyMCDropoutModel.load(self.npz_path, seed=7).predict(self.X_train[:4], n_iter=20)
+
+        np.testing.assert_array_equal(first[0], second[0])
+        np.testing.assert_array_equal(first[1], second[1])
@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+
+from diagnosis.data import load_data
+from diagnosis.questions import (
+    InformationGainSelector, SequentialQuestionSelector, create_question_selector, entropy,
+)
+
+
+def brute_force_information_gain(likelihoods, posterior, j):
+    # H(P) - sum over answers of P(answer) * H(P | answer), one candidate at a time
+    expected_entropy = 0.0
+    for theta in (likelihoods[:, j], 1 - likelihoods[:, j]):
+        joint = posterior * theta
+        expected_entropy += joint.sum() * entropy(joint / joint.sum())
+    return entropy(posterior) - expected_entropy
+
+
+def one_hot_prediction(n_classes, index):
+    mean = np.zeros((1, n_classes))
+    mean[0, index] = 1.0
+    return mean, np.zeros((1, n_classes))
+
+
+class InformationGainSelectorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.X_train, cls.y_train, cls.catalog = load_data()
+
+    def setUp(self):
+        self.selector = InformationGainSelector.from_training_data(self.catalog, self.X_train, self.y_train)
+
+    def simulate(self, selector, row):
+        # Trả lời theo đúng một dòng dữ liệu, mô hình là "oracle" trả về bệnh của dòng đó
+        label = int(self.y_train[row].argmax())
+        symptom_values = {code: 0 for code in self.catalog.main_codes}
+        asked = set()
+        while True:
+            code, _ = selector.next_question(
+                symptom_values, asked, lambda: one_hot_prediction(len(self.catalog.diseases), label),
+            )
+            if code is None:
+                return len(asked)
+            asked.add(code)
+            symptom_values[code] = int(self.X_train[row, self.catalog.main_index[code]])
+
+    def test_likelihood_shape_is_validated(self):
+        with self.assertRaises(ValueError):
+            InformationGainSelector(self.catalog, np.full((2, 2), 0.5))
+
+    def test_smoothed_likelihoods(self):
+        d, j = 0, self.catalog.main_index['TC001']
+        rows = self.y_train[:, d] == 1
+
+        self.assertAlmostEqual(self.selector.likelihoods[d, j], (self.X_train[rows, j].sum() + 0.5) / (rows.sum() + 1))
+        self.assertTrue(((self.selector.likelihoods > 0) & (self.selector.likelihoods < 1)).all())
+
+    def test_posterior(self):
+        np.testing.assert_allclose(self.selector.posterior({}, set()), 1 / len(self.catalog.diseases))
+
+        j_present, j_absent = self.catalog.main_index['TC001'], self.catalog.main_index['TC002']
+        expected = self.selector.likelihoods[:, j_present] * (1 - self.selector.likelihoods[:, j_absent])
+        posterior = self.selector.posterior({'TC001': 1, 'TC002': 0}, {'TC002'})
+        np.testing.assert_allclose(posterior, expected / expected.sum())
+        # Triệu chứng chưa hỏi không được coi là "không có"
+        np.testing.assert_allclose(self.selector.posterior({'TC001': 1, 'TC002': 0}, set()),
+                                   self.selector.posterior({'TC001': 1}, set()))
+
+    def test_expected_information_gain_matches_brute_force(self):
+        posterior = self.selector.posterior({'TC001': 1, 'TC003': 0}, {'TC003'})
+        candidates = list(range(len(self.catalog.main_codes)))
+
+        gains = self.selector.expected_information_gain(posterior, candidates)
+
+        expected = [brute_force_information_gain(self.selector.likelihoods, posterior, j) for j in candidates]
+        np.testing.assert_allclose(gains, expected, atol=1e-9)
+        self.assertTrue((gains >= -1e-12).all())
+
+    def test_next_question_maximizes_information_gain(self):
+        symptom_values, asked = {'TC001': 1}, set()
+        posterior = self.selector.posterior(symptom_values, asked)
+        unasked = [code for code in self.catalog.main_codes if code != 'TC001']
+        best = max(unasked, key=lambda code: brute_force_information_gain(
+            self.selector.likelihoods, posterior, self.catalog.main_index[code]))
+
+        code, prediction = self.selector.next_question(symptom_values, asked, lambda: self.fail("không cần dự đoán"))
+
+        self.assertEqual(code, best)
+        self.assertIsNone(prediction)
+
+    def test_stops_only_when_model_agrees(self):
+        row = 0
+        symptom_values = {code: int(self.X_train[row, j]) for code, j in self.catalog.main_index.items()}
+        symptom_values[self.catalog.main_codes[-1]] = 0
+        asked = set(self.catalog.main_codes[:-1])
+        posterior = self.selector.posterior(symptom_values, asked)
+        self.assertGreaterEqual(posterior.max(), self.selector.confidence)
+        n_classes = len(self.catalog.diseases)
+
+        agree = one_hot_prediction(n_classes, int(posterior.argmax()))
+        self.assertEqual(self.selector.next_question(symptom_values, asked, lambda: agree), (None, agree))
+
+        disagree = one_hot_prediction(n_classes, (int(posterior.argmax()) + 1) % n_classes)
+        code, prediction = self.selector.next_question(symptom_values, asked, lambda: disagree)
+        self.assertEqual(code, self.catalog.main_codes[-1])
+        self.assertIsNone(prediction)
+
+    def test_asks_fewer_questions_than_sequential(self):
+        sequential = SequentialQuestionSelector(self.catalog)
+        rows = range(len(self.X_train))
+
+        information_gain_counts = [self.simulate(self.selector, row) for row in rows]
+        sequential_counts = [self.simulate(sequential, row) for row in rows]
+
+        self.assertEqual(sequential_counts, [len(self.catalog.main_codes)] * len(rows))
+        self.assertLess(np.mean(information_gain_counts), np.mean(sequential_counts) / 2)
+
+    def test_create_question_selector(self):
+        self.assertIsInstance(create_question_selector(self.catalog, 'sequential'), SequentialQuestionSelector)
+        self.assertIsInstance(
+            create_question_selector(self.catalog, 'information_gain', self.X_train, self.y_train),
+            InformationGainSelector,
+        )
+        with self.assertRaises(ValueError):
+            create_question_selector(self.catalog, 'information_gain')
+        with self.assertRaises(ValueError):
+            create_question_selector(self.catalog, 'random')
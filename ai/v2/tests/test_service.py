@@ -0,0 +1,62 @@
+import io
+import json
+import unittest
+
+from .support import TEST_VERSION, requires_tensorflow, trained_models_dir
+
+
+@requires_tensorflow
+class DiagnosisAppTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from diagnosis.service import DiagnosisApp, DiagnosisService
+
+        cls.app = DiagnosisApp(DiagnosisService(version=TEST_VERSION, models_dir=trained_models_dir(), n_iter=10))
+
+    def request(self, method, path, body=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body or {}).encode('utf-8')
+        responses = []
+        chunks = self.app({
+            'REQUEST_METHOD': method, 'PATH_INFO': path,
+            'CONTENT_LENGTH': str(len(payload)), 'wsgi.input': io.BytesIO(payload),
+        }, lambda status, headers: responses.append(status))
+        return int(responses[0].split()[0]), json.loads(b''.join(chunks))
+
+    def test_diagnose(self):
+        status, body = self.request('POST', '/diagnose', {'text': 'tôi bị sốt', 'symptoms': ['TC002'], 'n_iter': 5})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['n_iter'], 5)
+        self.assertEqual(body['model_version'], TEST_VERSION)
+        self.assertEqual(self.request('POST', '/diagnose', {'symptoms': {'TC001': True, 'TC002': False}})[0], 200)
+
+    def test_invalid_input_is_bad_request(self):
+        for body in (
+            {'symptoms': [{'a': 1}]},
+            {'symptoms': [1]},
+            {'symptoms': 'TC001'},
+            {'symptoms': ['TC999']},
+            {'text': ['sốt']},
+            {'n_iter': [5]},
+            {'n_iter': 0},
+            {'n_iter': -1},
+            {'n_iter': 5000},
+            b'not json',
+            b'[]',
+        ):
+            with self.subTest(body=body):
+                status, response = self.request('POST', '/diagnose', body)
+                self.assertEqual(status, 400)
+                self.assertIn('error', response)
+
+    def test_sessions(self):
+        status, body = self.request('POST', '/sessions', {'text': 'tôi bị sốt'})
+        self.assertEqual(status, 201)
+
+        while not body.get('done'):
+            status, body = self.request('POST', f"/sessions/{body['session_id']}/answers", {'text': 'không'})
+            self.assertEqual(status, 200)
+        self.assertIn('diagnosis', body)
+
+        self.assertEqual(self.request('POST', f"/sessions/{body['session_id']}/answers", {'text': 'có'})[0], 404)
+        self.assertEqual(self.request('POST', '/sessions', {'text': 1})[0], 400)
@@ -0,0 +1,158 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from diagnosis.data import load_catalog
+from diagnosis.session import (
+    ChatbotSessionEngine, ChatSession, InMemorySessionStore, RedisSessionStore, SessionNotFound,
+    create_session_store,
+)
+
+
+class FakeRedis:
+    """
+    Đủ get / set(ex) / delete của redis.Redis cho RedisSessionStore
+    """
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        value = self.data.get(key)
+        return None if value is None else value.encode('utf-8')
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class UniformPredictor:
+    """
+    predict(x_input, n_iter) -> (mean, std) như MCDropoutEngine, ghi lại các vector đầu vào
+    """
+    def __init__(self, n_classes):
+        self.n_classes = n_classes
+        self.inputs = []
+
+    def predict(self, x_input, n_iter=100):
+        self.inputs.append(np.array(x_input))
+        return np.full((1, self.n_classes), 1.0 / self.n_classes), np.zeros((1, self.n_classes))
+
+
+def make_session(session_id='s1'):
+    return ChatSession(session_id, {'TC001': 1, 'TC002': 0}, ['TC002'], {'TC002'}, {'TC001_1': 'hai ngày'}, 1.5)
+
+
+class ChatSessionTests(unittest.TestCase):
+    def test_json_round_trip(self):
+        session = ChatSession.from_json(make_session().to_json())
+
+        self.assertEqual(session.symptom_values, {'TC001': 1, 'TC002': 0})
+        self.assertEqual(session.question_queue, ['TC002'])
+        self.assertEqual(session.asked_questions, {'TC002'})
+        self.assertEqual(session.detailed_answers, {'TC001_1': 'hai ngày'})
+        self.assertEqual(session.created_at, 1.5)
+
+
+class InMemorySessionStoreTests(unittest.TestCase):
+    def test_save_get_delete(self):
+        store = InMemorySessionStore(ttl=60)
+        store.save(make_session())
+
+        self.assertEqual(store.get('s1').question_queue, ['TC002'])
+        store.delete('s1')
+        with self.assertRaises(SessionNotFound):
+            store.get('s1')
+
+    def test_ttl_expiry_and_purge(self):
+        with mock.patch('diagnosis.session.time.monotonic', return_value=1000.0) as monotonic:
+            store = InMemorySessionStore(ttl=60, purge_interval=10)
+            store.save(make_session('s1'))
+            store.save(make_session('s2'))
+
+            monotonic.return_value = 1059.0
+            self.assertEqual(store.get('s1').session_id, 's1')
+
+            monotonic.return_value = 1061.0
+            with self.assertRaises(SessionNotFound):
+                store.get('s1')
+            # s2 hết hạn và bị dọn khi lưu phiên khác sau purge_interval
+            self.assertEqual(len(store), 1)
+            store.save(make_session('s3'))
+            self.assertEqual(len(store), 1)
+
+    def test_stored_copy_is_independent(self):
+        store = InMemorySessionStore()
+        session = make_session()
+        store.save(session)
+        session.question_queue.clear()
+
+        self.assertEqual(store.get('s1').question_queue, ['TC002'])
+
+
+class RedisSessionStoreTests(unittest.TestCase):
+    def test_save_get_delete(self):
+        client = FakeRedis()
+        store = RedisSessionStore(client, ttl=30, prefix='test:')
+        store.save(make_session())
+
+        self.assertEqual(client.expiry, {'test:s1': 30})
+        self.assertEqual(store.get('s1').asked_questions, {'TC002'})
+        store.delete('s1')
+        with self.assertRaises(SessionNotFound):
+            store.get('s1')
+
+    def test_create_session_store(self):
+        self.assertIsInstance(create_session_store('memory', ttl=5), InMemorySessionStore)
+        with self.assertRaises(ValueError):
+            create_session_store('sqlite')
+
+
+class ChatbotSessionEngineTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.catalog = load_catalog()
+
+    def setUp(self):
+        self.predictor = UniformPredictor(len(self.catalog.diseases))
+        self.client = FakeRedis()
+
+    def engine(self):
+        # Mỗi lượt dùng một engine / kho mới trên cùng Redis, như khi các lượt tới các worker khác nhau
+        return ChatbotSessionEngine(self.catalog, self.predictor, RedisSessionStore(self.client), n_iter=3)
+
+    def test_clarifying_questions_first(self):
+        response = self.engine().start('tôi bị đau đầu')
+
+        self.assertFalse(response['done'])
+        self.assertEqual(response['detected_symptoms'], [{'code': 'TC002', 'name': self.catalog.name('TC002')}])
+        self.assertEqual(response['question']['code'], self.catalog.children('TC002')[0])
+        self.assertEqual(response['remaining_questions'], len(self.catalog.children('TC002')) + len(self.catalog.main_codes) - 1)
+
+    def test_full_conversation_across_workers(self):
+        response = self.engine().start('tôi bị đau đầu')
+        session_id = response['session_id']
+        asked = []
+        while not response['done']:
+            code = response['question']['code']
+            asked.append(code)
+            answer = 'có' if code == 'TC001' else ('hai ngày' if not self.catalog.is_main(code) else 'không')
+            response = self.engine().answer(session_id, answer)
+
+        main_asked = [code for code in asked if self.catalog.is_main(code)]
+        self.assertEqual(main_asked, [code for code in self.catalog.main_codes if code != 'TC002'])
+        self.assertEqual(response['session_id'], session_id)
+        self.assertEqual(response['questions_asked'], len(asked))
+        self.assertEqual(response['detailed_answers'][self.catalog.children('TC002')[0]], 'hai ngày')
+        # Vector cuối cùng: TC001 (trả lời có) và TC002 (từ mô tả)
+        final_input = self.predictor.inputs[-1]
+        self.assertEqual(final_input[self.catalog.main_index['TC001']], 1)
+        self.assertEqual(final_input[self.catalog.main_index['TC002']], 1)
+        self.assertEqual(final_input.sum(), 2)
+        self.assertEqual(self.client.data, {})
+        with self.assertRaises(SessionNotFound):
+            self.engine().answer(session_id, 'có')
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from .models import User, UserProfile, UserSession
+from .tokens import revoke_user_tokens
 
 
 @admin.register(User)
@@ -45,6 +46,12 @@ class UserAdmin(BaseUserAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('profile')
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Tokens carry role / is_active claims, revoke them when either changes
+        if change and {'role', 'is_active'} & set(form.changed_data):
+            revoke_user_tokens(obj)
 
 
 @admin.register(UserProfile)
@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .tokens import TOKEN_VERSION_CLAIM, get_token_state
+
+
+class ClaimsTokenUser(TokenUser):
+    """
+    request.user built from access token claims instead of the User row
+    """
+    
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+    
+    @cached_property
+    def is_verified(self):
+        return self.token.get('is_verified', False)
+    
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+    
+    @property
+    def is_doctor(self):
+        return self.role == 'doctor'
+    
+    @property
+    def is_patient(self):
+        return self.role == 'patient'
+    
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+    
+    @property
+    def is_staff_member(self):
+        return self.role == 'staff'
+    
+    def __eq__(self, other):
+        # Compare with User instances too (IsOwnerOrReadOnly: obj == request.user)
+        if isinstance(other, models.Model):
+            return str(other.pk) == str(self.pk)
+        return super().__eq__(other)
+    
+    __hash__ = TokenUser.__hash__
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication without a database query: the user comes from the token
+    claims and the only lookup is one Redis round trip for the user's token
+    version and the token's blacklist entry, so revoked tokens (deactivation,
+    role change, logout) are rejected immediately
+    """
+    
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            # Tokens issued before the claims were added: load the user from the database
+            return JWTAuthentication.get_user(self, validated_token)
+        
+        user = super().get_user(validated_token)
+        version, blacklisted = get_token_state(user.pk, validated_token[api_settings.JTI_CLAIM])
+        if version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if blacklisted:
+            raise AuthenticationFailed(_("Token is blacklisted"), code="token_not_valid")
+        if validated_token[TOKEN_VERSION_CLAIM] != version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,263 @@
+"""
+Bulk user import from CSV or NDJSON, for onboarding a clinic's patients and staff.
+
+Rows are read and validated one at a time and written in chunks: each chunk is
+checked against existing emails and usernames with one query, its passwords are
+hashed on a process pool, and its users and profiles are inserted with two
+bulk_create calls in one transaction. Memory is bounded by the chunk size, not
+by the size of the file. A failure leaves the chunks before it committed;
+importing the same file again reports those rows as duplicates.
+
+bulk_create sends no signals: the statistics counters are updated once per chunk
+here, and search_document is written by the users_search_document trigger.
+
+POST /manage/import/ stores the upload and queues the import_user_file task; the
+job's state (queued, running, finished or failed, then the counts and the
+rejected rows) is kept in the cache for GET /manage/import/<job id>/. Each
+process, a Celery worker, keeps one hashing pool across imports.
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import csv
+import json
+import multiprocessing
+import threading
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.db.models import Q
+from rest_framework import serializers
+from .models import User, UserProfile
+from .serializers import UNIQUE_USER_ERRORS, BulkUserImportSerializer, unique_user_errors
+from .statistics import apply_statistics_deltas, counted_in
+
+FORMATS = ('csv', 'ndjson')
+
+
+def import_job_cache_key(job_id):
+    return f'users:import:{job_id}'
+
+
+def get_import_job(job_id):
+    return cache.get(import_job_cache_key(job_id))
+
+
+def set_import_job(job_id, **state):
+    """
+    Store the job's state, merged into what is already stored
+    """
+    job = get_import_job(job_id) or {'id': job_id}
+    job.update(state)
+    cache.set(import_job_cache_key(job_id), job, timeout=settings.BULK_IMPORT_JOB_SECONDS)
+    return job
+
+
+def new_hashing_executor(workers):
+    # spawn: forked workers would share the parent's database connection. The
+    # initializer is django.setup itself, a module of this app cannot be imported before it
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup,
+    )
+
+
+_hashing_executor = None
+_hashing_executor_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    """
+    The process pool of BULK_IMPORT_HASHING_WORKERS shared by the imports of this
+    process, started on first use (spawning the workers and their django.setup
+    takes seconds); None if the setting is 0
+    """
+    global _hashing_executor
+    if _hashing_executor is None and settings.BULK_IMPORT_HASHING_WORKERS > 0:
+        with _hashing_executor_lock:
+            if _hashing_executor is None:
+                _hashing_executor = new_hashing_executor(settings.BULK_IMPORT_HASHING_WORKERS)
+    return _hashing_executor
+
+
+def discard_hashing_executor(executor=None):
+    """
+    Shut the shared pool down; the next import starts a new one. With an executor,
+    only if it is still the shared one
+    """
+    global _hashing_executor
+    with _hashing_executor_lock:
+        if _hashing_executor is None or executor not in (None, _hashing_executor):
+            return
+        previous, _hashing_executor = _hashing_executor, None
+    previous.shutdown(wait=False)
+
+
+@receiver(setting_changed)
+def reset_hashing_executor(setting, **kwargs):
+    if setting == 'BULK_IMPORT_HASHING_WORKERS':
+        discard_hashing_executor()
+
+
+def detect_format(filename, default='csv'):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return default
+
+
+def read_rows(lines, file_format):
+    """
+    (line number, row dict or None, error or None) for every record of a CSV (with a
+    header line) or NDJSON text stream. Empty and missing CSV values are left out so
+    that the model defaults apply.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # DictReader files values beyond the header under None
+            if None in row:
+                yield reader.line_num, None, 'More values than columns.'
+                continue
+            yield reader.line_num, {key.strip(): value for key, value in row.items() if value not in ('', None)}, None
+    else:
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, None, 'Invalid JSON.'
+                continue
+            if not isinstance(row, dict):
+                yield number, None, 'Expected a JSON object.'
+                continue
+            yield number, row, None
+
+
+class UserImporter:
+    """
+    Imports rows from read_rows(). on_error(line number, {field: [errors]}) is called
+    for every rejected row.
+    """
+    def __init__(self, chunk_size=None, workers=None, on_error=None):
+        self.chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+        # Default: the process's shared pool; an explicit number of workers gets a pool of its own
+        self.shared_executor = workers is None
+        self.workers = settings.BULK_IMPORT_HASHING_WORKERS if workers is None else workers
+        self.on_error = on_error
+        self.created = 0
+        self.failed = 0
+    
+    def run(self, rows):
+        """
+        {'created': n, 'failed': n}
+        """
+        # One serializer for every row: its fields are built once
+        serializer = BulkUserImportSerializer()
+        if self.shared_executor:
+            executor = get_hashing_executor()
+        else:
+            executor = new_hashing_executor(self.workers) if self.workers > 0 else None
+        chunk = []
+        try:
+            for number, row, error in rows:
+                if error is not None:
+                    self.reject(number, {'non_field_errors': [error]})
+                    continue
+                try:
+                    chunk.append((number, serializer.run_validation(row)))
+                except serializers.ValidationError as e:
+                    self.reject(number, e.detail if isinstance(e.detail, dict) else {'non_field_errors': e.detail})
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    self.write_chunk(chunk, executor)
+                    chunk = []
+            if chunk:
+                self.write_chunk(chunk, executor)
+        except BrokenProcessPool:
+            # A hashing process died: start a new pool for the next import
+            if self.shared_executor:
+                discard_hashing_executor(executor)
+            raise
+        finally:
+            if executor is not None and not self.shared_executor:
+                executor.shutdown()
+        return {'created': self.created, 'failed': self.failed}
+    
+    def reject(self, number, errors):
+        self.failed += 1
+        if self.on_error is not None:
+            self.on_error(number, errors)
+    
+    def write_chunk(self, chunk, executor):
+        taken = User.objects.filter(
+            Q(email__in=[attrs['email'] for _, attrs in chunk]) |
+            Q(username__in=[attrs['username'] for _, attrs in chunk])
+        ).values_list('email', 'username')
+        taken = {'email': {email for email, _ in taken}, 'username': {username for _, username in taken}}
+        
+        accepted = []
+        for number, attrs in chunk:
+            errors = {field: [message] for field, message in UNIQUE_USER_ERRORS.items() if attrs[field] in taken[field]}
+            if errors:
+                self.reject(number, errors)
+                continue
+            # Later rows of the file with the same email or username are duplicates
+            for field in UNIQUE_USER_ERRORS:
+                taken[field].add(attrs[field])
+            accepted.append((number, attrs))
+        if not accepted:
+            return
+        
+        encoded = self.hash_passwords([attrs.pop('password', None) for _, attrs in accepted], executor)
+        users = [User(password=password, **attrs) for (_, attrs), password in zip(accepted, encoded)]
+        try:
+            with transaction.atomic():
+                self.insert(users)
+            self.created += len(users)
+        except IntegrityError:
+            # Registered since the check: insert one by one to find the rows
+            for (number, _), user in zip(accepted, users):
+                try:
+                    with transaction.atomic():
+                        self.insert([user])
+                    self.created += 1
+                except IntegrityError as e:
+                    errors = unique_user_errors(e)
+                    if errors is None:
+                        raise
+                    self.reject(number, errors)
+    
+    def insert(self, users):
+        User.objects.bulk_create(users)
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+        deltas = Counter()
+        for user in users:
+            deltas.update(counted_in(user.role, user.is_active, user.is_verified))
+        transaction.on_commit(partial(apply_statistics_deltas, dict(deltas)))
+    
+    def hash_passwords(self, passwords, executor):
+        """
+        Encoded passwords, an unusable one where the password is None
+        """
+        usable = [password for password in passwords if password is not None]
+        if executor is None:
+            hashes = map(make_password, usable)
+        else:
+            hashes = executor.map(make_password, usable, chunksize=max(1, len(usable) // (self.workers * 4)))
+        hashes = iter(list(hashes))
+        return [next(hashes) if password is not None else make_password(None) for password in passwords]
+
+
+def import_users(rows, **kwargs):
+    return UserImporter(**kwargs).run(rows)
@@ -0,0 +1,68 @@
+"""
+Per-user dashboard served from the cache. The entry holds the response body and
+its ETag; it is dropped whenever the user or their sessions change (signals for
+saves and deletes, explicit calls where sessions are changed with
+queryset.update()) and expires after DASHBOARD_CACHE_SECONDS regardless.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def dashboard_cache_key(user_id):
+    return f'users:dashboard:{user_id}'
+
+
+def get_dashboard(user_id, build):
+    """
+    {'data': body, 'etag': quoted ETag} from the cache, or from build(user_id) on a
+    miss; None if build returns None (no such user)
+    """
+    key = dashboard_cache_key(user_id)
+    try:
+        entry = cache.get(key)
+    except Exception:
+        logger.warning("Cache unavailable, building the dashboard uncached", exc_info=True)
+        entry = None
+    if entry is not None:
+        return entry
+    
+    data = build(user_id)
+    if data is None:
+        return None
+    # Content hash: a rebuilt but unchanged dashboard keeps its ETag
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    entry = {'data': data, 'etag': f'"{digest}"'}
+    try:
+        cache.set(key, entry, timeout=settings.DASHBOARD_CACHE_SECONDS)
+    except Exception:
+        logger.warning("Could not cache the dashboard", exc_info=True)
+    return entry
+
+
+def invalidate_dashboards(user_ids):
+    """
+    Drop the cached dashboards once the current transaction commits
+    """
+    keys = [dashboard_cache_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+    
+    def delete():
+        try:
+            cache.delete_many(keys)
+        except Exception:
+            # The entries expire after DASHBOARD_CACHE_SECONDS
+            logger.warning("Could not invalidate cached dashboards", exc_info=True)
+    
+    transaction.on_commit(delete)
+
+
+def invalidate_dashboard(user_id):
+    invalidate_dashboards([user_id])
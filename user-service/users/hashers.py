@@ -0,0 +1,122 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    """
+    Raised when more password hashes are waiting than PASSWORD_HASHING_MAX_PENDING allows
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many concurrent logins, please retry shortly.'
+    default_code = 'password_hashing_busy'
+    # DRF's exception handler sends this as the Retry-After header
+    wait = 1
+
+
+class HashingPool:
+    """
+    Bounded thread pool for password hashing. hashlib and argon2-cffi release the GIL,
+    so at most `workers` hashes use the CPU at once no matter how many request threads
+    are logging in, and callers beyond `max_pending` queued hashes are rejected instead
+    of queueing.
+    
+    This only pays off with threaded or async workers (gunicorn --threads, gthread,
+    gevent, uvicorn), where many requests share one process. A sync gunicorn worker
+    serves one request at a time and blocks on future.result() anyway, so there the
+    pool just adds a thread hand-off; run it with PASSWORD_HASHING_WORKERS=0.
+    """
+    def __init__(self, workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing') if workers > 0 else None
+        # Running hashes take `workers` of the slots, so only queued ones count towards max_pending
+        self.slots = threading.BoundedSemaphore(max(workers, 0) + max(max_pending, 0) or 1)
+        self.local = threading.local()
+    
+    def run(self, func, *args, **kwargs):
+        # Nested calls from a pool thread (PBKDF2 verify -> encode) run inline
+        if self.executor is None or getattr(self.local, 'in_pool', False):
+            return func(*args, **kwargs)
+        if not self.slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            return self.executor.submit(self._call, func, args, kwargs).result()
+        finally:
+            self.slots.release()
+    
+    def _call(self, func, args, kwargs):
+        self.local.in_pool = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.local.in_pool = False
+    
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+
+_hashing_pool = None
+_hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _hashing_pool
+    if _hashing_pool is None:
+        with _hashing_pool_lock:
+            if _hashing_pool is None:
+                _hashing_pool = HashingPool(settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_MAX_PENDING)
+    return _hashing_pool
+
+
+@receiver(setting_changed)
+def reset_hashing_pool(setting, **kwargs):
+    global _hashing_pool
+    if setting in ('PASSWORD_HASHING_WORKERS', 'PASSWORD_HASHING_MAX_PENDING'):
+        with _hashing_pool_lock:
+            if _hashing_pool is not None:
+                _hashing_pool.shutdown()
+            _hashing_pool = None
+
+
+class PooledHasherMixin:
+    """
+    Runs encode / verify on the hashing pool
+    """
+    def encode(self, password, salt, *args, **kwargs):
+        return get_hashing_pool().run(super().encode, password, salt, *args, **kwargs)
+    
+    def verify(self, password, encoded):
+        return get_hashing_pool().run(super().verify, password, encoded)
+
+
+class ConfigurableArgon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    """
+    Argon2id with cost parameters from settings. Django's check_password re-hashes on login
+    whenever a stored hash was made with different parameters.
+    """
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+    
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+    
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+class ConfigurablePBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count from settings
+    """
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Base of the benchmarks that write to the database: they refuse to run unless the
+    configured database is the dedicated benchmark database (settings.BENCH_DB) and
+    --database names it
+    """
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', required=True,
+            help='Name of the benchmark database; must equal BENCH_DB and the configured DB_NAME',
+        )
+    
+    def execute(self, *args, **options):
+        name = connection.settings_dict['NAME']
+        if not settings.BENCH_DB:
+            raise CommandError('Benchmarks are disabled: set BENCH_DB (and DB_NAME) to a dedicated benchmark database')
+        if options['database'] != settings.BENCH_DB or name != settings.BENCH_DB:
+            raise CommandError(
+                f'Refusing to run: --database {options["database"]!r}, BENCH_DB {settings.BENCH_DB!r} '
+                f'and the configured database {name!r} must be the same'
+            )
+        return super().execute(*args, **options)
@@ -0,0 +1,95 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import Client
+from users.management.benchmark import BenchmarkCommand
+from users.models import User, UserProfile, UserSession
+from users.tokens import UserRefreshToken
+
+from .bench_login import percentile
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting every statement
+    """
+    def __init__(self):
+        self.queries = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BenchmarkCommand):
+    help = 'Requests/sec and database queries per request of GET /api/v1/users/dashboard/'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--sessions', type=int, default=20, help='UserSession rows of the benchmark user')
+        parser.add_argument('--if-none-match', action='store_true',
+                            help='Send the ETag of the first response, as a browser revalidating would (expects 304)')
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-dashboard-{uuid.uuid4().hex[:8]}'
+        user = User.objects.create_user(
+            username=prefix, email=f'{prefix}@example.com', password=None,
+            first_name='Bench', last_name='Dashboard',
+        )
+        UserProfile.objects.get_or_create(user=user)
+        UserSession.objects.bulk_create([
+            UserSession(user=user, session_key=f'{prefix}-{i}', ip_address='127.0.0.1', is_active=i % 2 == 0)
+            for i in range(options['sessions'])
+        ])
+        authorization = f'Bearer {UserRefreshToken.for_user(user).access_token}'
+        
+        counter = QueryCounter()
+        local = threading.local()
+        headers = {}
+        expected_status = 200
+        
+        def request(_):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=authorization)
+                connection.execute_wrappers.append(counter)
+            start = time.perf_counter()
+            response = local.client.get('/api/v1/users/dashboard/', **headers)
+            elapsed = time.perf_counter() - start
+            if response.status_code != expected_status:
+                raise RuntimeError(f'Dashboard failed with {response.status_code}: {response.content[:200]!r}')
+            return elapsed
+        
+        def close_connection(_):
+            connection.close()
+        
+        try:
+            # Warm up URL resolving, the token version cache and connections outside the measurement
+            request(0)
+            if options['if_none_match']:
+                headers['HTTP_IF_NONE_MATCH'] = local.client.get('/api/v1/users/dashboard/')['ETag']
+                expected_status = 304
+            counter.queries = 0
+            
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                latencies = sorted(executor.map(request, range(options['requests'])))
+                list(executor.map(close_connection, range(options['threads'])))
+            elapsed = time.perf_counter() - start
+            queries = counter.queries
+        finally:
+            user.delete()
+        
+        self.stdout.write(
+            f"{len(latencies)} requests, {options['threads']} threads: "
+            f"{len(latencies) / elapsed:.0f} req/s, "
+            f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+            f"{queries / len(latencies):.2f} DB queries/request"
+        )
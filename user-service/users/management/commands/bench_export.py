@@ -0,0 +1,85 @@
+import os
+import time
+import uuid
+
+from django.db import connection
+from rest_framework.test import APIClient
+from users.management.benchmark import BenchmarkCommand
+from users.models import User, UserProfile
+
+FILL_CHUNK = 10000
+
+
+def current_rss():
+    """
+    Resident set size in MiB (Linux)
+    """
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+
+
+class Command(BenchmarkCommand):
+    help = 'Export benchmark: rows/s, time to first byte and peak memory of GET /manage/export/ vs paging the user list'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=1000000, help='Synthetic users (with profiles) to add before measuring')
+        parser.add_argument('--file-format', default='ndjson', choices=('ndjson', 'csv'))
+        parser.add_argument('--pages', type=int, default=50, help='List pages fetched to measure the paging rate')
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-export-{uuid.uuid4().hex[:8]}'
+        admin = User.objects.create_user(
+            username=prefix, email=f'{prefix}@example.com', password=None,
+            first_name='Bench', last_name='Export', role='admin',
+        )
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(admin)
+        
+        try:
+            for start in range(0, options['users'], FILL_CHUNK):
+                users = User.objects.bulk_create([
+                    User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password='!',
+                         first_name='Bench', last_name=f'Export {i}', phone_number=f'+84{900000000 + i}')
+                    for i in range(start, min(start + FILL_CHUNK, options['users']))
+                ])
+                UserProfile.objects.bulk_create([UserProfile(user=user, bio='Synthetic export row') for user in users])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE users')
+                cursor.execute('ANALYZE user_profiles')
+            
+            # Paging through the list, as the only export path did before
+            url, rows = '/api/v1/users/manage/', 0
+            start = time.perf_counter()
+            for _ in range(options['pages']):
+                page = client.get(url).json()
+                rows += len(page['results'])
+                url = page['next']
+            paged = rows / (time.perf_counter() - start)
+            self.stdout.write(f'list pages: {paged:.0f} rows/s')
+            
+            rss_before = peak_rss = current_rss()
+            start = time.perf_counter()
+            response = client.get('/api/v1/users/manage/export/', {'file_format': options['file_format']})
+            first_byte = None
+            lines = 0
+            for chunk in response.streaming_content:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                lines += chunk.count(b'\n')
+                peak_rss = max(peak_rss, current_rss())
+            elapsed = time.perf_counter() - start
+            
+            self.stdout.write(
+                f"export ({options['file_format']}): {lines} lines in {elapsed:.1f} s, {lines / elapsed:.0f} rows/s, "
+                f"first byte {first_byte * 1000:.0f} ms, RSS {rss_before} MiB before, {peak_rss} MiB peak"
+            )
+        finally:
+            # The synthetic rows have no related rows besides their profile, skip the ORM cascade collector
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM user_profiles WHERE user_id IN (SELECT id FROM users WHERE username LIKE %s)',
+                    [f'{prefix}-%'],
+                )
+                cursor.execute('DELETE FROM users WHERE username LIKE %s', [f'{prefix}-%'])
+            admin.delete()
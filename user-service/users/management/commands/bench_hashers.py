@@ -0,0 +1,60 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from users.management.benchmark import BenchmarkCommand
+
+from .bench_login import login_storm
+
+# Hasher settings compared by the benchmark: (preferred hasher, settings overrides)
+HASHER_SETTINGS = {
+    'pbkdf2-600k': ('pbkdf2', {'PBKDF2_ITERATIONS': 600000}),
+    'pbkdf2-260k': ('pbkdf2', {'PBKDF2_ITERATIONS': 260000}),
+    'argon2-django': ('argon2', {'ARGON2_TIME_COST': 2, 'ARGON2_MEMORY_COST': 102400, 'ARGON2_PARALLELISM': 8}),
+    'argon2-rfc9106': ('argon2', {'ARGON2_TIME_COST': 3, 'ARGON2_MEMORY_COST': 65536, 'ARGON2_PARALLELISM': 4}),
+    'argon2-19m': ('argon2', {'ARGON2_TIME_COST': 2, 'ARGON2_MEMORY_COST': 19456, 'ARGON2_PARALLELISM': 1}),
+}
+
+
+def available_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count()
+
+
+class Command(BenchmarkCommand):
+    help = 'Login throughput per core for each password hasher setting'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--setting', action='append', choices=sorted(HASHER_SETTINGS),
+                            help='Hasher setting to measure (repeatable, default: all)')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASHING_WORKERS,
+                            help='PASSWORD_HASHING_WORKERS during the run (0: hash in the request thread)')
+    
+    def handle(self, *args, **options):
+        cores = available_cores()
+        self.stdout.write(
+            f"{options['logins']} logins per setting, {options['threads']} threads, "
+            f"{options['workers']} hashing workers, {cores} cores"
+        )
+        self.stdout.write(f"{'setting':<16}{'logins/s':>10}{'per core':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        
+        for name in options['setting'] or HASHER_SETTINGS:
+            preferred, overrides = HASHER_SETTINGS[name]
+            preferred_class = settings.PASSWORD_HASHER_CLASSES[preferred]
+            hashers = [preferred_class] + [h for h in settings.PASSWORD_HASHERS if h != preferred_class]
+            with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_HASHING_WORKERS=options['workers'], **overrides):
+                try:
+                    stats = login_storm(options['users'], options['logins'], options['threads'])
+                except RuntimeError as e:
+                    raise CommandError(f'{name}: {e}')
+            
+            self.stdout.write(
+                f"{name:<16}{stats['logins_per_second']:>10.1f}{stats['logins_per_second'] / cores:>10.1f}"
+                f"{stats['p50_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+            )
@@ -0,0 +1,71 @@
+import json
+import os
+import resource
+import tempfile
+import time
+import uuid
+
+from django.db import connection
+from users.bulk_import import import_users, read_rows
+from users.management.benchmark import BenchmarkCommand
+from users.models import User
+
+BENCH_PASSWORD = 'BenchImport#2024'
+
+
+class Command(BenchmarkCommand):
+    help = 'Bulk import benchmark: rows/s and peak memory of importing a synthetic NDJSON file'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--passwords', type=float, default=0.0,
+                            help='Share of the rows with a password to hash (the others get an unusable one)')
+        parser.add_argument('--invalid', type=float, default=0.01, help='Share of the rows that fail validation')
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--workers', type=int)
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-import-{uuid.uuid4().hex[:8]}'
+        roles = [role for role, _ in User.USER_ROLES]
+        password_every = round(1 / options['passwords']) if options['passwords'] else 0
+        invalid_every = round(1 / options['invalid']) if options['invalid'] else 0
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            for i in range(options['rows']):
+                row = {
+                    'username': f'{prefix}-{i}', 'email': f'{prefix}-{i}@example.com',
+                    'first_name': 'Bench', 'last_name': f'Import {i}', 'role': roles[i % len(roles)],
+                    'phone_number': f'+84{900000000 + i}',
+                }
+                if password_every and i % password_every == 0:
+                    row['password'] = BENCH_PASSWORD
+                if invalid_every and i % invalid_every == invalid_every - 1:
+                    row['email'] = 'not-an-email'
+                f.write(json.dumps(row) + '\n')
+        
+        try:
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            with open(f.name, encoding='utf-8') as lines:
+                result = import_users(
+                    read_rows(lines, 'ndjson'),
+                    chunk_size=options['chunk_size'], workers=options['workers'],
+                )
+            elapsed = time.perf_counter() - start
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        finally:
+            os.unlink(f.name)
+            # The imported users have no related rows besides their profile, skip the ORM cascade collector
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM user_profiles WHERE user_id IN (SELECT id FROM users WHERE username LIKE %s)',
+                    [f'{prefix}-%'],
+                )
+                cursor.execute('DELETE FROM users WHERE username LIKE %s', [f'{prefix}-%'])
+        
+        self.stdout.write(
+            f"{options['rows']} rows ({options['passwords']:.0%} with a password): "
+            f"{result['created']} created, {result['failed']} rejected in {elapsed:.1f} s, "
+            f"{options['rows'] / elapsed:.0f} rows/s, peak RSS {rss_before // 1024} -> {rss_after // 1024} MiB"
+        )
@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from users.management.benchmark import BenchmarkCommand
+from users.models import User, UserProfile
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+BENCH_PASSWORD = 'BenchLogin#2024'
+
+
+class WriteCounter:
+    """
+    Database execute wrapper counting INSERT / UPDATE / DELETE statements
+    """
+    def __init__(self):
+        self.writes = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+            with self.lock:
+                self.writes += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def login_storm(num_users, num_logins, threads, eager=False):
+    """
+    Create temporary users, log them in through POST /api/v1/users/login/ from `threads`
+    threads and return throughput, latency percentiles and database writes per login
+    """
+    from userservice.celery import app
+    app.conf.task_always_eager = eager
+    
+    prefix = f'bench-login-{uuid.uuid4().hex[:8]}'
+    # Hash once with the current hasher settings, every benchmark user shares the same password
+    encoded = make_password(BENCH_PASSWORD)
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password=encoded,
+             first_name='Bench', last_name='Login')
+        for i in range(num_users)
+    ])
+    UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+    
+    counter = WriteCounter()
+    local = threading.local()
+    
+    def login(i):
+        if not hasattr(local, 'client'):
+            local.client = Client(HTTP_HOST='localhost')
+            connection.execute_wrappers.append(counter)
+        start = time.perf_counter()
+        response = local.client.post(
+            '/api/v1/users/login/',
+            {'email': users[i % len(users)].email, 'password': BENCH_PASSWORD},
+            content_type='application/json',
+        )
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f'Login failed with {response.status_code}: {response.content[:200]!r}')
+        return elapsed
+    
+    def close_connection(_):
+        connection.close()
+    
+    try:
+        # Warm up URL resolving, serializers and connections outside the measurement
+        login(0)
+        counter.writes = 0
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = sorted(executor.map(login, range(num_logins)))
+            list(executor.map(close_connection, range(threads)))
+        elapsed = time.perf_counter() - start
+        writes = counter.writes
+    finally:
+        User.objects.filter(username__startswith=prefix).delete()
+    
+    return {
+        'logins': len(latencies),
+        'logins_per_second': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'writes_per_login': writes / len(latencies),
+    }
+
+
+class Command(BenchmarkCommand):
+    help = 'Login storm benchmark: latency of POST /api/v1/users/login/ and database writes per login'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--logins', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--fast-hasher', action='store_true',
+            help='Use MD5PasswordHasher so latency reflects the login path rather than password hashing',
+        )
+        parser.add_argument(
+            '--eager', action='store_true',
+            help='Run Celery tasks inline to count the bookkeeping writes as well',
+        )
+    
+    def handle(self, *args, **options):
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hasher'] else None
+        with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+            stats = login_storm(options['users'], options['logins'], options['threads'], options['eager'])
+        
+        self.stdout.write(
+            f"{stats['logins']} logins, {options['threads']} threads, {options['users']} users: "
+            f"{stats['logins_per_second']:.0f} logins/s, "
+            f"p50 {stats['p50_ms']:.1f} ms, "
+            f"p99 {stats['p99_ms']:.1f} ms, "
+            f"{stats['writes_per_login']:.2f} DB writes/login"
+        )
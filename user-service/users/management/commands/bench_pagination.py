@@ -0,0 +1,92 @@
+import time
+import uuid
+from urllib.parse import parse_qs, urlparse
+
+from django.db import connection
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.management.benchmark import BenchmarkCommand
+from users.models import User, UserSession
+from users.pagination import UserPagination, UserSessionPagination
+
+from .bench_login import percentile
+
+FILL_CHUNK = 10000
+
+
+class Command(BenchmarkCommand):
+    help = 'Latency of page 1 and a deep page of the user and session lists: page numbers vs cursors'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=100000, help='Synthetic users to add before measuring')
+        parser.add_argument('--sessions', type=int, default=100000, help='UserSession rows of the benchmark user')
+        parser.add_argument('--page', type=int, default=1000, help='Deep page to compare with page 1')
+        parser.add_argument('--repeat', type=int, default=20)
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-pages-{uuid.uuid4().hex[:8]}'
+        factory = APIRequestFactory()
+        user = User.objects.create_user(
+            username=prefix, email=f'{prefix}@example.com', password=None,
+            first_name='Bench', last_name='Pagination',
+        )
+        
+        def measure(paginator_class, queryset, params):
+            latencies = []
+            for _ in range(options['repeat']):
+                request = Request(factory.get('/', params, HTTP_HOST='localhost'))
+                start = time.perf_counter()
+                page = paginator_class().paginate_queryset(queryset, request)
+                latencies.append(time.perf_counter() - start)
+            if not page:
+                raise RuntimeError(f'Empty page for {params}')
+            latencies.sort()
+            return percentile(latencies, 0.50) * 1000
+        
+        def deep_cursor(paginator_class, queryset):
+            # Follow the next links from page 1, as a client scrolling down would
+            params = {}
+            for _ in range(options['page'] - 1):
+                paginator = paginator_class()
+                paginator.paginate_queryset(queryset, Request(factory.get('/', params, HTTP_HOST='localhost')))
+                params = {'cursor': parse_qs(urlparse(paginator.get_next_link()).query)['cursor'][0]}
+            return params
+        
+        try:
+            for start in range(0, options['users'], FILL_CHUNK):
+                User.objects.bulk_create([
+                    User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password='!',
+                         first_name='Bench', last_name='Pagination')
+                    for i in range(start, min(start + FILL_CHUNK, options['users']))
+                ])
+            for start in range(0, options['sessions'], FILL_CHUNK):
+                UserSession.objects.bulk_create([
+                    UserSession(user=user, session_key=f'{prefix}-{i}', ip_address='127.0.0.1', is_active=False)
+                    for i in range(start, min(start + FILL_CHUNK, options['sessions']))
+                ])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE users')
+                cursor.execute('ANALYZE user_sessions')
+            
+            for name, queryset, paginator_class in (
+                ('users', User.objects.order_by('-created_at', '-id'), UserPagination),
+                ('sessions', UserSession.objects.filter(user_id=user.pk).order_by('-last_activity', '-id'),
+                 UserSessionPagination),
+            ):
+                deep = options['page']
+                self.stdout.write(
+                    f"{name:>8} page numbers: page 1 {measure(PageNumberPagination, queryset, {}):.2f} ms, "
+                    f"page {deep} {measure(PageNumberPagination, queryset, {'page': deep}):.2f} ms"
+                )
+                self.stdout.write(
+                    f"{name:>8} cursors:      page 1 {measure(paginator_class, queryset, {}):.2f} ms, "
+                    f"page {deep} {measure(paginator_class, queryset, deep_cursor(paginator_class, queryset)):.2f} ms"
+                )
+        finally:
+            # The synthetic rows have no related rows, skip the ORM cascade collector
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM user_sessions WHERE user_id = %s', [user.pk])
+                cursor.execute('DELETE FROM users WHERE username LIKE %s', [f'{prefix}-%'])
+            user.delete()
@@ -0,0 +1,76 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from users.management.benchmark import BenchmarkCommand
+from users.models import User
+from users.tokens import UserRefreshToken, blacklist_cache_key
+
+from .bench_login import percentile
+
+FILL_CHUNK = 10000
+
+
+class Command(BenchmarkCommand):
+    help = 'Latency of POST /api/v1/users/token/refresh/ as the token blacklist grows'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--blacklist-sizes', default='0,100000,1000000',
+                            help='Comma separated numbers of blacklisted JTIs to measure with')
+        parser.add_argument('--refreshes', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=8)
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-refresh-{uuid.uuid4().hex[:8]}'
+        user = User.objects.create_user(
+            username=prefix, email=f'{prefix}@example.com', password=None,
+            first_name='Bench', last_name='Refresh',
+        )
+        local = threading.local()
+        filled = 0
+        
+        def refresh(_):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST='localhost')
+                local.refresh = str(UserRefreshToken.for_user(user))
+            start = time.perf_counter()
+            response = local.client.post('/api/v1/users/token/refresh/', {'refresh': local.refresh},
+                                         content_type='application/json')
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f'Refresh failed with {response.status_code}: {response.content[:200]!r}')
+            # Rotation blacklists the old token, continue with the new one
+            local.refresh = response.json()['refresh']
+            return elapsed
+        
+        def close_connection(_):
+            connection.close()
+        
+        try:
+            for size in sorted(int(size) for size in options['blacklist_sizes'].split(',')):
+                # Grow the blacklist with entries of other (fake) tokens up to `size`
+                while filled < size:
+                    count = min(FILL_CHUNK, size - filled)
+                    cache.set_many({blacklist_cache_key(f'{prefix}-{filled + i}'): 1 for i in range(count)}, timeout=3600)
+                    filled += count
+                
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                    latencies = sorted(executor.map(refresh, range(options['refreshes'])))
+                    list(executor.map(close_connection, range(options['threads'])))
+                elapsed = time.perf_counter() - start
+                
+                self.stdout.write(
+                    f"blacklist {size:>9}: {len(latencies) / elapsed:.0f} refreshes/s, "
+                    f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+                    f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms"
+                )
+        finally:
+            user.delete()
+            for start in range(0, filled, FILL_CHUNK):
+                cache.delete_many([blacklist_cache_key(f'{prefix}-{i}') for i in range(start, min(start + FILL_CHUNK, filled))])
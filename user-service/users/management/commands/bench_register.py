@@ -0,0 +1,106 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from users.management.benchmark import BenchmarkCommand
+from users.models import User
+
+from .bench_login import percentile
+
+BENCH_PASSWORD = 'BenchRegister#2024'
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting every statement
+    """
+    def __init__(self):
+        self.queries = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BenchmarkCommand):
+    help = 'Registration benchmark: registrations/s of POST /api/v1/users/register/ and queries per registration'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--registrations', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--fast-hasher', action='store_true',
+            help='Use MD5PasswordHasher so throughput reflects the registration path rather than password hashing',
+        )
+    
+    def handle(self, *args, **options):
+        from userservice.celery import app
+        app.conf.task_always_eager = False
+        
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['fast_hasher'] else None
+        with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+            stats = self.register_storm(options['registrations'], options['threads'])
+        
+        self.stdout.write(
+            f"{stats['registrations']} registrations, {options['threads']} threads: "
+            f"{stats['registrations_per_second']:.0f} registrations/s, "
+            f"p50 {stats['p50_ms']:.1f} ms, "
+            f"p99 {stats['p99_ms']:.1f} ms, "
+            f"{stats['queries_per_registration']:.2f} queries/registration"
+        )
+    
+    def register_storm(self, num_registrations, threads):
+        prefix = f'bench-register-{uuid.uuid4().hex[:8]}'
+        counter = QueryCounter()
+        local = threading.local()
+        
+        def register(i):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_HOST='localhost')
+                connection.execute_wrappers.append(counter)
+            start = time.perf_counter()
+            response = local.client.post(
+                '/api/v1/users/register/',
+                {
+                    'username': f'{prefix}-{i}', 'email': f'{prefix}-{i}@example.com',
+                    'password': BENCH_PASSWORD, 'password_confirm': BENCH_PASSWORD,
+                    'first_name': 'Bench', 'last_name': 'Register',
+                },
+                content_type='application/json',
+            )
+            elapsed = time.perf_counter() - start
+            if response.status_code != 201:
+                raise RuntimeError(f'Registration failed with {response.status_code}: {response.content[:200]!r}')
+            return elapsed
+        
+        def close_connection(_):
+            connection.close()
+        
+        try:
+            # Warm up URL resolving, serializers and connections outside the measurement
+            register(num_registrations)
+            counter.queries = 0
+            
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                latencies = sorted(executor.map(register, range(num_registrations)))
+                list(executor.map(close_connection, range(threads)))
+            elapsed = time.perf_counter() - start
+            queries = counter.queries
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+        
+        return {
+            'registrations': len(latencies),
+            'registrations_per_second': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'queries_per_registration': queries / len(latencies),
+        }
@@ -0,0 +1,96 @@
+import random
+import time
+import unicodedata
+import uuid
+
+from django.db import connection
+from django.db.models import Q
+from users.management.benchmark import BenchmarkCommand
+from users.models import User
+from users.search import search_users
+
+from .bench_login import percentile
+
+FILL_CHUNK = 10000
+
+LAST_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ', 'Ngô', 'Dương', 'Lý']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Hữu', 'Đức', 'Minh', 'Ngọc', 'Thanh', 'Quốc', 'Thu', 'Gia', 'Xuân', 'Kim']
+GIVEN_NAMES = [
+    'An', 'Anh', 'Bình', 'Châu', 'Cường', 'Dũng', 'Duy', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hòa', 'Hồng',
+    'Hùng', 'Hương', 'Khánh', 'Lan', 'Linh', 'Long', 'Mai', 'Nam', 'Nga', 'Nhung', 'Phong', 'Phúc', 'Phương',
+    'Quân', 'Quang', 'Sơn', 'Tâm', 'Thảo', 'Thắng', 'Trang', 'Trung', 'Tú', 'Tuấn', 'Vân', 'Việt', 'Yến',
+]
+
+
+def ascii_name(name):
+    decomposed = unicodedata.normalize('NFKD', name.lower().replace('đ', 'd'))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def icontains_search(queryset, term):
+    """
+    The previous search: four OR'ed leading-wildcard ILIKEs
+    """
+    return queryset.filter(
+        Q(first_name__icontains=term) |
+        Q(last_name__icontains=term) |
+        Q(email__icontains=term) |
+        Q(username__icontains=term)
+    ).order_by('-created_at')
+
+
+class Command(BenchmarkCommand):
+    help = 'Latency of the admin user search (first page + count) on a seeded users table'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=1000000, help='Synthetic users to add before measuring')
+        parser.add_argument('--repeat', type=int, default=5)
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-search-{uuid.uuid4().hex[:8]}'
+        rng = random.Random(0)
+        sample = None
+        
+        try:
+            for start in range(0, options['users'], FILL_CHUNK):
+                users = []
+                for i in range(start, min(start + FILL_CHUNK, options['users'])):
+                    last_name, middle_name, given_name = (
+                        rng.choice(LAST_NAMES), rng.choice(MIDDLE_NAMES), rng.choice(GIVEN_NAMES)
+                    )
+                    users.append(User(
+                        username=f'{prefix}-{i}', password='!', last_name=last_name,
+                        first_name=f'{middle_name} {given_name}',
+                        email=f'{ascii_name(given_name)}.{ascii_name(last_name)}{i}@example.com',
+                    ))
+                User.objects.bulk_create(users)
+                sample = sample or users[len(users) // 2]
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE users')
+            
+            terms = [
+                f'{sample.last_name} {sample.first_name}',
+                ascii_name(f'{sample.last_name} {sample.first_name}'),
+                sample.email.split('@')[0],
+                'nguyễn văn',
+                'hoàng',
+            ]
+            for term in terms:
+                for name, search in (('icontains', icontains_search), ('trigram', search_users)):
+                    latencies = []
+                    for _ in range(options['repeat']):
+                        start = time.perf_counter()
+                        queryset = search(User.objects.all(), term)
+                        count = queryset.count()
+                        list(queryset[:20])
+                        latencies.append(time.perf_counter() - start)
+                    latencies.sort()
+                    self.stdout.write(
+                        f"{term!r:>32} {name:>9}: {count:>7} matches, "
+                        f"p50 {percentile(latencies, 0.50) * 1000:.1f} ms"
+                    )
+        finally:
+            # The synthetic users have no related rows, skip the ORM cascade collector
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM users WHERE username LIKE %s', [f'{prefix}-%'])
@@ -0,0 +1,95 @@
+import datetime
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from users.models import User, UserProfile, UserSession
+from users.renderers import ORJSONRenderer
+from users.representation import PrecompiledRepresentationMixin
+from users.serializers import (
+    UserListProfileSerializer, UserListSerializer, UserProfileDetailSerializer,
+    UserProfileSerializer, UserSessionSerializer,
+)
+
+
+def drf_serializer(serializer_class):
+    """
+    The same serializer on DRF's to_representation, nested serializers included
+    """
+    declared = {}
+    for name, field in serializer_class._declared_fields.items():
+        if isinstance(field, PrecompiledRepresentationMixin):
+            field = drf_serializer(type(field))(*field._args, **field._kwargs)
+        declared[name] = field
+    return type(f'DRF{serializer_class.__name__}', (serializers.ModelSerializer,), {'Meta': serializer_class.Meta, **declared})
+
+
+def rate(function, objects, repeat):
+    """
+    Objects per second of the fastest of repeat runs
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return objects / best
+
+
+class Command(BaseCommand):
+    help = 'Objects/s of the list, profile and session serializers and of the JSON renderers, DRF vs precompiled / orjson'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--objects', type=int, default=100, help='Objects serialized per run, as in one page')
+        parser.add_argument('--repeat', type=int, default=200)
+    
+    def handle(self, *args, **options):
+        # Unsaved instances: the serializers are measured, not the database
+        now = timezone.now()
+        users = []
+        for i in range(options['objects']):
+            user = User(
+                id=uuid.uuid4(), username=f'bench-{i}', email=f'bench-{i}@example.com',
+                first_name='Văn', last_name=f'Nguyễn {i}', phone_number=f'+84{900000000 + i}',
+                date_of_birth=datetime.date(1990, 1, 1) + datetime.timedelta(days=i),
+                role='patient', is_verified=bool(i % 2), created_at=now, updated_at=now,
+                last_login=now if i % 3 else None,
+            )
+            user.profile = UserProfile(user=user, bio='Synthetic profile', years_of_experience=i % 40)
+            users.append(user)
+        sessions = [
+            UserSession(
+                id=i, user=users[0], session_key=uuid.uuid4().hex, ip_address='2001:db8::1' if i % 2 else '10.0.0.1',
+                user_agent='Mozilla/5.0', device_info='Desktop', created_at=now, last_activity=now,
+            )
+            for i in range(options['objects'])
+        ]
+        
+        for serializer_class, instances in (
+            (UserListSerializer, users),
+            (UserListProfileSerializer, users),
+            (UserProfileSerializer, users),
+            (UserProfileDetailSerializer, users),
+            (UserSessionSerializer, sessions),
+        ):
+            baseline_class = drf_serializer(serializer_class)
+            data = serializer_class(instances, many=True).data
+            body = JSONRenderer().render(data)
+            if body != JSONRenderer().render(baseline_class(instances, many=True).data) or body != ORJSONRenderer().render(data):
+                raise CommandError(f'{serializer_class.__name__}: output differs from DRF')
+            
+            count, repeat = len(instances), options['repeat']
+            drf = rate(lambda: baseline_class(instances, many=True).data, count, repeat)
+            precompiled = rate(lambda: serializer_class(instances, many=True).data, count, repeat)
+            json_renderer = rate(lambda: JSONRenderer().render(data), count, repeat)
+            orjson_renderer = rate(lambda: ORJSONRenderer().render(data), count, repeat)
+            before = rate(lambda: JSONRenderer().render(baseline_class(instances, many=True).data), count, repeat)
+            after = rate(lambda: ORJSONRenderer().render(serializer_class(instances, many=True).data), count, repeat)
+            self.stdout.write(
+                f'{serializer_class.__name__:>28}: serializer {drf:.0f} -> {precompiled:.0f} obj/s, '
+                f'renderer {json_renderer:.0f} -> {orjson_renderer:.0f} obj/s, '
+                f'both {before:.0f} -> {after:.0f} obj/s ({after / before:.1f}x)'
+            )
@@ -0,0 +1,80 @@
+import time
+import uuid
+
+from django.db import connection
+from users.management.benchmark import BenchmarkCommand
+from users.models import User
+from users.statistics import compute_user_statistics, get_user_statistics, rebuild_user_statistics
+
+from .bench_login import percentile
+
+FILL_CHUNK = 10000
+
+
+def per_query_counts():
+    """
+    The previous implementation: one count() per counter
+    """
+    role_stats = {}
+    for role, _ in User.USER_ROLES:
+        role_stats[role] = User.objects.filter(role=role).count()
+    return {
+        'total_users': User.objects.count(),
+        'active_users': User.objects.filter(is_active=True).count(),
+        'verified_users': User.objects.filter(is_verified=True).count(),
+        'role_statistics': role_stats,
+    }
+
+
+class Command(BenchmarkCommand):
+    help = 'Latency of the user statistics: per-counter count(), one aggregate query and the Redis counters'
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=1000000, help='Synthetic users to add before measuring')
+        parser.add_argument('--repeat', type=int, default=20, help='Calls per database strategy')
+        parser.add_argument('--cached-repeat', type=int, default=2000)
+    
+    def handle(self, *args, **options):
+        prefix = f'bench-stats-{uuid.uuid4().hex[:8]}'
+        roles = [role for role, _ in User.USER_ROLES]
+        
+        try:
+            # bulk_create skips the signals: the counters are rebuilt below
+            for start in range(0, options['users'], FILL_CHUNK):
+                User.objects.bulk_create([
+                    User(
+                        username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password='!',
+                        first_name='Bench', last_name='Statistics', role=roles[i % len(roles)],
+                        is_active=i % 10 != 0, is_verified=i % 3 == 0,
+                    )
+                    for i in range(start, min(start + FILL_CHUNK, options['users']))
+                ])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE users')
+            rebuild_user_statistics()
+            
+            expected = per_query_counts()
+            for name, function, repeat in (
+                ('per-counter count()', per_query_counts, options['repeat']),
+                ('single aggregate', compute_user_statistics, options['repeat']),
+                ('redis counters', get_user_statistics, options['cached_repeat']),
+            ):
+                result = function()
+                if name != 'single aggregate' and result != expected:
+                    raise RuntimeError(f'{name} returned {result}, expected {expected}')
+                latencies = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    function()
+                    latencies.append(time.perf_counter() - start)
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:>20}: p50 {percentile(latencies, 0.50) * 1000:.3f} ms, "
+                    f"p99 {percentile(latencies, 0.99) * 1000:.3f} ms"
+                )
+        finally:
+            # The synthetic users have no related rows, skip the ORM cascade collector
+            with connection.cursor() as cursor:
+                cursor.execute('DELETE FROM users WHERE username LIKE %s', [f'{prefix}-%'])
+            rebuild_user_statistics()
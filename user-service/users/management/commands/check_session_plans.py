@@ -0,0 +1,51 @@
+import time
+import uuid
+
+from django.core.management.base import CommandError
+from django.db import transaction
+from users.management.benchmark import BenchmarkCommand
+from users.models import User
+from users.testing import hot_session_queries, scans_index, seed_sessions
+
+
+class Command(BenchmarkCommand):
+    help = (
+        'Query plans of the hot session queries on a large user_sessions table (QueryPlanTests '
+        'checks them on a small one): fail unless each scans the expected index. Rolled back at the end.'
+    )
+    
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--sessions', type=int, default=10000000)
+        parser.add_argument('--users', type=int, default=10000, help='Users the sessions are spread over')
+        parser.add_argument('--active-every', type=int, default=10, help='One active session out of this many')
+    
+    def handle(self, *args, **options):
+        prefix = f'plans-{uuid.uuid4().hex[:8]}'
+        failures = []
+        
+        # Everything is rolled back: no cleanup of millions of rows afterwards
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password='!',
+                     first_name='Plan', last_name='Check')
+                for i in range(options['users'])
+            ])
+            user_ids = [user.pk for user in users]
+            
+            start = time.perf_counter()
+            seed_sessions(user_ids, options['sessions'], prefix, options['active_every'])
+            self.stdout.write(f"Seeded {options['sessions']} sessions in {time.perf_counter() - start:.0f} s")
+            
+            for name, queryset, index in hot_session_queries(user_ids[len(user_ids) // 2]):
+                plan = queryset.explain(analyze=True)
+                ok = scans_index(plan, index)
+                self.stdout.write(f"{'OK  ' if ok else 'FAIL'} {name} (expected {index})")
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+                if not ok:
+                    failures.append(name)
+            
+            transaction.set_rollback(True)
+        
+        if failures:
+            raise CommandError(f"Not using the expected index scan: {', '.join(failures)}")
@@ -0,0 +1,43 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from users.bulk_import import FORMATS, detect_format, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create users from a CSV (with a header line) or NDJSON file; rejected rows are reported as NDJSON'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension, else csv')
+        parser.add_argument('--chunk-size', type=int, help='Default: BULK_IMPORT_CHUNK_SIZE')
+        parser.add_argument('--workers', type=int, help='Hashing processes, default: BULK_IMPORT_HASHING_WORKERS')
+        parser.add_argument('--errors', help='Write the rejected rows to this file instead of stderr')
+    
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        errors = open(options['errors'], 'w') if options['errors'] else sys.stderr
+        
+        def on_error(number, row_errors):
+            errors.write(json.dumps({'row': number, 'errors': row_errors}, ensure_ascii=False) + '\n')
+        
+        start = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                result = import_users(
+                    read_rows(lines, file_format), on_error=on_error,
+                    chunk_size=options['chunk_size'], workers=options['workers'],
+                )
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        finally:
+            if errors is not sys.stderr:
+                errors.close()
+        elapsed = time.perf_counter() - start
+        
+        self.stdout.write(
+            f"{result['created']} users created, {result['failed']} rows rejected "
+            f"in {elapsed:.1f} s ({(result['created'] + result['failed']) / elapsed:.0f} rows/s)"
+        )
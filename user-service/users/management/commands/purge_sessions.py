@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from users.tasks import purge_user_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete all expired user sessions now, in batches (the beat task deletes at most 100 batches per run)'
+    
+    def handle(self, *args, **options):
+        deleted = purge_user_sessions(max_batches=None)
+        self.stdout.write(f'Deleted {deleted} expired sessions')
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:33
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations, models
+
+# unaccent() is only STABLE (it depends on the dictionary search path), which
+# rules it out of indexed expressions: wrap it with the dictionary pinned
+SEARCH_DOCUMENT_SQL = """
+CREATE FUNCTION immutable_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT unaccent('unaccent'::regdictionary, $1) $$;
+
+CREATE FUNCTION users_search_document() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_document := lower(immutable_unaccent(
+        concat_ws(' ', NEW.last_name, NEW.first_name, NEW.email, NEW.username)
+    ));
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER users_search_document
+    BEFORE INSERT OR UPDATE OF first_name, last_name, email, username ON users
+    FOR EACH ROW EXECUTE FUNCTION users_search_document();
+
+UPDATE users SET search_document = lower(immutable_unaccent(
+    concat_ws(' ', last_name, first_name, email, username)
+));
+"""
+
+DROP_SEARCH_DOCUMENT_SQL = """
+DROP TRIGGER users_search_document ON users;
+DROP FUNCTION users_search_document();
+DROP FUNCTION immutable_unaccent(text);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_token_version'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.AddField(
+            model_name='user',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunSQL(SEARCH_DOCUMENT_SQL, DROP_SEARCH_DOCUMENT_SQL),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_document', name='gin_trgm_ops'), name='users_search_document_trgm'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:12
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY: do not block logins and registrations while building
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_user_search_document'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='users_created_at_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usersession',
+            index=models.Index(fields=['user', '-last_activity', '-id'], name='sessions_user_activity_idx'),
+        ),
+    ]
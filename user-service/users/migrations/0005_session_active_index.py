@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:15
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY: do not block logins and logouts while building
+    atomic = False
+
+    dependencies = [
+        ('users', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='usersession',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-last_activity'], name='sessions_user_active_idx'),
+        ),
+        # The single-column FK index is a prefix of the composite indexes
+        migrations.AlterField(
+            model_name='usersession',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
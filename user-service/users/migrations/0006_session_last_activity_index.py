@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:58
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY: do not block logins while building
+    atomic = False
+
+    dependencies = [
+        ('users', '0005_session_active_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='usersession',
+            index=models.Index(fields=['last_activity'], name='sessions_last_activity_idx'),
+        ),
+    ]
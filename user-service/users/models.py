@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
 from django.core.validators import RegexValidator
 import uuid
@@ -47,18 +48,54 @@ class User(AbstractUser):
     updated_at = models.DateTimeField(auto_now=True)
     last_login_ip = models.GenericIPAddressField(null=True, blank=True)
     
+    # Embedded in every JWT; incrementing it revokes all tokens issued to the user
+    token_version = models.PositiveIntegerField(default=0)
+    
+    # lower(unaccent(last_name first_name email username)), written by the
+    # users_search_document trigger (migration 0003), see users/search.py
+    search_document = models.TextField(blank=True, default='', editable=False)
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
     
+    # Fields the user statistics counters depend on (users/statistics.py)
+    COUNTED_FIELDS = ('role', 'is_active', 'is_verified')
+    
     class Meta:
         db_table = 'users'
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(OpClass('search_document', name='gin_trgm_ops'), name='users_search_document_trgm'),
+            # Keyset pagination of the user list (users/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='users_created_at_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The counted fields as stored, so a save can move the user between statistics
+        # counters without reading the row again (users/signals.py)
+        instance.counted_values_loaded = instance.loaded_counted_values()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or set(self.COUNTED_FIELDS) & set(fields):
+            self.counted_values_loaded = self.loaded_counted_values()
+    
+    def loaded_counted_values(self):
+        """
+        (role, is_active, is_verified) as held by the instance, None if any of them is deferred
+        """
+        if set(self.COUNTED_FIELDS) & self.get_deferred_fields():
+            return None
+        return tuple(getattr(self, field) for field in self.COUNTED_FIELDS)
+    
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
     
@@ -132,7 +169,8 @@ class UserSession(models.Model):
     """
     Track user sessions for security purposes
     """
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sessions')
+    # Indexed by the composite indexes below, which all start with user_id
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sessions', db_index=False)
     session_key = models.CharField(max_length=40, unique=True)
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField()
@@ -147,6 +185,18 @@ class UserSession(models.Model):
         verbose_name = 'User Session'
         verbose_name_plural = 'User Sessions'
         ordering = ['-last_activity']
+        indexes = [
+            # A user's sessions, newest activity first (keyset pagination of /sessions/)
+            models.Index(fields=['user', '-last_activity', '-id'], name='sessions_user_activity_idx'),
+            # A user's active sessions: dashboard recent sessions, logout
+            models.Index(
+                fields=['user', '-last_activity'],
+                condition=models.Q(is_active=True),
+                name='sessions_user_active_idx',
+            ),
+            # Retention purge of idle sessions (users.tasks.purge_user_sessions)
+            models.Index(fields=['last_activity'], name='sessions_last_activity_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.ip_address}"
\ No newline at end of file
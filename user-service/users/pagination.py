@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination: every page is one range scan of the ordering index,
+    however deep it is. The total count costs a COUNT(*) of the whole result,
+    so it is only included when requested with ?count=true
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+    
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = OrderedDict([('count', self.count), *response.data.items()])
+        return response
+
+
+class UserPagination(KeysetPagination):
+    # The id breaks created_at ties (it is a UUID, so it cannot order on its own)
+    ordering = ('-created_at', '-id')
+
+
+class UserSessionPagination(KeysetPagination):
+    ordering = ('-last_activity', '-id')
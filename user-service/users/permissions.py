@@ -28,6 +28,15 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role == 'admin'
 
 
+class IsAdmin(permissions.BasePermission):
+    """
+    Custom permission for admins only, reads included.
+    """
+    
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role == 'admin'
+
+
 class IsDoctorOrAdmin(permissions.BasePermission):
     """
     Custom permission for doctors and admins.
@@ -0,0 +1,75 @@
+"""
+JSON renderer on orjson, byte for byte the output of DRF's JSONRenderer.
+
+orjson writes str, int, bool, None, dicts, lists, UUIDs and floats in
+[1e-4, 1e16) exactly as json.dumps does with the compact separators and
+ensure_ascii=False of the default settings. Datetimes are passed to DRF's
+JSONEncoder as json.dumps would pass them. Anything else, an indent or
+non-default JSON settings go through JSONRenderer itself.
+"""
+import datetime
+import uuid
+
+import orjson
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+# Written by DRF's JSONEncoder.default, which orjson calls for them
+ENCODER_TYPES = (datetime.date, datetime.time, datetime.timedelta, uuid.UUID, Promise)
+
+# Values written the same way by both, checked by exact type first
+SAME_TYPES = frozenset((str, int, bool, type(None), datetime.datetime, datetime.date, uuid.UUID))
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def orjson_compatible(data):
+    """
+    True if orjson writes data as json.dumps with DRF's JSONEncoder does
+    """
+    stack = [[data]]
+    while stack:
+        values = stack.pop()
+        # Flat containers of plain values, a serialized object, are checked in C
+        if SAME_TYPES.issuperset(map(type, values)):
+            continue
+        for value in values:
+            if type(value) in SAME_TYPES:
+                continue
+            if isinstance(value, dict):
+                stack.append(value.values())
+            elif isinstance(value, (list, tuple)):
+                stack.append(value)
+            elif isinstance(value, float):
+                # Outside [1e-4, 1e16) repr() uses an exponent (1e+16) that orjson
+                # writes differently (1e16); NaN and infinities fail the test too
+                if value and not 1e-4 <= abs(value) < 1e16:
+                    return False
+            elif not isinstance(value, (str, int) + ENCODER_TYPES) and value is not None:
+                # Decimal, querysets, generators...: the encoder's own rules
+                return False
+    return True
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer with orjson doing the encoding where the bytes are the same
+    """
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or not self.compact or self.ensure_ascii or not self.strict
+            or not orjson_compatible(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits, non-string keys, errors of the encoder
+            return super().render(data, accepted_media_type, renderer_context)
+        # As JSONRenderer: valid JSON, but not valid JavaScript
+        return ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
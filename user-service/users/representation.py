@@ -0,0 +1,140 @@
+"""
+Precompiled to_representation for read-only model serializers on hot GET endpoints.
+
+Serializer.to_representation resolves every field of every object through
+Field.get_attribute (a Mapping check, is_simple_callable and inspect.signature
+per attribute) and builds an OrderedDict. Here each serializer instance compiles
+its readable fields once into (name, getter, converter) triples: getters are
+attrgetter/methodcaller, converters are str for the char and UUID fields, an
+ISO 8601 formatter for datetimes and the field's own to_representation
+otherwise. The result is the dict DRF would build, key for key and value for
+value. DateTimeField looks the current time zone up (an asgiref Local) for every
+value; the plan looks it up once, when the serializer renders its first object.
+
+Serializers with fields that resolve their attribute themselves (related fields)
+and mappings go through DRF's to_representation.
+"""
+from collections.abc import Mapping
+from functools import lru_cache, partial
+from operator import attrgetter, methodcaller
+import datetime
+import inspect
+
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework import ISO_8601, fields
+from rest_framework.settings import api_settings
+
+# to_representation implementations that are exactly str(value)
+STR_REPRESENTATIONS = (fields.CharField.to_representation,)
+
+
+def _identity(instance):
+    return instance
+
+
+@lru_cache(maxsize=None)
+def _getter(model, source_attrs):
+    """
+    instance -> attribute, as Field.get_attribute(instance) returns it. Cached:
+    the same for every serializer instance.
+    """
+    if not source_attrs:
+        # source='*'
+        return _identity
+    if len(source_attrs) > 1:
+        return lambda instance: fields.get_attribute(instance, source_attrs)
+    
+    name = source_attrs[0]
+    attribute = inspect.getattr_static(model, name, None)
+    if inspect.isfunction(attribute):
+        if fields.is_simple_callable(partial(attribute, None)):
+            # Methods such as get_full_name, called without arguments
+            return methodcaller(name)
+        return lambda instance: fields.get_attribute(instance, source_attrs)
+    get = attrgetter(name)
+    
+    def getter(instance):
+        try:
+            return get(instance)
+        except ObjectDoesNotExist:
+            # A missing one-to-one relation, e.g. user.profile
+            return None
+    return getter
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation with the field's time zone looked up once
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None \
+            or type(field).enforce_timezone is not fields.DateTimeField.enforce_timezone:
+        return field.to_representation
+    
+    def to_iso_8601(value):
+        # Strings and naive datetimes as DRF renders them
+        if not isinstance(value, datetime.datetime) or value.utcoffset() is None:
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(field_timezone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_iso_8601
+
+
+def _converter(field):
+    """
+    attribute (not None) -> primitive value
+    """
+    to_representation = type(field).to_representation
+    if to_representation in STR_REPRESENTATIONS:
+        return str
+    if isinstance(field, fields.UUIDField) and to_representation is fields.UUIDField.to_representation \
+            and field.uuid_format == 'hex_verbose':
+        return str
+    if to_representation is fields.DateTimeField.to_representation:
+        return _datetime_converter(field)
+    return field.to_representation
+
+
+class PrecompiledRepresentationMixin:
+    """
+    Serializer mixin: to_representation from a plan compiled once per serializer
+    instance (once per list with many=True, the child is shared).
+    """
+    
+    def get_representation_plan(self):
+        """
+        [(field name, getter, converter)], or None if a field needs DRF's own lookup
+        """
+        try:
+            return self._representation_plan
+        except AttributeError:
+            pass
+        
+        model = getattr(getattr(self, 'Meta', None), 'model', None)
+        plan = []
+        for field in self._readable_fields:
+            if type(field).get_attribute is not fields.Field.get_attribute:
+                plan = None
+                break
+            plan.append((field.field_name, _getter(model, tuple(field.source_attrs)), _converter(field)))
+        self._representation_plan = plan
+        return plan
+    
+    def to_representation(self, instance):
+        plan = self.get_representation_plan()
+        if plan is None or isinstance(instance, Mapping):
+            return super().to_representation(instance)
+        
+        ret = {}
+        try:
+            for name, getter, converter in plan:
+                attribute = getter(instance)
+                ret[name] = None if attribute is None else converter(attribute)
+        except (AttributeError, KeyError):
+            # Defaults, allow_null and skipped fields are DRF's to handle
+            return super().to_representation(instance)
+        return ret
@@ -1,8 +1,35 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from .models import User, UserProfile, UserSession
+from .representation import PrecompiledRepresentationMixin
+from .tasks import queue_or_run, record_token_refresh
+from .tokens import TOKEN_VERSION_CLAIM, UserRefreshToken, blacklist_token, is_token_blacklisted
+
+
+# Unique constraints of the users table: field -> message
+UNIQUE_USER_ERRORS = {
+    'email': "A user with this email already exists.",
+    'username': "A user with this username already exists.",
+}
+
+
+def unique_user_errors(exc):
+    """
+    {field: [message]} for an IntegrityError raised by a unique constraint of users, else None
+    """
+    constraint = getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None) or str(exc)
+    for field, message in UNIQUE_USER_ERRORS.items():
+        if f'users_{field}_' in constraint:
+            return {field: [message]}
+    return None
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -21,7 +48,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         )
         extra_kwargs = {
             'password': {'write_only': True},
-            'email': {'required': True},
+            # Uniqueness is enforced by the unique constraints in create(), not by
+            # an exists() query per field beforehand
+            'email': {'required': True, 'validators': []},
+            'username': {'validators': [UnicodeUsernameValidator()]},
             'first_name': {'required': True},
             'last_name': {'required': True},
         }
@@ -31,27 +61,48 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Passwords don't match.")
         return attrs
     
+    def create(self, validated_data):
+        validated_data.pop('password_confirm')
+        try:
+            # One INSERT of the user (password hashed once) and one of the
+            # profile, by the create_user_profile signal
+            with transaction.atomic():
+                return User.objects.create_user(**validated_data)
+        except IntegrityError as e:
+            errors = unique_user_errors(e)
+            if errors is None:
+                raise
+            raise serializers.ValidationError(errors)
+
+
+class BulkUserImportSerializer(serializers.ModelSerializer):
+    """
+    Validates one row of a bulk import (users/bulk_import.py). Uniqueness is checked
+    per chunk by the importer; without a password the user gets an unusable one
+    and sets it through a password reset.
+    """
+    password = serializers.CharField(write_only=True, required=False, validators=[validate_password])
+    
+    class Meta:
+        model = User
+        fields = (
+            'username', 'email', 'password', 'first_name', 'last_name',
+            'phone_number', 'role', 'date_of_birth', 'gender', 'address',
+            'emergency_contact', 'is_verified'
+        )
+        extra_kwargs = {
+            'email': {'required': True, 'validators': []},
+            'username': {'validators': [UnicodeUsernameValidator()]},
+            'first_name': {'required': True},
+            'last_name': {'required': True},
+        }
+    
+    # Stored as create_user would store them
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("A user with this email already exists.")
-        return value
+        return User.objects.normalize_email(value)
     
     def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        return value
-    
-    def create(self, validated_data):
-        validated_data.pop('password_confirm')
-        password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        
-        # Create user profile
-        UserProfile.objects.create(user=user)
-        
-        return user
+        return User.normalize_username(value)
 
 
 class UserLoginSerializer(serializers.Serializer):
@@ -77,7 +128,47 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password.')
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that re-reads the user: new tokens carry the current claims
+    and revoked or inactive users cannot refresh. Rotated refresh tokens are
+    blacklisted in Redis, the check and the blacklisting are one SET NX.
+    """
+    token_class = UserRefreshToken
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            if not blacklist_token(refresh):
+                raise InvalidToken('Token is blacklisted.')
+        elif is_token_blacklisted(refresh):
+            raise InvalidToken('Token is blacklisted.')
+        
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not user.is_active:
+            raise InvalidToken('User not found or inactive.')
+        if refresh.get(TOKEN_VERSION_CLAIM, user.token_version) != user.token_version:
+            raise InvalidToken('Token has been revoked.')
+        refresh.add_user_claims(user)
+        
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            old_jti = refresh[api_settings.JTI_CLAIM]
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+            queue_or_run(
+                record_token_refresh,
+                old_jti=old_jti,
+                new_jti=refresh[api_settings.JTI_CLAIM],
+                refreshed_at=timezone.now().isoformat(),
+                user_id=str(user.pk),
+            )
+        return data
+
+
+class UserProfileSerializer(PrecompiledRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for user profile
     """
@@ -94,11 +185,25 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'email', 'role', 'is_verified', 'created_at', 'updated_at')
 
 
-class UserProfileDetailSerializer(serializers.ModelSerializer):
+class ExtendedUserProfileSerializer(PrecompiledRepresentationMixin, serializers.ModelSerializer):
+    """
+    Serializer for extended user profile
+    """
+    class Meta:
+        model = UserProfile
+        fields = (
+            'bio', 'website', 'location', 'birth_place',
+            'blood_type', 'allergies', 'medical_history', 'current_medications',
+            'license_number', 'specialization', 'years_of_experience',
+            'education', 'certifications', 'profile_visibility'
+        )
+
+
+class UserProfileDetailSerializer(PrecompiledRepresentationMixin, serializers.ModelSerializer):
     """
     Detailed serializer for user profile including extended profile
     """
-    profile = serializers.SerializerMethodField()
+    profile = ExtendedUserProfileSerializer(read_only=True)
     
     class Meta:
         model = User
@@ -109,27 +214,6 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'last_login', 'profile'
         )
         read_only_fields = ('id', 'email', 'role', 'is_verified', 'created_at', 'updated_at')
-    
-    def get_profile(self, obj):
-        try:
-            profile = obj.profile
-            return ExtendedUserProfileSerializer(profile).data
-        except UserProfile.DoesNotExist:
-            return None
-
-
-class ExtendedUserProfileSerializer(serializers.ModelSerializer):
-    """
-    Serializer for extended user profile
-    """
-    class Meta:
-        model = UserProfile
-        fields = (
-            'bio', 'website', 'location', 'birth_place',
-            'blood_type', 'allergies', 'medical_history', 'current_medications',
-            'license_number', 'specialization', 'years_of_experience',
-            'education', 'certifications', 'profile_visibility'
-        )
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -146,13 +230,13 @@ class ChangePasswordSerializer(serializers.Serializer):
         return attrs
     
     def validate_old_password(self, value):
-        user = self.context['request'].user
+        user = self.context['user']
         if not user.check_password(value):
             raise serializers.ValidationError("Old password is incorrect.")
         return value
 
 
-class UserSessionSerializer(serializers.ModelSerializer):
+class UserSessionSerializer(PrecompiledRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for user sessions
     """
@@ -166,7 +250,7 @@ class UserSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'last_activity')
 
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(PrecompiledRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for listing users (admin only)
     """
@@ -178,4 +262,15 @@ class UserListSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'full_name', 'role',
             'is_active', 'is_verified', 'created_at', 'last_login'
         )
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+
+class UserListProfileSerializer(UserListSerializer):
+    """
+    User list entry with the extended profile (?include=profile)
+    """
+    profile = ExtendedUserProfileSerializer(read_only=True)
+    
+    class Meta(UserListSerializer.Meta):
+        fields = UserListSerializer.Meta.fields + ('profile',)
+        read_only_fields = fields
@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import UserProfile
+from .dashboard import invalidate_dashboard
+from .models import UserProfile, UserSession
+from .statistics import COUNTED_FIELDS, apply_statistics_deltas, statistics_deltas
 
 User = get_user_model()
 
@@ -16,9 +21,74 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, **kwargs):
     """
     Save the UserProfile when the User is saved
     """
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+    # A new user's profile was just inserted by create_user_profile. Only a profile
+    # already loaded (select_related or accessed) can have changes: never fetch one to save it
+    if not created and User.profile.is_cached(instance):
+        instance.profile.save()
+
+
+def counted_values(user):
+    return tuple(getattr(user, field) for field in COUNTED_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+def remember_counted_values(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    The stored role / is_active / is_verified before an update, so post_save can
+    move the user between statistics counters. Users loaded from the database
+    carry them from User.from_db; others (User(pk=...).save(), deferred fields)
+    read them from the row.
+    """
+    instance._counted_before = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(COUNTED_FIELDS) & set(update_fields):
+        return
+    instance._counted_before = getattr(instance, 'counted_values_loaded', None) or (
+        User.objects.filter(pk=instance.pk).values_list(*COUNTED_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=User)
+def count_saved_user(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Update the user statistics counters once the transaction commits
+    """
+    if raw:
+        return
+    if created:
+        deltas = statistics_deltas(after=counted_values(instance))
+    elif getattr(instance, '_counted_before', None) is not None:
+        deltas = statistics_deltas(before=instance._counted_before, after=counted_values(instance))
+    else:
+        deltas = None
+    # What is stored now, for the next save of this instance
+    if update_fields is None or set(COUNTED_FIELDS) <= set(update_fields):
+        instance.counted_values_loaded = instance.loaded_counted_values()
+    elif set(COUNTED_FIELDS) & set(update_fields):
+        instance.counted_values_loaded = None
+    if deltas:
+        transaction.on_commit(partial(apply_statistics_deltas, deltas))
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    deltas = statistics_deltas(before=counted_values(instance))
+    transaction.on_commit(partial(apply_statistics_deltas, deltas))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard(instance.pk)
+
+
+# No post_delete receiver: it would disable fast deletes of sessions (the
+# retention purge invalidates the dashboards it affects itself)
+@receiver(post_save, sender=UserSession)
+def invalidate_session_dashboard(sender, instance, **kwargs):
+    invalidate_dashboard(instance.user_id)
@@ -0,0 +1,139 @@
+"""
+User statistics (total / active / verified / per role) served from a Redis hash.
+
+The hash is built from one conditional-aggregation query over users, kept up to
+date incrementally by the User signals and rebuilt by the reconcile_user_statistics
+beat task, which also repairs drift from queryset updates that bypass signals.
+"""
+from collections import Counter
+import logging
+import threading
+
+import redis
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import Count, Q
+from django.dispatch import receiver
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+STATISTICS_KEY = 'users:statistics'
+COUNTED_FIELDS = User.COUNTED_FIELDS
+
+# Only increment an existing hash: before the first rebuild the counters are unknown
+INCREMENT_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+_redis = None
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                _redis = redis.Redis.from_url(settings.REDIS_CACHE_URL)
+    return _redis
+
+
+@receiver(setting_changed)
+def reset_redis(setting, **kwargs):
+    global _redis
+    if setting == 'REDIS_CACHE_URL':
+        with _redis_lock:
+            _redis = None
+
+
+def counter_names():
+    return ['total', 'active', 'verified'] + [f'role_{role}' for role, _ in User.USER_ROLES]
+
+
+def counted_in(role, is_active, is_verified):
+    """
+    Counters a user with these values contributes to
+    """
+    names = ['total', f'role_{role}']
+    if is_active:
+        names.append('active')
+    if is_verified:
+        names.append('verified')
+    return names
+
+
+def compute_user_statistics():
+    """
+    Every counter from a single scan of users
+    """
+    aggregates = {
+        'total': Count('pk'),
+        'active': Count('pk', filter=Q(is_active=True)),
+        'verified': Count('pk', filter=Q(is_verified=True)),
+    }
+    for role, _ in User.USER_ROLES:
+        aggregates[f'role_{role}'] = Count('pk', filter=Q(role=role))
+    return User.objects.aggregate(**aggregates)
+
+
+def format_user_statistics(counters):
+    return {
+        'total_users': counters['total'],
+        'active_users': counters['active'],
+        'verified_users': counters['verified'],
+        'role_statistics': {role: counters[f'role_{role}'] for role, _ in User.USER_ROLES},
+    }
+
+
+def rebuild_user_statistics():
+    counters = compute_user_statistics()
+    pipeline = get_redis().pipeline(transaction=True)
+    pipeline.delete(STATISTICS_KEY)
+    pipeline.hset(STATISTICS_KEY, mapping=counters)
+    pipeline.execute()
+    return counters
+
+
+def get_user_statistics():
+    """
+    Statistics from the Redis hash (one HGETALL), rebuilt from the database when missing
+    """
+    try:
+        cached = get_redis().hgetall(STATISTICS_KEY)
+        counters = {name.decode(): int(value) for name, value in cached.items()}
+        if not set(counter_names()) <= counters.keys():
+            counters = rebuild_user_statistics()
+    except redis.RedisError:
+        logger.warning("Redis unavailable, computing user statistics from the database", exc_info=True)
+        counters = compute_user_statistics()
+    return format_user_statistics(counters)
+
+
+def statistics_deltas(before=None, after=None):
+    """
+    before / after: (role, is_active, is_verified) of a user, None if it did not exist
+    """
+    deltas = Counter()
+    if before is not None:
+        deltas.subtract(counted_in(*before))
+    if after is not None:
+        deltas.update(counted_in(*after))
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def apply_statistics_deltas(deltas):
+    if not deltas:
+        return
+    arguments = [value for name, delta in deltas.items() for value in (name, delta)]
+    try:
+        get_redis().eval(INCREMENT_SCRIPT, 1, STATISTICS_KEY, *arguments)
+    except redis.RedisError:
+        # The next reconciliation corrects the counters
+        logger.warning("Could not update user statistics in Redis", exc_info=True)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework_simplejwt.settings import api_settings
+from .dashboard import invalidate_dashboard, invalidate_dashboards
+from .models import User, UserSession
+from .statistics import STATISTICS_KEY, get_redis, rebuild_user_statistics
+from .tokens import blacklist_jti
+import codecs
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def record_login(user_id, logged_in_at, ip_address, user_agent, device_info, session_key):
+    """
+    Persist login bookkeeping outside the request path: one UPDATE of the two
+    last-login columns, one INSERT of the session record and the active session limit
+    """
+    logged_in_at = parse_datetime(logged_in_at)
+    
+    # Tasks may run out of order during a login storm, never move last_login backwards
+    User.objects.filter(
+        Q(last_login__isnull=True) | Q(last_login__lt=logged_in_at),
+        pk=user_id,
+    ).update(last_login=logged_in_at, last_login_ip=ip_address)
+    
+    UserSession.objects.create(
+        user_id=user_id,
+        session_key=session_key,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        device_info=device_info,
+    )
+    
+    enforce_active_session_limit(user_id)
+    invalidate_dashboard(user_id)
+
+
+def enforce_active_session_limit(user_id):
+    """
+    Sign out the least recently active sessions beyond MAX_ACTIVE_SESSIONS_PER_USER:
+    deactivate them and blacklist their refresh tokens
+    """
+    limit = settings.MAX_ACTIVE_SESSIONS_PER_USER
+    if not limit:
+        return
+    
+    evicted = list(
+        UserSession.objects.filter(user_id=user_id, is_active=True)
+        .order_by('-last_activity')
+        .values_list('id', 'session_key')[limit:]
+    )
+    if not evicted:
+        return
+    
+    UserSession.objects.filter(id__in=[session_id for session_id, _ in evicted]).update(is_active=False)
+    # The session key of a JWT login is the JTI of its current refresh token
+    ttl = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    for _, session_key in evicted:
+        blacklist_jti(session_key, ttl)
+
+
+@shared_task(ignore_result=True)
+def record_token_refresh(old_jti, new_jti, refreshed_at, user_id=None):
+    """
+    Follow refresh token rotation: the session is now identified by the new
+    token's JTI and was active at refreshed_at
+    """
+    UserSession.objects.filter(session_key=old_jti).update(
+        session_key=new_jti,
+        last_activity=parse_datetime(refreshed_at),
+    )
+    if user_id is not None:
+        invalidate_dashboard(user_id)
+
+
+@shared_task(ignore_result=True)
+def purge_user_sessions(max_batches=100):
+    """
+    Delete sessions idle for longer than SESSION_RETENTION_DAYS (Celery beat),
+    SESSION_PURGE_BATCH_SIZE rows per DELETE so no statement holds locks or
+    fills the WAL for long. Returns the number of deleted sessions.
+    """
+    # Never delete a session whose refresh token could still be used
+    retention = max(timedelta(days=settings.SESSION_RETENTION_DAYS), api_settings.REFRESH_TOKEN_LIFETIME)
+    expired = UserSession.objects.filter(last_activity__lt=timezone.now() - retention).order_by('last_activity')
+    
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = list(expired.values_list('id', 'user_id')[:settings.SESSION_PURGE_BATCH_SIZE])
+        if not batch:
+            break
+        deleted += UserSession.objects.filter(id__in=[session_id for session_id, _ in batch]).delete()[0]
+        invalidate_dashboards(user_id for _, user_id in batch)
+        batches += 1
+    
+    if deleted:
+        logger.info("Purged %s expired user sessions", deleted)
+    return deleted
+
+
+@shared_task(ignore_result=True)
+def reconcile_user_statistics():
+    """
+    Rebuild the Redis statistics counters from the users table (Celery beat),
+    correcting drift from bulk updates and lost increments
+    """
+    previous = get_redis().hgetall(STATISTICS_KEY)
+    counters = rebuild_user_statistics()
+    drift = {
+        name: value - int(previous[name.encode()])
+        for name, value in counters.items()
+        if name.encode() in previous and int(previous[name.encode()]) != value
+    }
+    if drift:
+        logger.info("Corrected user statistics drift: %s", drift)
+
+
+@shared_task(ignore_result=True)
+def import_user_file(job_id, path, file_format):
+    """
+    Import a file uploaded to POST /manage/import/ from the default storage, then
+    delete it. The outcome goes to the job's cache entry: the counts and the first
+    BULK_IMPORT_MAX_ERRORS rejected rows.
+    """
+    # Not at the top: users.bulk_import imports users.serializers, which imports this module
+    from .bulk_import import UserImporter, read_rows, set_import_job
+    
+    errors = []
+    
+    def on_error(number, row_errors):
+        if len(errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            errors.append({'row': number, 'errors': row_errors})
+    
+    importer = UserImporter(on_error=on_error)
+    set_import_job(job_id, status='running')
+    try:
+        with default_storage.open(path, 'rb') as upload:
+            importer.run(read_rows(codecs.iterdecode(upload, 'utf-8-sig'), file_format))
+    except UnicodeDecodeError:
+        # The chunks before the undecodable line are committed
+        set_import_job(job_id, status='failed', error='The file is not UTF-8 text.',
+                       created=importer.created, failed=importer.failed, errors=errors)
+        return
+    except Exception:
+        set_import_job(job_id, status='failed', error='The import failed.',
+                       created=importer.created, failed=importer.failed, errors=errors)
+        raise
+    finally:
+        default_storage.delete(path)
+    
+    set_import_job(job_id, status='finished', created=importer.created, failed=importer.failed, errors=errors)
+    logger.info("Bulk import %s: %s created, %s failed", job_id, importer.created, importer.failed)
+
+
+def queue_or_run(task, **kwargs):
+    """
+    Send the task to the Celery worker, running it inline only if the broker is unreachable
+    """
+    try:
+        task.delay(**kwargs)
+    except Exception:
+        logger.warning("Celery broker unavailable, running %s inline", task.name, exc_info=True)
+        task(**kwargs)
+
+
+def queue_login_bookkeeping(**kwargs):
+    queue_or_run(record_login, **kwargs)
@@ -0,0 +1,162 @@
+"""
+Test helpers: an isolated Redis cache and per-request query budgets.
+
+RedisTestRunner (TEST_RUNNER) runs the suite with the cache and the statistics
+hash on REDIS_TEST_CACHE_URL; RedisTestCase empties that database before and
+after every test, so no test sees the keys of another or of a running service.
+
+QueryBudgetMixin.assertMaxQueries fails when the block issues more queries than
+its budget and lists the captured SQL; url_names() gives every named route of a
+URLconf so that a test can require a budget for each endpoint.
+
+hot_session_queries() lists the per-user UserSession queries with the index each
+must scan, checked by QueryPlanTests and, on millions of rows, check_session_plans.
+"""
+from contextlib import contextmanager
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import TestCase
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from .models import User, UserSession
+from .statistics import get_redis
+
+
+def flush_test_cache():
+    """
+    Empty the test Redis database; refused unless RedisTestRunner put the cache there
+    """
+    if settings.REDIS_CACHE_URL != settings.REDIS_TEST_CACHE_URL:
+        raise ImproperlyConfigured(
+            f'The cache is not on REDIS_TEST_CACHE_URL, not flushing {settings.REDIS_CACHE_URL}: '
+            'run the tests with users.testing.RedisTestRunner'
+        )
+    get_redis().flushdb()
+
+
+class RedisTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner with the cache on REDIS_TEST_CACHE_URL, emptied before and after the run
+    """
+    
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        url = settings.REDIS_TEST_CACHE_URL
+        if url == settings.REDIS_CACHE_URL:
+            raise ImproperlyConfigured('REDIS_TEST_CACHE_URL must not be the REDIS_CACHE_URL of the service')
+        self.redis_settings = override_settings(
+            REDIS_CACHE_URL=url,
+            CACHES={**settings.CACHES, 'default': {**settings.CACHES['default'], 'LOCATION': url}},
+        )
+        self.redis_settings.enable()
+        flush_test_cache()
+    
+    def teardown_test_environment(self, **kwargs):
+        flush_test_cache()
+        self.redis_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class RedisTestCase(TestCase):
+    """
+    TestCase starting and ending every test with an empty test Redis database
+    """
+    
+    def _pre_setup(self):
+        super()._pre_setup()
+        flush_test_cache()
+    
+    def _post_teardown(self):
+        flush_test_cache()
+        super()._post_teardown()
+
+
+def url_names(urlconf):
+    """
+    Names of every named route in urlconf, included URLconfs (routers) as well
+    """
+    names = set()
+    
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.add(pattern.name)
+    
+    walk(get_resolver(urlconf).url_patterns)
+    return names
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin: `with self.assertMaxQueries(budget, label):`
+    """
+    
+    @contextmanager
+    def assertMaxQueries(self, budget, label=''):
+        context = CaptureQueriesContext(connection)
+        with context:
+            yield context
+        if len(context) > budget:
+            queries = '\n'.join(f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1))
+            self.fail(f"{label}: {len(context)} queries, budget {budget}\n{queries}")
+
+
+def hot_session_queries(user_id):
+    """
+    (name, queryset, index it must use) for the per-user UserSession queries
+    """
+    return [
+        ('dashboard session counts', User.objects.annotate(
+            total_sessions=Count('sessions'),
+            active_sessions=Count('sessions', filter=Q(sessions__is_active=True)),
+        ).filter(pk=user_id), 'sessions_user_activity_idx'),
+        ('dashboard recent sessions', UserSession.objects.filter(
+            user_id=user_id, is_active=True,
+        ).order_by('-last_activity')[:5], 'sessions_user_active_idx'),
+        # The rows UserLogoutView's UPDATE ... SET is_active = false selects
+        ('logout', UserSession.objects.filter(
+            user_id=user_id, is_active=True,
+        ).only('id').order_by(), 'sessions_user_active_idx'),
+        ('session list page', UserSession.objects.filter(
+            user_id=user_id,
+        ).order_by('-last_activity', '-id')[:21], 'sessions_user_activity_idx'),
+    ]
+
+
+def scans_index(plan, index):
+    """
+    Whether an EXPLAIN plan reads user_sessions through index, never sequentially
+    """
+    # "Index [Only] Scan using <index>" or "Bitmap Index Scan on <index>"
+    uses_index = re.search(rf'(using|index scan on) {index}\b', plan, re.IGNORECASE)
+    return bool(uses_index) and 'Seq Scan on user_sessions' not in plan
+
+
+def seed_sessions(user_ids, sessions, prefix, active_every=10, chunk=1000000):
+    """
+    INSERT sessions spread over user_ids, one active out of active_every, one second
+    of last_activity apart; then ANALYZE so the planner sees the new distribution
+    """
+    with connection.cursor() as cursor:
+        for first in range(0, sessions, chunk):
+            cursor.execute(
+                """
+                INSERT INTO user_sessions
+                    (user_id, session_key, ip_address, user_agent, device_info, location,
+                     is_active, created_at, last_activity)
+                SELECT (%s::uuid[])[1 + i %% %s], %s || i, '127.0.0.1', 'seed_sessions', 'Desktop', '',
+                       (i / %s) %% %s = 0, now() - i * interval '1 second', now() - i * interval '1 second'
+                FROM generate_series(%s, %s) AS i
+                """,
+                [user_ids, len(user_ids), f'{prefix}-', len(user_ids), active_every,
+                 first, min(first + chunk, sessions) - 1],
+            )
+        cursor.execute('ANALYZE users')
+        cursor.execute('ANALYZE user_sessions')
@@ -1,3 +1,1338 @@
-from django.test import TestCase
+import csv
+import datetime
+import decimal
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.contrib.admin.sites import site
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import ClaimsTokenUser, StatelessJWTAuthentication
+from .bulk_import import (
+    get_hashing_executor, import_users, new_hashing_executor, read_rows, set_import_job,
+)
+from .dashboard import dashboard_cache_key
+from .hashers import HashingPool, PasswordHashingBusy, get_hashing_pool
+from .models import User, UserProfile, UserSession
+from .permissions import (
+    IsAdmin, IsAdminOrReadOnly, IsDoctorOrAdmin, IsOwnerOrReadOnly, IsPatientOrAdmin, IsVerifiedUser,
+)
+from .renderers import ORJSONRenderer
+from .representation import PrecompiledRepresentationMixin
+from .statistics import (
+    STATISTICS_KEY, compute_user_statistics, get_redis, get_user_statistics, rebuild_user_statistics,
+)
+from .search import search_users
+from .serializers import (
+    ExtendedUserProfileSerializer, UserListProfileSerializer, UserListSerializer,
+    UserProfileDetailSerializer, UserProfileSerializer, UserSessionSerializer,
+)
+from .testing import QueryBudgetMixin, RedisTestCase, hot_session_queries, scans_index, seed_sessions, url_names
+from .tasks import (
+    enforce_active_session_limit, purge_user_sessions, reconcile_user_statistics, record_login, record_token_refresh,
+)
+from .tokens import UserRefreshToken, blacklist_cache_key, revoke_user_tokens, token_version_cache_key
+
+
+class UserRegistrationTests(RedisTestCase):
+    """
+    Registration: one transaction, no pre-check queries, one INSERT per row
+    """
+    
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.url = reverse('user-register')
+        self.data = {
+            'username': 'an.nguyen',
+            'email': 'an.nguyen@example.com',
+            'password': 'Xk9#mQ2!vLp4',
+            'password_confirm': 'Xk9#mQ2!vLp4',
+            'first_name': 'An',
+            'last_name': 'Nguyễn',
+        }
+    
+    def test_register_queries(self):
+        # SAVEPOINT, INSERT users, INSERT user_profiles, RELEASE SAVEPOINT
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, self.data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(email=self.data['email'])
+        self.assertTrue(user.check_password(self.data['password']))
+        self.assertEqual(UserProfile.objects.filter(user=user).count(), 1)
+    
+    def test_register_duplicate_email(self):
+        self.client.post(self.url, self.data, format='json')
+        
+        response = self.client.post(self.url, {**self.data, 'username': 'an.nguyen2'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+        self.assertEqual(User.objects.count(), 1)
+    
+    def test_register_duplicate_username(self):
+        self.client.post(self.url, self.data, format='json')
+        
+        response = self.client.post(self.url, {**self.data, 'email': 'an.nguyen2@example.com'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', response.data)
+        self.assertEqual(User.objects.count(), 1)
+    
+    def test_register_invalid_username(self):
+        response = self.client.post(self.url, {**self.data, 'username': 'an nguyen!'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', response.data)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['users.hashers.ConfigurablePBKDF2PasswordHasher'], PBKDF2_ITERATIONS=1000,
+    PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_MAX_PENDING=1,
+)
+class HashingPoolTests(RedisTestCase):
+    """
+    Password hashes run on the bounded pool; callers beyond the queue limit get 503
+    """
+    
+    def run_blocked(self, pool, release, started=None):
+        # A pool call that holds its worker until release is set
+        def hold():
+            if started is not None:
+                started.set()
+            release.wait(5)
+            return threading.current_thread().name
+        results = []
+        thread = threading.Thread(target=lambda: results.append(pool.run(hold)))
+        thread.start()
+        return thread, results
+    
+    def wait_for_queue(self, pool, size):
+        deadline = time.monotonic() + 5
+        while pool.executor._work_queue.qsize() != size:
+            self.assertLess(time.monotonic(), deadline, 'pool queue never filled')
+            time.sleep(0.001)
+    
+    def test_encode_and_verify_on_pool(self):
+        threads = []
+        pbkdf2_encode = PBKDF2PasswordHasher.encode
+        
+        def encode(hasher, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return pbkdf2_encode(hasher, *args, **kwargs)
+        
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', encode):
+            encoded = make_password('Xk9#mQ2!vLp4')
+            self.assertTrue(check_password('Xk9#mQ2!vLp4', encoded))
+            self.assertFalse(check_password('wrong password', encoded))
+        
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        # make_password, then PBKDF2 verify's own encode twice, inline on the pool thread
+        # (with one worker a nested submit would deadlock)
+        self.assertEqual(len(threads), 3)
+        self.assertTrue(all(name.startswith('password-hashing') for name in threads), threads)
+        self.assertIsNot(get_hashing_pool().run(threading.current_thread), threading.current_thread())
+    
+    def test_saturated_pool_rejects(self):
+        pool = HashingPool(workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        release, started = threading.Event(), threading.Event()
+        running, running_results = self.run_blocked(pool, release, started)
+        started.wait(5)
+        queued, queued_results = self.run_blocked(pool, release)
+        self.wait_for_queue(pool, 1)
+        
+        # One hash running and max_pending=1 queued: the next caller is turned away
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(str)
+        
+        release.set()
+        running.join(5)
+        queued.join(5)
+        self.assertEqual(len(running_results + queued_results), 2)
+        self.assertEqual(pool.run(str, 42), '42')
+    
+    def test_running_hashes_do_not_count_as_pending(self):
+        pool = HashingPool(workers=2, max_pending=0)
+        self.addCleanup(pool.shutdown)
+        release, started = threading.Event(), [threading.Event(), threading.Event()]
+        threads = [self.run_blocked(pool, release, event)[0] for event in started]
+        for event in started:
+            self.assertTrue(event.wait(5))
+        
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(str)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+    
+    def test_without_workers_hashes_inline(self):
+        pool = HashingPool(workers=0, max_pending=0)
+        
+        self.assertIs(pool.run(threading.current_thread), threading.current_thread())
+    
+    def test_login_when_busy(self):
+        User.objects.create_user(
+            username='an.nguyen', email='an.nguyen@example.com', password='Xk9#mQ2!vLp4',
+            first_name='An', last_name='Nguyễn',
+        )
+        
+        with mock.patch.object(HashingPool, 'run', side_effect=PasswordHashingBusy):
+            response = APIClient(HTTP_HOST='localhost').post(reverse('user-login'), {
+                'email': 'an.nguyen@example.com', 'password': 'Xk9#mQ2!vLp4',
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoginBookkeepingTests(RedisTestCase):
+    """
+    POST /login/ queues record_login: last login columns, the session row keyed by the
+    refresh token's JTI; inline when the broker is unreachable
+    """
+    PASSWORD = 'Xk9#mQ2!vLp4'
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='khoa.bui', email='khoa.bui@example.com', password=self.PASSWORD,
+            first_name='Khoa', last_name='Bùi',
+        )
+        self.client = APIClient(HTTP_HOST='localhost')
+    
+    def run_eagerly(self, task):
+        # As a worker would, but before the response is sent
+        return mock.patch.object(task, 'delay', side_effect=lambda **kwargs: task.apply(kwargs=kwargs, throw=True))
+    
+    def login(self):
+        response = self.client.post(reverse('user-login'), {
+            'email': self.user.email, 'password': self.PASSWORD,
+        }, format='json', REMOTE_ADDR='10.1.2.3')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+    
+    def test_login_writes_two_columns_and_the_session(self):
+        with self.run_eagerly(record_login), CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        
+        writes = [query['sql'] for query in queries.captured_queries if not query['sql'].startswith('SELECT')]
+        updates = [sql for sql in writes if sql.startswith('UPDATE')]
+        self.assertEqual(len(updates), 1, writes)
+        self.assertRegex(updates[0], r'^UPDATE "users" SET "last_login" = .*, "last_login_ip" = \S+ WHERE')
+        self.assertFalse([sql for sql in writes if 'user_profiles' in sql], writes)
+        
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.last_login_ip, '10.1.2.3')
+        self.assertIsNotNone(user.last_login)
+        session = UserSession.objects.get(user=self.user)
+        self.assertEqual(session.session_key, RefreshToken(response.data['tokens']['refresh'])['jti'])
+        self.assertEqual(session.ip_address, '10.1.2.3')
+    
+    def test_session_keyed_by_refresh_jti_with_a_django_session(self):
+        # A browser logged into the admin sends the same Django session cookie with every login
+        self.client.force_login(self.user)
+        
+        with self.run_eagerly(record_login):
+            first, second = self.login(), self.login()
+        
+        jtis = {RefreshToken(response.data['tokens']['refresh'])['jti'] for response in (first, second)}
+        self.assertEqual(len(jtis), 2)
+        self.assertEqual(set(UserSession.objects.filter(user=self.user).values_list('session_key', flat=True)), jtis)
+        
+        # Token refresh finds the row by the JTI it rotates
+        with self.run_eagerly(record_token_refresh):
+            response = self.client.post(reverse('token-refresh'), {'refresh': first.data['tokens']['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(UserSession.objects.filter(session_key=RefreshToken(response.data['refresh'])['jti']).exists())
+    
+    def test_last_login_never_moves_backwards(self):
+        latest = timezone.now()
+        record_login(str(self.user.pk), latest.isoformat(), '10.0.0.2', 'Mozilla/5.0', 'Desktop', 'jti-latest')
+        # A task of an earlier login that ran late
+        record_login(
+            str(self.user.pk), (latest - datetime.timedelta(minutes=5)).isoformat(),
+            '10.0.0.1', 'Mozilla/5.0', 'Desktop', 'jti-earlier',
+        )
+        
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((user.last_login, user.last_login_ip), (latest, '10.0.0.2'))
+        # Its session is still recorded
+        self.assertEqual(UserSession.objects.filter(user=self.user).count(), 2)
+    
+    def test_runs_inline_when_the_broker_is_unreachable(self):
+        with mock.patch.object(record_login, 'delay', side_effect=ConnectionRefusedError) as delay:
+            response = self.login()
+        
+        delay.assert_called_once()
+        self.assertEqual(User.objects.get(pk=self.user.pk).last_login_ip, '10.1.2.3')
+        self.assertEqual(
+            UserSession.objects.get(user=self.user).session_key,
+            RefreshToken(response.data['tokens']['refresh'])['jti'],
+        )
+
+
+class StatelessAuthenticationTests(RedisTestCase):
+    """
+    Access tokens authenticate from their claims; revoking bumps token_version and rejects them
+    """
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=None,
+            first_name='Admin', last_name='User', role='admin', is_verified=True,
+        )
+        self.doctor = User.objects.create_user(
+            username='khoa.ly', email='khoa.ly@example.com', password=None,
+            first_name='Khoa', last_name='Lý', role='doctor',
+        )
+        for user in (self.admin, self.doctor):
+            cache.delete(token_version_cache_key(user.pk))
+        self.factory = RequestFactory()
+    
+    def get_profile(self, access):
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client.get(reverse('user-profile'))
+    
+    def assertRevoked(self, access):
+        response = self.get_profile(access)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        return response
+    
+    def authenticate(self, access):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return StatelessJWTAuthentication().authenticate(request)[0]
+    
+    def admin_save(self, user, **changes):
+        for field, value in changes.items():
+            setattr(user, field, value)
+        form = mock.Mock(changed_data=list(changes))
+        with self.captureOnCommitCallbacks(execute=True):
+            site._registry[User].save_model(self.factory.post('/admin/'), user, form, change=True)
+    
+    def test_claims_user_without_queries(self):
+        access = UserRefreshToken.for_user(self.doctor).access_token
+        self.authenticate(access)  # caches the token version
+        
+        with self.assertNumQueries(0):
+            user = self.authenticate(access)
+        
+        self.assertIsInstance(user, ClaimsTokenUser)
+        self.assertEqual((user.role, user.is_verified, user.is_active), ('doctor', False, True))
+        self.assertTrue(user.is_doctor)
+        self.assertEqual(user, self.doctor)
+    
+    def test_permissions_on_claims_user(self):
+        users = {}
+        for db_user in (self.admin, self.doctor):
+            access = UserRefreshToken.for_user(db_user).access_token
+            self.authenticate(access)
+            users[db_user.role] = self.authenticate(access)
+        
+        with self.assertNumQueries(0):
+            for method in ('get', 'post'):
+                for role, expected in (
+                    ('admin', {IsAdmin: True, IsAdminOrReadOnly: True, IsDoctorOrAdmin: True,
+                               IsPatientOrAdmin: True, IsVerifiedUser: True}),
+                    ('doctor', {IsAdmin: False, IsAdminOrReadOnly: method == 'get', IsDoctorOrAdmin: True,
+                                IsPatientOrAdmin: False, IsVerifiedUser: False}),
+                ):
+                    request = getattr(self.factory, method)('/')
+                    request.user = users[role]
+                    for permission_class, allowed in expected.items():
+                        with self.subTest(method=method, role=role, permission=permission_class.__name__):
+                            self.assertIs(permission_class().has_permission(request, None), allowed)
+            
+            request = self.factory.patch('/')
+            request.user = users['doctor']
+            self.assertTrue(IsOwnerOrReadOnly().has_object_permission(request, None, self.doctor))
+            self.assertFalse(IsOwnerOrReadOnly().has_object_permission(request, None, self.admin))
+    
+    def test_legacy_token_loads_user(self):
+        # Issued before the role / token_version claims existed
+        access = RefreshToken.for_user(self.doctor).access_token
+        
+        with self.assertNumQueries(1):
+            user = self.authenticate(access)
+        
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.pk, self.doctor.pk)
+        self.assertEqual(self.get_profile(access).status_code, status.HTTP_200_OK)
+        
+        self.doctor.is_active = False
+        self.doctor.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+    
+    def test_role_change_in_admin_revokes(self):
+        access = UserRefreshToken.for_user(self.doctor).access_token
+        self.assertEqual(self.get_profile(access).status_code, status.HTTP_200_OK)
+        
+        self.admin_save(self.doctor, role='staff')
+        
+        response = self.assertRevoked(access)
+        self.assertEqual(response.data['code'], 'token_revoked')
+        fresh = UserRefreshToken.for_user(User.objects.get(pk=self.doctor.pk)).access_token
+        self.assertEqual(self.authenticate(fresh).role, 'staff')
+    
+    def test_other_admin_changes_keep_tokens(self):
+        access = UserRefreshToken.for_user(self.doctor).access_token
+        
+        self.admin_save(self.doctor, first_name='Khôi')
+        
+        self.assertEqual(self.get_profile(access).status_code, status.HTTP_200_OK)
+    
+    def test_deactivation_revokes(self):
+        refresh = UserRefreshToken.for_user(self.doctor)
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(self.admin).access_token}')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('user-manage-deactivate-user', args=[self.doctor.pk]))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRevoked(refresh.access_token)
+        response = APIClient(HTTP_HOST='localhost').post(reverse('token-refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_revoke_user_tokens(self):
+        refresh = UserRefreshToken.for_user(self.doctor)
+        self.authenticate(refresh.access_token)  # a cached version must not outlive the revocation
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_user_tokens(self.doctor)
+        
+        self.assertEqual(self.doctor.token_version, 1)
+        self.assertRevoked(refresh.access_token)
+        response = APIClient(HTTP_HOST='localhost').post(reverse('token-refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_profile(UserRefreshToken.for_user(self.doctor).access_token).status_code, status.HTTP_200_OK)
+
+
+class TokenBlacklistTests(RedisTestCase):
+    """
+    Rotated and logged out tokens are blacklisted in Redis; without Redis tokens are refused
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='thu.ha', email='thu.ha@example.com', password=None,
+            first_name='Thu', last_name='Hà',
+        )
+        self.refresh = UserRefreshToken.for_user(self.user)
+        self.client = APIClient(HTTP_HOST='localhost')
+    
+    def refresh_token(self, refresh):
+        return self.client.post(reverse('token-refresh'), {'refresh': str(refresh)}, format='json')
+    
+    def logout(self, access, data):
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client.post(reverse('user-logout'), data, format='json')
+    
+    def get_profile(self, access):
+        client = APIClient(HTTP_HOST='localhost')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client.get(reverse('user-profile'))
+    
+    def test_rotated_token_cannot_be_reused(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data['refresh']
+        
+        self.assertEqual(self.refresh_token(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh_token(rotated).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh_token(rotated).status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_logout_then_refresh(self):
+        access = self.refresh.access_token
+        UserSession.objects.create(user=self.user, session_key=self.refresh['jti'], ip_address='127.0.0.1')
+        
+        response = self.logout(access, {'refresh_token': str(self.refresh)})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh_token(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_profile(access).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(UserSession.objects.get(user=self.user).is_active)
+    
+    def test_logout_invalid_refresh_token(self):
+        response = self.logout(self.refresh.access_token, {'refresh_token': 'not-a-token'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get_profile(self.refresh.access_token).status_code, status.HTTP_200_OK)
+    
+    def test_cache_unavailable_fails_closed(self):
+        access = self.refresh.access_token
+        UserSession.objects.create(user=self.user, session_key=self.refresh['jti'], ip_address='127.0.0.1')
+        down = redis.ConnectionError('Connection refused')
+        
+        with mock.patch.object(cache, 'get_many', side_effect=down):
+            response = self.get_profile(access)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        
+        with mock.patch.object(cache, 'add', side_effect=down):
+            self.assertEqual(self.refresh_token(self.refresh).status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            response = self.logout(access, {'refresh_token': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertTrue(UserSession.objects.get(user=self.user).is_active)
+        
+        # Nothing was blacklisted while Redis was down
+        self.assertEqual(self.refresh_token(self.refresh).status_code, status.HTTP_200_OK)
+
+
+class QueryPlanTests(RedisTestCase):
+    """
+    The per-user session queries scan their composite index (check_session_plans
+    repeats this on millions of rows)
+    """
+    
+    def setUp(self):
+        users = User.objects.bulk_create([
+            User(username=f'plan-{i}', email=f'plan-{i}@example.com', first_name='Plan', last_name=str(i))
+            for i in range(500)
+        ])
+        self.user_id = users[250].pk
+        # 40 sessions per user: one user's rows are a small fraction of the table, as in production
+        seed_sessions([user.pk for user in users], 20000, 'plan')
+        # On a table this small a sequential scan can still be cheapest: make it a last
+        # resort, as it is on the production table
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    
+    def test_hot_session_queries_use_their_index(self):
+        for name, queryset, index in hot_session_queries(self.user_id):
+            with self.subTest(query=name):
+                plan = queryset.explain(analyze=True)
+                self.assertTrue(scans_index(plan, index), f'{name}: expected a scan of {index}\n{plan}')
+
+
+class UserSessionTaskTests(RedisTestCase):
+    """
+    Expired sessions are purged in batches; logins beyond the cap sign out the oldest sessions
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='minh.tu', email='minh.tu@example.com', password=None,
+            first_name='Minh', last_name='Tú',
+        )
+    
+    def create_session(self, key, idle, is_active=True):
+        session = UserSession.objects.create(
+            user=self.user, session_key=key, ip_address='127.0.0.1', is_active=is_active,
+        )
+        # last_activity is auto_now: only an UPDATE can move it back
+        UserSession.objects.filter(pk=session.pk).update(last_activity=timezone.now() - idle)
+        return session
+    
+    def session_keys(self, **filters):
+        return set(UserSession.objects.filter(user=self.user, **filters).values_list('session_key', flat=True))
+    
+    @override_settings(SESSION_RETENTION_DAYS=30, SESSION_PURGE_BATCH_SIZE=2)
+    def test_purge_deletes_only_expired_sessions(self):
+        for i in range(5):
+            self.create_session(f'expired-{i}', datetime.timedelta(days=31 + i), is_active=bool(i % 2))
+        self.create_session('recent', datetime.timedelta(days=1))
+        self.create_session('retained', datetime.timedelta(days=29))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(purge_user_sessions(max_batches=1), 2)
+        # The two oldest went first
+        self.assertEqual(self.session_keys(session_key__in=['expired-3', 'expired-4']), set())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(purge_user_sessions(), 3)
+        self.assertEqual(self.session_keys(), {'recent', 'retained'})
+        self.assertEqual(purge_user_sessions(), 0)
+    
+    @override_settings(SESSION_RETENTION_DAYS=1)
+    def test_purge_keeps_sessions_with_usable_refresh_tokens(self):
+        # Retention is never shorter than REFRESH_TOKEN_LIFETIME (7 days)
+        self.create_session('refreshable', datetime.timedelta(days=6))
+        self.create_session('expired', datetime.timedelta(days=8))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(purge_user_sessions(), 1)
+        
+        self.assertEqual(self.session_keys(), {'refreshable'})
+    
+    @override_settings(MAX_ACTIVE_SESSIONS_PER_USER=3)
+    def test_session_limit_signs_out_least_recently_active(self):
+        for i in range(5):
+            self.create_session(f'session-{i}', datetime.timedelta(hours=i))
+        self.create_session('signed-out', datetime.timedelta(minutes=30), is_active=False)
+        
+        enforce_active_session_limit(self.user.pk)
+        
+        self.assertEqual(self.session_keys(is_active=True), {'session-0', 'session-1', 'session-2'})
+        self.assertEqual(self.session_keys(is_active=False), {'session-3', 'session-4', 'signed-out'})
+        self.assertIsNotNone(cache.get(blacklist_cache_key('session-3')))
+        self.assertIsNotNone(cache.get(blacklist_cache_key('session-4')))
+        self.assertIsNone(cache.get(blacklist_cache_key('session-2')))
+        self.assertIsNone(cache.get(blacklist_cache_key('signed-out')))
+    
+    @override_settings(MAX_ACTIVE_SESSIONS_PER_USER=0)
+    def test_session_limit_disabled(self):
+        for i in range(3):
+            self.create_session(f'unlimited-{i}', datetime.timedelta(hours=i))
+        
+        with self.assertNumQueries(0):
+            enforce_active_session_limit(self.user.pk)
+        
+        self.assertEqual(len(self.session_keys(is_active=True)), 3)
+
+
+class DashboardETagTests(RedisTestCase):
+    """
+    GET /dashboard/ answers a matching If-None-Match with 304; changes give a new ETag
+    """
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='lan.anh', email='lan.anh@example.com', password=None,
+            first_name='Lan', last_name='Anh',
+        )
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.client.force_authenticate(self.user)
+    
+    def get_dashboard(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(reverse('user-dashboard'), **headers)
+    
+    def test_if_none_match_returns_304(self):
+        response = self.get_dashboard()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        # Served from the cache entry without a query
+        with self.assertNumQueries(0):
+            response = self.get_dashboard(etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        
+        self.assertEqual(self.get_dashboard(f'"stale", W/{etag}').status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.get_dashboard('*').status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.get_dashboard('"stale"').status_code, status.HTTP_200_OK)
+    
+    def test_user_change_produces_new_etag(self):
+        etag = self.get_dashboard()['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Ngọc'
+            self.user.save()
+        response = self.get_dashboard(etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['user']['first_name'], 'Ngọc')
+        etag = response['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            UserSession.objects.create(user=self.user, session_key='dashboard-session', ip_address='127.0.0.1')
+        response = self.get_dashboard(etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['active_sessions'], 1)
+    
+    def test_rebuilt_unchanged_dashboard_keeps_etag(self):
+        etag = self.get_dashboard()['ETag']
+        cache.delete(dashboard_cache_key(self.user.pk))
+        
+        response = self.get_dashboard(etag)
+        
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class UserStatisticsCounterTests(RedisTestCase):
+    """
+    The Redis statistics hash follows user saves and deletes without re-reading the row
+    """
+    
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='quang.ta', email='quang.ta@example.com', password=None,
+            first_name='Quang', last_name='Tạ', role='doctor',
+        )
+        rebuild_user_statistics()
+    
+    def counters(self):
+        return {name.decode(): int(value) for name, value in get_redis().hgetall(STATISTICS_KEY).items()}
+    
+    def assertCountersMatchDatabase(self):
+        self.assertEqual(self.counters(), compute_user_statistics())
+    
+    def test_create_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = User.objects.create_user(
+                username='ngoc.mac', email='ngoc.mac@example.com', password=None,
+                first_name='Ngọc', last_name='Mạc', is_verified=True,
+            )
+        counters = self.counters()
+        self.assertEqual((counters['total'], counters['role_patient'], counters['verified']), (2, 1, 1))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.delete()
+        self.assertCountersMatchDatabase()
+        self.assertEqual(self.counters()['role_patient'], 0)
+    
+    def test_update_without_reading_the_row(self):
+        user = User.objects.get(pk=self.doctor.pk)
+        user.role = 'staff'
+        user.is_active = False
+        
+        # The UPDATE only: the stored values come from the loaded instance
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            user.save()
+        
+        counters = self.counters()
+        self.assertEqual((counters['role_doctor'], counters['role_staff'], counters['active']), (0, 1, 0))
+        self.assertCountersMatchDatabase()
+        
+        # A second save of the same instance starts from what the first one stored
+        user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['is_active'])
+        self.assertEqual(self.counters()['active'], 1)
+        self.assertCountersMatchDatabase()
+    
+    def test_unrelated_update_fields(self):
+        user = User.objects.get(pk=self.doctor.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user.first_name = 'Quân'
+            user.save(update_fields=['first_name'])
+        
+        self.assertEqual(len(callbacks), 1)  # the dashboard invalidation only
+        self.assertCountersMatchDatabase()
+    
+    def test_deferred_and_unloaded_instances(self):
+        user = User.objects.only('email').get(pk=self.doctor.pk)
+        user.is_verified = True
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=['is_verified'])
+        self.assertEqual(self.counters()['verified'], 1)
+        
+        user = User.objects.get(pk=self.doctor.pk)
+        User.objects.filter(pk=user.pk).update(role='patient')
+        user.refresh_from_db()
+        user.role = 'admin'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        
+        counters = self.counters()
+        # The queryset update left doctor counted (drift for reconciliation); refresh_from_db
+        # brought the snapshot up to date, so the save moves patient -> admin, not doctor -> admin
+        self.assertEqual((counters['role_doctor'], counters['role_patient'], counters['role_admin']), (1, -1, 1))
+    
+    def test_missing_hash_is_rebuilt(self):
+        get_redis().delete(STATISTICS_KEY)
+        
+        # One aggregate query, then the hash again
+        with self.assertNumQueries(1):
+            statistics = get_user_statistics()
+        self.assertEqual((statistics['total_users'], statistics['role_statistics']['doctor']), (1, 1))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_statistics(), statistics)
+        self.assertCountersMatchDatabase()
+    
+    def test_reconcile_fixes_drift(self):
+        # Queryset updates bypass the signals
+        User.objects.filter(pk=self.doctor.pk).update(role='patient', is_verified=True)
+        self.assertNotEqual(self.counters(), compute_user_statistics())
+        
+        reconcile_user_statistics()
+        
+        self.assertCountersMatchDatabase()
+        self.assertEqual(self.counters()['role_patient'], 1)
+
+
+@override_settings(BULK_IMPORT_HASHING_WORKERS=0, BULK_IMPORT_CHUNK_SIZE=2)
+class UserBulkImportTests(RedisTestCase):
+    """
+    Bulk import: the upload is queued as a job; valid rows are created with their
+    profile, the others reported by line in the job's state
+    """
+    
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=None,
+            first_name='Admin', last_name='User', role='admin',
+        )
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('user-manage-bulk-import')
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+    
+    def upload(self, name, content):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, content.encode())}, format='multipart')
+    
+    def run_task(self, task, **kwargs):
+        # As a worker would, but before the response is sent
+        task.apply(kwargs=kwargs, throw=True)
+    
+    def import_file(self, name, content):
+        """
+        The job's state once a worker ran it
+        """
+        with mock.patch('users.views.queue_or_run', self.run_task):
+            response = self.upload(name, content)
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(response['Location'], response.data['url'])
+        # The stored upload is deleted once imported
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'imports')), [])
+        
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_import_csv(self):
+        job = self.import_file('users.csv', (
+            'username,email,first_name,last_name,password,role\n'
+            'binh.tran,binh.tran@example.com,Bình,Trần,Xk9#mQ2!vLp4,doctor\n'
+            'chi.le,chi.le@example.com,Chi,Lê,,\n'
+            'admin2,admin@example.com,Duplicate,Email,,\n'
+            'dung.pham,not-an-email,Dũng,Phạm,,\n'
+            'em.vo,chi.le@example.com,Duplicate,In File,,\n'
+        ))
+        
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['file_name'], 'users.csv')
+        self.assertEqual(job['created'], 2)
+        self.assertEqual(job['failed'], 3)
+        errors = {error['row']: error['errors'] for error in job['errors']}
+        self.assertEqual(sorted(errors), [4, 5, 6])
+        self.assertTrue(all('email' in row_errors for row_errors in errors.values()))
+        
+        doctor = User.objects.get(email='binh.tran@example.com')
+        self.assertEqual(doctor.role, 'doctor')
+        self.assertTrue(doctor.check_password('Xk9#mQ2!vLp4'))
+        self.assertFalse(User.objects.get(email='chi.le@example.com').has_usable_password())
+        self.assertEqual(UserProfile.objects.filter(user__email__in=['binh.tran@example.com', 'chi.le@example.com']).count(), 2)
+    
+    def test_import_ndjson(self):
+        job = self.import_file('users.ndjson', (
+            '{"username": "giang.do", "email": "giang.do@example.com", "first_name": "Giang", "last_name": "Đỗ"}\n'
+            '{"username": "broken"\n'
+        ))
+        
+        self.assertEqual((job['status'], job['created'], job['failed']), ('finished', 1, 1))
+        self.assertEqual(job['errors'][0]['row'], 2)
+    
+    def test_import_not_utf8(self):
+        with mock.patch('users.views.queue_or_run', self.run_task):
+            response = self.client.post(self.url, {
+                'file': SimpleUploadedFile('latin1.csv', 'username,email,first_name,last_name\nan,an@example.com,Ân,Lê\n'.encode('latin-1')),
+            }, format='multipart')
+        job = self.client.get(response['Location']).data
+        
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'imports')), [])
+        self.assertEqual(job['error'], 'The file is not UTF-8 text.')
+    
+    def test_queued_until_a_worker_runs_it(self):
+        # The request only stores the file and queues the task
+        with mock.patch('users.views.queue_or_run') as queue, self.assertNumQueries(0):
+            response = self.upload('users.csv', 'username,email,first_name,last_name\nhai.ly,hai.ly@example.com,Hải,Lý\n')
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.client.get(response['Location']).data['status'], 'queued')
+        self.assertFalse(User.objects.filter(username='hai.ly').exists())
+        
+        self.run_task(*queue.call_args.args, **queue.call_args.kwargs)
+        
+        self.assertEqual(self.client.get(response['Location']).data['status'], 'finished')
+        self.assertTrue(User.objects.filter(username='hai.ly').exists())
+    
+    def test_workers_reuse_one_hashing_pool(self):
+        rows = lambda n: read_rows([
+            'username,email,first_name,last_name,password\n',
+            f'pool{n},pool{n}@example.com,Pool,{n},Xk9#mQ2!vLp4\n',
+        ], 'csv')
+        
+        with override_settings(BULK_IMPORT_HASHING_WORKERS=1), \
+                mock.patch('users.bulk_import.new_hashing_executor', wraps=new_hashing_executor) as new_executor:
+            self.assertEqual(import_users(rows(1))['created'], 1)
+            executor = get_hashing_executor()
+            self.assertEqual(import_users(rows(2))['created'], 1)
+            
+            self.assertIs(get_hashing_executor(), executor)
+            self.assertEqual(new_executor.call_count, 1)
+        # Changing the setting shuts the pool down
+        self.assertIsNone(get_hashing_executor())
+        self.assertTrue(User.objects.get(username='pool2').check_password('Xk9#mQ2!vLp4'))
+    
+    def test_import_requires_admin(self):
+        self.client.force_authenticate(User.objects.create_user(
+            username='patient', email='patient@example.com', password=None,
+            first_name='Patient', last_name='User',
+        ))
+        
+        response = self.upload('users.csv', 'username,email,first_name,last_name\n')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        response = self.client.get(reverse('user-manage-import-status', args=['0' * 32]))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_unknown_job(self):
+        response = self.client.get(reverse('user-manage-import-status', args=['0' * 32]))
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UserExportTests(RedisTestCase):
+    """
+    Streaming export: one query, selected columns, admins only
+    """
+    
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=None,
+            first_name='Admin', last_name='User', role='admin',
+        )
+        self.doctor = User.objects.create_user(
+            username='hoa.vu', email='hoa.vu@example.com', password=None,
+            first_name='Hoa', last_name='Vũ', role='doctor',
+        )
+        self.doctor.profile.specialization = 'Nhi khoa'
+        self.doctor.profile.save()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('user-manage-export')
+    
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+    
+    def test_export_ndjson(self):
+        # SAVEPOINT, SELECT, RELEASE SAVEPOINT
+        with self.assertNumQueries(3):
+            content = self.export(fields='email,role,specialization')
+        
+        rows = sorted((json.loads(line) for line in content.splitlines()), key=lambda row: row['email'])
+        self.assertEqual(rows, [
+            {'email': 'admin@example.com', 'role': 'admin', 'specialization': ''},
+            {'email': 'hoa.vu@example.com', 'role': 'doctor', 'specialization': 'Nhi khoa'},
+        ])
+    
+    def test_export_csv(self):
+        content = self.export(file_format='csv', fields='username,last_name,created_at', role='doctor')
+        
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows, [
+            ['username', 'last_name', 'created_at'],
+            ['hoa.vu', 'Vũ', self.doctor.created_at.isoformat()],
+        ])
+    
+    def test_export_unknown_field(self):
+        response = self.client.get(self.url, {'fields': 'email,password'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_requires_admin(self):
+        self.client.force_authenticate(self.doctor)
+        
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class KeysetPaginationTests(RedisTestCase):
+    """
+    The user list pages by (created_at, id) cursors; search results by page number
+    """
+    
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=None, role='admin',
+        )
+        User.objects.bulk_create([
+            User(username=f'keyset-{i}', email=f'keyset-{i}@example.com', first_name='Keyset')
+            for i in range(24)
+        ])
+        # Two groups of users created at the same instant: the id breaks the ties
+        created_at = timezone.now() - datetime.timedelta(days=1)
+        User.objects.filter(username__startswith='keyset-').update(created_at=created_at)
+        User.objects.filter(username__in=[f'keyset-{i}' for i in range(12)]).update(
+            created_at=created_at - datetime.timedelta(hours=1),
+        )
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('user-manage-list')
+    
+    def expected_ids(self):
+        return [str(pk) for pk in User.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+    
+    def test_cursor_pages_are_stable_under_inserts(self):
+        expected = self.expected_ids()
+        seen = []
+        url, params = self.url, {'page_size': 5}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [user['id'] for user in response.data['results']]
+            url, params = response.data['next'], None
+            # Newer users shift every offset; a cursor resumes after the last row it returned
+            User.objects.create_user(username=f'new-{len(seen)}', email=f'new-{len(seen)}@example.com', password=None)
+        
+        self.assertEqual(seen, expected)
+    
+    def test_count_only_on_request(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertNotIn('count', response.data)
+        self.assertIn('cursor=', response.data['next'])
+        
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'count': 'true'})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(list(response.data)[0], 'count')
+    
+    def test_search_pages_by_number(self):
+        response = self.client.get(self.url, {'search': 'keyset'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 24)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIn('page=2', response.data['next'])
+        
+        response = self.client.get(response.data['next'])
+        
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertIsNone(response.data['next'])
+
+
+class UserSearchTests(RedisTestCase):
+    """
+    ?search= matches names, email and username ignoring case and diacritics, through
+    the trigger-maintained search_document; trigram matching only when nothing contains it
+    """
+    
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=None, role='admin',
+        )
+        self.client.force_authenticate(self.admin)
+        self.nguyen = User.objects.create_user(
+            username='vana', email='vana@example.com', password=None,
+            first_name='Văn An', last_name='Nguyễn',
+        )
+        self.hoa = User.objects.create_user(
+            username='hoa.le', email='hoa.le@example.com', password=None,
+            first_name='Hoa', last_name='Lê',
+        )
+        self.khoa = User.objects.create_user(
+            username='khoa.tran', email='khoa.tran@example.com', password=None,
+            first_name='Khoa', last_name='Trần',
+        )
+    
+    def search(self, term):
+        return [user.pk for user in search_users(User.objects.all(), term)]
+    
+    def test_ignores_case_and_diacritics(self):
+        for term in ('nguyen van', 'NGUYỄN Văn', 'Nguyen Van An', 'vana@example'):
+            with self.subTest(term=term):
+                self.assertEqual(self.search(term), [self.nguyen.pk])
+        
+        response = self.client.get(reverse('user-manage-list'), {'search': 'nguyen van'})
+        self.assertEqual([user['id'] for user in response.data['results']], [str(self.nguyen.pk)])
+    
+    def test_trigger_maintains_search_document(self):
+        self.assertEqual(User.objects.get(pk=self.hoa.pk).search_document, 'le hoa hoa.le@example.com hoa.le')
+        
+        self.hoa.last_name = 'Đặng'
+        self.hoa.save()
+        self.assertEqual(User.objects.get(pk=self.hoa.pk).search_document, 'dang hoa hoa.le@example.com hoa.le')
+        self.assertEqual(self.search('dang hoa'), [self.hoa.pk])
+        
+        # Queryset updates of the searched columns too
+        User.objects.filter(pk=self.khoa.pk).update(email='khoa.ngo@example.com')
+        self.assertEqual(self.search('khoa.ngo'), [self.khoa.pk])
+        
+        # bulk_create from the importer sends no signals: the trigger fills the column
+        import_users(read_rows([
+            'username,email,first_name,last_name\n',
+            'thuy.vo,thuy.vo@example.com,Thúy,Võ\n',
+        ], 'csv'), workers=0)
+        self.assertEqual(self.search('vo thuy'), [User.objects.get(username='thuy.vo').pk])
+    
+    def test_trigram_fallback_only_without_substring_matches(self):
+        # A typo: nothing contains the term
+        self.assertEqual(self.search('nguyn van'), [self.nguyen.pk])
+        # 'khoa' contains 'hoa': no fallback, so no near misses either
+        self.assertEqual(set(self.search('hoa')), {self.hoa.pk, self.khoa.pk})
+        self.assertEqual(self.search('xyzxyz'), [])
+    
+    def test_best_matches_first(self):
+        # The whole word ranks above the substring of another word
+        self.assertEqual(self.search('hoa'), [self.hoa.pk, self.khoa.pk])
+    
+    def test_ties_page_in_a_total_order(self):
+        User.objects.bulk_create([
+            User(username=f'mai{i}', email=f'mai{i}@example.com', first_name='Thị Mai', last_name='Trần')
+            for i in range(25)
+        ])
+        # Same rank and the same created_at: only the id orders them
+        User.objects.filter(username__startswith='mai').update(created_at=timezone.now())
+        
+        seen = []
+        url, params = reverse('user-manage-list'), {'search': 'tran thi mai'}
+        while url:
+            response = self.client.get(url, params)
+            seen += [user['id'] for user in response.data['results']]
+            url, params = response.data['next'], None
+        
+        expected = User.objects.filter(username__startswith='mai').order_by('-id').values_list('id', flat=True)
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+
+class UserProfileUpdateTests(QueryBudgetMixin, RedisTestCase):
+    """
+    PATCH /profile/ writes the user and the extended profile once each
+    """
+    
+    def test_update_profile(self):
+        user = User.objects.create_user(
+            username='tuan.bui', email='tuan.bui@example.com', password=None,
+            first_name='Tuấn', last_name='Bùi',
+        )
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(user)
+        
+        with self.assertMaxQueries(4, 'PATCH user-profile') as queries:
+            response = client.patch(reverse('user-profile'), {
+                'address': '5 Hai Bà Trưng, Hà Nội', 'profile': {'blood_type': 'AB', 'allergies': 'Penicillin'},
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['profile']['blood_type'], 'AB')
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual((profile.blood_type, profile.allergies), ('AB', 'Penicillin'))
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "user_profiles"') for query in queries.captured_queries), 1)
+
+
+class BenchmarkGuardTests(RedisTestCase):
+    """
+    The bench_* commands write rows: they only run against settings.BENCH_DB
+    """
+    
+    @override_settings(BENCH_DB='')
+    def test_refused_without_bench_db(self):
+        with self.assertRaisesMessage(CommandError, 'Benchmarks are disabled'):
+            call_command('bench_statistics', database='userservice_bench', users=1)
+        
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+    
+    def test_refused_against_another_database(self):
+        with override_settings(BENCH_DB='userservice_bench'):
+            with self.assertRaisesMessage(CommandError, 'Refusing to run'):
+                call_command('bench_import', database='userservice_bench', rows=1)
+        # BENCH_DB names the configured database, --database another one
+        with override_settings(BENCH_DB=connection.settings_dict['NAME']):
+            with self.assertRaisesMessage(CommandError, 'Refusing to run'):
+                call_command('bench_import', database='userservice_bench', rows=1)
+        
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+    
+    def test_database_flag_is_required(self):
+        with self.assertRaisesMessage(CommandError, '--database'):
+            call_command('bench_login')
+
+
+class FastRepresentationTests(RedisTestCase):
+    """
+    Precompiled serializers and ORJSONRenderer write what DRF's would, byte for byte
+    """
+    
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='mai.dang', email='mai.dang@example.com', password=None,
+            first_name='Mai', last_name='Đặng', role='doctor', date_of_birth=datetime.date(1985, 3, 9),
+        )
+        self.doctor.last_login = timezone.now()
+        self.doctor.save()
+        self.doctor.profile.bio = 'Bác sĩ nhi\u2028khoa'
+        self.doctor.profile.years_of_experience = 12
+        self.doctor.profile.save()
+        self.patient = User.objects.create_user(
+            username='patient', email='patient@example.com', password=None,
+            first_name='Patient', last_name='User',
+        )
+        self.patient.profile.delete()
+        for i, ip_address in enumerate(('10.0.0.1', '2001:db8::1')):
+            UserSession.objects.create(user=self.doctor, session_key=f'session-{i}', ip_address=ip_address)
+    
+    def test_serializers_match_drf(self):
+        users = User.objects.select_related('profile').order_by('username')
+        for serializer_class, instances in (
+            (UserListSerializer, users),
+            (UserListProfileSerializer, users),
+            (UserProfileSerializer, users),
+            (UserProfileDetailSerializer, users),
+            (ExtendedUserProfileSerializer, UserProfile.objects.all()),
+            (UserSessionSerializer, UserSession.objects.all()),
+        ):
+            for instance in instances:
+                serializer = serializer_class(instance)
+                drf = super(PrecompiledRepresentationMixin, serializer).to_representation(instance)
+                with self.subTest(serializer=serializer_class.__name__, instance=str(instance)):
+                    self.assertEqual(JSONRenderer().render(serializer.data), JSONRenderer().render(drf))
+        
+        self.assertIsNone(UserProfileDetailSerializer(User.objects.get(pk=self.patient.pk)).data['profile'])
+    
+    def test_renderer_matches_json_renderer(self):
+        for data in (
+            UserListProfileSerializer(User.objects.all(), many=True).data,
+            {'count': 2, 'next': None, 'results': [{'id': self.doctor.pk, 'at': timezone.now(), 'ok': True}]},
+            {'floats': [0.1, -0.0, 123.456, 1e16, 1e-7], 'decimal': decimal.Decimal('1.10')},
+            {'text': 'Nguyễn\u2029"\\\x1f', 'delay': datetime.timedelta(seconds=90), 'date': datetime.date(2024, 1, 31)},
+            {1: 'non-string key'},
+            [2 ** 70],
+            'scalar',
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render({'nan': float('nan')})
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+    
+    def test_indent_uses_json_renderer(self):
+        data = {'results': [1, 2]}
+        
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(QueryBudgetMixin, RedisTestCase):
+    """
+    Most queries one request to each endpoint of users/urls.py may issue, JWT
+    authentication included. An endpoint without a budget fails the suite.
+    """
+    PASSWORD = 'Xk9#mQ2!vLp4'
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password=self.PASSWORD,
+            first_name='Admin', last_name='User', role='admin',
+        )
+        self.patient = User.objects.create_user(
+            username='lan.ho', email='lan.ho@example.com', password=self.PASSWORD,
+            first_name='Lan', last_name='Hồ',
+        )
+        for i in range(3):
+            User.objects.create_user(
+                username=f'staff{i}', email=f'staff{i}@example.com', password=None,
+                first_name='Staff', last_name=str(i), role='staff',
+            )
+        self.refresh = UserRefreshToken.for_user(self.patient)
+        UserSession.objects.create(
+            user=self.patient, session_key=self.refresh['jti'], ip_address='127.0.0.1', device_info='Desktop',
+        )
+        # The steady state: the statistics hash exists (the cold path is UserStatisticsCounterTests')
+        rebuild_user_statistics()
+    
+    def client_for(self, user=None):
+        client = APIClient(HTTP_HOST='localhost')
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {UserRefreshToken.for_user(user).access_token}')
+        return client
+    
+    def endpoint_requests(self):
+        """
+        (url name, method, budget, request) for every endpoint
+        """
+        anonymous, patient, admin = self.client_for(), self.client_for(self.patient), self.client_for(self.admin)
+        detail = reverse('user-manage-detail', args=[self.patient.pk])
+        upload = lambda: SimpleUploadedFile('users.csv', b'username,email,first_name,last_name\nmai.ly,mai.ly@example.com,Mai,Ly\n')
+        return [
+            ('api-root', 'get', 1, lambda: admin.get(reverse('api-root'))),
+            ('health-check', 'get', 0, lambda: anonymous.get(reverse('health-check'))),
+            ('user-register', 'post', 4, lambda: anonymous.post(reverse('user-register'), {
+                'username': 'new.user', 'email': 'new.user@example.com', 'password': self.PASSWORD,
+                'password_confirm': self.PASSWORD, 'first_name': 'New', 'last_name': 'User',
+            }, format='json')),
+            ('user-login', 'post', 1, lambda: anonymous.post(reverse('user-login'), {
+                'email': self.patient.email, 'password': self.PASSWORD,
+            }, format='json')),
+            ('token-refresh', 'post', 1, lambda: anonymous.post(reverse('token-refresh'), {
+                'refresh': str(self.refresh),
+            }, format='json')),
+            ('user-profile', 'get', 2, lambda: patient.get(reverse('user-profile'))),
+            ('user-profile', 'patch', 4, lambda: patient.patch(reverse('user-profile'), {
+                'address': '12 Lê Lợi, Huế', 'profile': {'blood_type': 'O+'},
+            }, format='json')),
+            ('user-sessions', 'get', 1, lambda: patient.get(reverse('user-sessions'))),
+            ('user-dashboard', 'get', 2, lambda: patient.get(reverse('user-dashboard'))),
+            ('change-password', 'post', 3, lambda: patient.post(reverse('change-password'), {
+                'old_password': self.PASSWORD, 'new_password': 'Qw7$zRt5!nBm', 'new_password_confirm': 'Qw7$zRt5!nBm',
+            }, format='json')),
+            ('user-logout', 'post', 1, lambda: self.client_for(self.patient).post(reverse('user-logout'), {
+                'refresh_token': str(self.refresh),
+            }, format='json')),
+            ('user-manage-list', 'get', 1, lambda: admin.get(reverse('user-manage-list'))),
+            ('user-manage-list', 'get', 1, lambda: admin.get(reverse('user-manage-list'), {'include': 'profile'})),
+            ('user-manage-list', 'get', 3, lambda: admin.get(reverse('user-manage-list'), {'search': 'ho'})),
+            ('user-manage-detail', 'get', 1, lambda: admin.get(detail)),
+            ('user-manage-detail', 'patch', 4, lambda: admin.patch(detail, {'address': '3 Trần Phú, Đà Nẵng'}, format='json')),
+            ('user-manage-verify-user', 'post', 3, lambda: admin.post(reverse('user-manage-verify-user', args=[self.patient.pk]))),
+            ('user-manage-deactivate-user', 'post', 5, lambda: admin.post(reverse('user-manage-deactivate-user', args=[self.patient.pk]))),
+            ('user-manage-statistics', 'get', 0, lambda: admin.get(reverse('user-manage-statistics'))),
+            # The import itself runs on a worker
+            ('user-manage-bulk-import', 'post', 0, lambda: admin.post(reverse('user-manage-bulk-import'), {'file': upload()}, format='multipart')),
+            ('user-manage-import-status', 'get', 0, lambda: admin.get(reverse('user-manage-import-status', args=[self.import_job]))),
+            ('user-manage-export', 'get', 3, lambda: b''.join(admin.get(reverse('user-manage-export')).streaming_content)),
+        ]
+    
+    def test_every_endpoint_has_a_budget(self):
+        budgeted = {name for name, _, _, _ in self.endpoint_requests()}
+        
+        self.assertEqual(url_names('users.urls') - budgeted, set())
+    
+    def test_query_budgets(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.enterContext(mock.patch('users.views.queue_or_run'))
+        self.import_job = uuid.uuid4().hex
+        set_import_job(self.import_job, status='queued')
+        
+        for name, method, budget, request in self.endpoint_requests():
+            with self.subTest(endpoint=name, method=method):
+                with self.assertMaxQueries(budget, f'{method.upper()} {name}'):
+                    response = request()
+                if hasattr(response, 'status_code'):
+                    self.assertLess(response.status_code, 400, f'{method.upper()} {name}: {response.status_code}')
@@ -0,0 +1,122 @@
+import time
+
+import redis
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import User
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION_CLAIM = 'token_version'
+USER_CLAIMS = ('role', 'is_verified', 'is_active')
+
+
+class TokenStateUnavailable(APIException):
+    """
+    Raised when Redis cannot tell whether a token is blacklisted: tokens are
+    rejected rather than accepted unchecked
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Token checks are temporarily unavailable, please retry shortly.'
+    default_code = 'token_state_unavailable'
+    # DRF's exception handler sends this as the Retry-After header
+    wait = 1
+
+
+def token_version_cache_key(user_id):
+    return f'users:token-version:{user_id}'
+
+
+def blacklist_cache_key(jti):
+    return f'users:token-blacklist:{jti}'
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the claims permission checks need; access tokens
+    created from it copy them, so authentication does not load the User row
+    """
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.add_user_claims(user)
+        return token
+    
+    def add_user_claims(self, user):
+        for claim in USER_CLAIMS:
+            self[claim] = getattr(user, claim)
+        self[TOKEN_VERSION_CLAIM] = user.token_version
+
+
+def _load_token_version(user_id):
+    return User.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+
+
+def get_token_state(user_id, jti):
+    """
+    (current token version of the user, whether the token is blacklisted), read from
+    Redis in one MGET. The version falls back to the database and is None if the
+    user does not exist. Without Redis the blacklist cannot be checked, so this
+    raises TokenStateUnavailable instead of letting logged out tokens through.
+    """
+    version_key = token_version_cache_key(user_id)
+    try:
+        values = cache.get_many([version_key, blacklist_cache_key(jti)])
+    except redis.RedisError:
+        logger.error("Cache unavailable, cannot check the token blacklist", exc_info=True)
+        raise TokenStateUnavailable()
+    
+    version = values.get(version_key)
+    if version is None:
+        version = _load_token_version(user_id)
+        if version is not None:
+            try:
+                cache.set(version_key, version, timeout=None)
+            except redis.RedisError:
+                # Read from the database again next time
+                logger.warning("Could not cache the token version", exc_info=True)
+    return version, blacklist_cache_key(jti) in values
+
+
+def blacklist_token(token):
+    """
+    Blacklist the token's JTI until the token expires (SET NX with a TTL, entries
+    expire on their own). Returns False if it was already blacklisted.
+    """
+    ttl = int(token['exp'] - time.time())
+    if ttl <= 0:
+        return True
+    return blacklist_jti(token[api_settings.JTI_CLAIM], ttl)
+
+
+def blacklist_jti(jti, ttl):
+    try:
+        return cache.add(blacklist_cache_key(jti), 1, timeout=ttl)
+    except redis.RedisError:
+        logger.error("Cache unavailable, cannot blacklist token %s", jti, exc_info=True)
+        raise TokenStateUnavailable()
+
+
+def is_token_blacklisted(token):
+    try:
+        return cache.get(blacklist_cache_key(token[api_settings.JTI_CLAIM])) is not None
+    except redis.RedisError:
+        logger.error("Cache unavailable, cannot check the token blacklist", exc_info=True)
+        raise TokenStateUnavailable()
+
+
+def revoke_user_tokens(user):
+    """
+    Invalidate every access and refresh token issued to the user so far
+    """
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.refresh_from_db(fields=['token_version'])
+    # Drop the cached version once the new one is visible to other connections
+    transaction.on_commit(lambda: cache.delete(token_version_cache_key(user.pk)))
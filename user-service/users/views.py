@@ -4,20 +4,37 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.reverse import reverse
+from rest_framework.parsers import MultiPartParser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import login, logout
+from django.core.files.storage import default_storage
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.http import parse_etags
 from .models import User, UserProfile, UserSession
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     UserProfileDetailSerializer, ExtendedUserProfileSerializer,
-    ChangePasswordSerializer, UserSessionSerializer, UserListSerializer
+    ChangePasswordSerializer, UserSessionSerializer, UserListSerializer, UserListProfileSerializer
 )
-from .permissions import IsOwnerOrReadOnly, IsAdminOrReadOnly
+from .bulk_import import FORMATS, detect_format, get_import_job, set_import_job
+from .dashboard import get_dashboard, invalidate_dashboard
+from .export import FORMATS as EXPORT_FORMATS, export_rows, parse_fields, render_export
+from .pagination import UserPagination, UserSessionPagination
+from .permissions import IsOwnerOrReadOnly, IsAdmin, IsAdminOrReadOnly
+from .tasks import import_user_file, queue_login_bookkeeping, queue_or_run
+from .search import search_users
+from .statistics import get_user_statistics
+from .tokens import UserRefreshToken, blacklist_token, revoke_user_tokens
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +51,7 @@ class UserRegistrationView(APIView):
             user = serializer.save()
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             access_token = refresh.access_token
             
             # Log registration
@@ -64,16 +81,14 @@ class UserLoginView(TokenObtainPairView):
             user = serializer.validated_data['user']
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             access_token = refresh.access_token
             
-            # Update last login
+            # Bookkeeping (last login, session record) is written by a Celery task;
+            # only the in-memory instance is updated so the response shows the new values
             user.last_login = timezone.now()
             user.last_login_ip = self.get_client_ip(request)
-            user.save()
-            
-            # Create session record
-            self.create_user_session(request, user)
+            self.record_login(request, user, refresh)
             
             # Log login
             logger.info(f"User logged in: {user.email}")
@@ -97,16 +112,18 @@ class UserLoginView(TokenObtainPairView):
             ip = request.META.get('REMOTE_ADDR')
         return ip
     
-    def create_user_session(self, request, user):
-        ip_address = self.get_client_ip(request)
+    def record_login(self, request, user, refresh):
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        UserSession.objects.create(
-            user=user,
-            session_key=request.session.session_key or '',
-            ip_address=ip_address,
+        queue_login_bookkeeping(
+            user_id=str(user.pk),
+            logged_in_at=user.last_login.isoformat(),
+            ip_address=user.last_login_ip,
             user_agent=user_agent,
             device_info=self.get_device_info(user_agent),
+            # The refresh token's JTI identifies the session: token refresh follows it through rotation
+            # and the session limit blacklists it. A Django session key is shared by a browser's logins
+            session_key=refresh[api_settings.JTI_CLAIM],
         )
     
     def get_device_info(self, user_agent):
@@ -126,28 +143,33 @@ class UserLogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        try:
-            refresh_token = request.data.get('refresh_token')
-            if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()
-            
-            # Deactivate user sessions
-            UserSession.objects.filter(
-                user=request.user,
-                is_active=True
-            ).update(is_active=False)
-            
-            logger.info(f"User logged out: {request.user.email}")
-            
-            return Response({
-                'message': 'Logout successful'
-            }, status=status.HTTP_200_OK)
+        # Blacklisting needs Redis: without it TokenStateUnavailable answers 503
+        # rather than reporting a logout whose tokens still work
+        refresh_token = request.data.get('refresh_token')
+        if refresh_token:
+            try:
+                refresh = RefreshToken(refresh_token)
+            except TokenError:
+                return Response({
+                    'error': 'Invalid token'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            blacklist_token(refresh)
         
-        except Exception as e:
-            return Response({
-                'error': 'Invalid token'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # The access token of this request stops working too
+        blacklist_token(request.auth)
+        
+        # Deactivate user sessions
+        UserSession.objects.filter(
+            user_id=request.user.pk,
+            is_active=True
+        ).update(is_active=False)
+        invalidate_dashboard(request.user.pk)
+        
+        logger.info(f"User logged out: {request.user.pk}")
+        
+        return Response({
+            'message': 'Logout successful'
+        }, status=status.HTTP_200_OK)
 
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
@@ -158,23 +180,27 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # request.user only carries the token claims
+        return User.objects.select_related('profile').get(pk=self.request.user.pk)
     
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
         
-        # Update extended profile if provided
+        # Update extended profile if provided: the changes are written with the
+        # user, by the save_user_profile signal, in a single UPDATE of the profile
         profile_data = request.data.get('profile')
         if profile_data:
             profile_serializer = ExtendedUserProfileSerializer(
                 instance.profile, data=profile_data, partial=True
             )
             if profile_serializer.is_valid():
-                profile_serializer.save()
+                for attr, value in profile_serializer.validated_data.items():
+                    setattr(instance.profile, attr, value)
+        
+        self.perform_update(serializer)
         
         return Response(serializer.data)
 
@@ -186,9 +212,9 @@ class ChangePasswordView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
+        user = get_object_or_404(User, pk=request.user.pk)
+        serializer = ChangePasswordSerializer(data=request.data, context={'request': request, 'user': user})
         if serializer.is_valid():
-            user = request.user
             user.set_password(serializer.validated_data['new_password'])
             user.save()
             
@@ -208,14 +234,35 @@ class UserViewSet(ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserListSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
+    pagination_class = UserPagination
+    
+    @property
+    def paginator(self):
+        # Ranked search results have no keyset ordering to resume from: number their pages
+        if not hasattr(self, '_paginator') and self.request.query_params.get('search'):
+            self._paginator = PageNumberPagination()
+        return super().paginator
+    
+    def includes_profile(self):
+        """
+        Whether the serializer reads user.profile: detail views, and the list with ?include=profile
+        """
+        if self.action in ['retrieve', 'update', 'partial_update']:
+            return True
+        return self.action == 'list' and 'profile' in self.request.query_params.get('include', '').split(',')
     
     def get_serializer_class(self):
         if self.action in ['retrieve', 'update', 'partial_update']:
             return UserProfileDetailSerializer
+        if self.includes_profile():
+            return UserListProfileSerializer
         return UserListSerializer
     
     def get_queryset(self):
         queryset = User.objects.all()
+        # One-to-one: joined in the same query rather than one query per user
+        if self.includes_profile():
+            queryset = queryset.select_related('profile')
         role = self.request.query_params.get('role', None)
         search = self.request.query_params.get('search', None)
         
@@ -223,14 +270,10 @@ class UserViewSet(ModelViewSet):
             queryset = queryset.filter(role=role)
         
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(username__icontains=search)
-            )
+            # Ranked by relevance, diacritics ignored
+            return search_users(queryset, search)
         
-        return queryset.order_by('-created_at')
+        return queryset.order_by('-created_at', '-id')
     
     @action(detail=True, methods=['post'])
     def verify_user(self, request, pk=None):
@@ -252,29 +295,80 @@ class UserViewSet(ModelViewSet):
         user.is_active = False
         user.save()
         
+        # Reject the user's tokens now rather than when they expire
+        revoke_user_tokens(user)
+        
         logger.info(f"User deactivated: {user.email}")
         
         return Response({
             'message': f'User {user.email} has been deactivated'
         }, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Create users from an uploaded CSV or NDJSON file"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['No file was submitted.']}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or detect_format(upload.name)
+        if file_format not in FORMATS:
+            return Response({
+                'file_format': [f"Must be one of: {', '.join(FORMATS)}."]
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Imported by a Celery worker from the stored upload, see users/bulk_import.py
+        job_id = uuid.uuid4().hex
+        path = default_storage.save(f'imports/{job_id}.{file_format}', upload)
+        job = set_import_job(job_id, status='queued', file_name=upload.name, requested_at=timezone.now().isoformat())
+        queue_or_run(import_user_file, job_id=job_id, path=path, file_format=file_format)
+        
+        logger.info(f"Bulk import {job_id} queued by {request.user.email}: {upload.name}")
+        
+        location = reverse('user-manage-import-status', args=[job_id], request=request)
+        return Response({**job, 'url': location}, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+    
+    @action(detail=False, methods=['get'], url_path=r'import/(?P<job_id>[0-9a-f]{32})',
+            permission_classes=[permissions.IsAuthenticated, IsAdmin])
+    def import_status(self, request, job_id=None):
+        """State of a bulk import: queued, running, finished or failed, with the counts and rejected rows"""
+        job = get_import_job(job_id)
+        if job is None:
+            raise Http404
+        return Response(job)
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsAdmin])
+    def export(self, request):
+        """Stream every user with their profile as NDJSON or CSV"""
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in EXPORT_FORMATS:
+            return Response({
+                'file_format': [f"Must be one of: {', '.join(EXPORT_FORMATS)}."]
+            }, status=status.HTTP_400_BAD_REQUEST)
+        columns, unknown = parse_fields(request.query_params.get('fields'))
+        if unknown:
+            return Response({
+                'fields': [f"Unknown fields: {', '.join(unknown)}."]
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = User.objects.all()
+        role = request.query_params.get('role', None)
+        if role:
+            queryset = queryset.filter(role=role)
+        
+        logger.info(f"User export by {request.user.email}: {file_format}, fields {','.join(columns)}")
+        
+        response = StreamingHttpResponse(
+            render_export(columns, export_rows(columns, queryset), file_format),
+            content_type=EXPORT_FORMATS[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="users-{timezone.now():%Y%m%d}.{file_format}"'
+        return response
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get user statistics"""
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        verified_users = User.objects.filter(is_verified=True).count()
-        
-        role_stats = {}
-        for role, _ in User.USER_ROLES:
-            role_stats[role] = User.objects.filter(role=role).count()
-        
-        return Response({
-            'total_users': total_users,
-            'active_users': active_users,
-            'verified_users': verified_users,
-            'role_statistics': role_stats
-        })
+        # Served from the Redis counters, see users/statistics.py
+        return Response(get_user_statistics())
 
 
 class UserSessionView(generics.ListAPIView):
@@ -283,28 +377,51 @@ class UserSessionView(generics.ListAPIView):
     """
     serializer_class = UserSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserSessionPagination
     
     def get_queryset(self):
-        return UserSession.objects.filter(user=self.request.user).order_by('-last_activity')
+        return UserSession.objects.filter(user_id=self.request.user.pk).order_by('-last_activity', '-id')
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def user_dashboard(request):
+def build_dashboard(user_id):
     """
-    User dashboard with basic information
+    The dashboard body from two queries, or None if the user does not exist
     """
-    user = request.user
+    # The profile fields and both session counts in one query
+    user = User.objects.annotate(
+        total_sessions=Count('sessions'),
+        active_sessions=Count('sessions', filter=Q(sessions__is_active=True)),
+    ).filter(pk=user_id).first()
+    if user is None:
+        return None
     recent_sessions = UserSession.objects.filter(
-        user=user, is_active=True
+        user_id=user_id, is_active=True
     ).order_by('-last_activity')[:5]
     
-    return Response({
+    return {
         'user': UserProfileSerializer(user).data,
         'recent_sessions': UserSessionSerializer(recent_sessions, many=True).data,
-        'total_sessions': UserSession.objects.filter(user=user).count(),
-        'active_sessions': UserSession.objects.filter(user=user, is_active=True).count(),
-    })
+        'total_sessions': user.total_sessions,
+        'active_sessions': user.active_sessions,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def user_dashboard(request):
+    """
+    User dashboard with basic information
+    """
+    # Served from the per-user cache entry, see users/dashboard.py
+    dashboard = get_dashboard(request.user.pk, build_dashboard)
+    if dashboard is None:
+        raise Http404
+    
+    headers = {'ETag': dashboard['etag'], 'Cache-Control': 'private, no-cache'}
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if '*' in if_none_match or dashboard['etag'] in [etag.removeprefix('W/') for etag in if_none_match]:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(dashboard['data'], headers=headers)
 
 
 @api_view(['GET'])
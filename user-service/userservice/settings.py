@@ -22,6 +22,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -79,6 +80,10 @@ DATABASES = {
     }
 }
 
+# The bench_* management commands create (and delete) rows; they only run against this database,
+# named again with --database. Empty: benchmarks are disabled
+BENCH_DB = config('BENCH_DB', default='')
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
@@ -98,6 +103,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# PASSWORD_HASHER ('argon2' or 'pbkdf2') hashes new passwords. Hashes made by the other hashers
+# or with other cost parameters are still accepted and re-hashed on the user's next login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='argon2')
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'users.hashers.ConfigurableArgon2PasswordHasher',
+    'pbkdf2': 'users.hashers.ConfigurablePBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+ARGON2_TIME_COST = config('ARGON2_TIME_COST', default=2, cast=int)
+ARGON2_MEMORY_COST = config('ARGON2_MEMORY_COST', default=19456, cast=int)  # KiB
+ARGON2_PARALLELISM = config('ARGON2_PARALLELISM', default=1, cast=int)
+PBKDF2_ITERATIONS = config('PBKDF2_ITERATIONS', default=600000, cast=int)
+
+# Hashes run on a per-process pool of PASSWORD_HASHING_WORKERS threads (0: in the request thread);
+# logins beyond PASSWORD_HASHING_MAX_PENDING queued hashes get 503 with Retry-After. The pool only
+# helps threaded / async gunicorn workers: a sync worker handles one request at a time, use 0 there.
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=os.cpu_count(), cast=int)
+PASSWORD_HASHING_MAX_PENDING = config('PASSWORD_HASHING_MAX_PENDING', default=64, cast=int)
+
 # Internationalization
 LANGUAGE_CODE = 'vi-vn'
 TIME_ZONE = 'Asia/Ho_Chi_Minh'
@@ -118,15 +149,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSONRenderer's bytes, encoded by orjson (users/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'users.renderers.ORJSONRenderer',
     ],
 }
 
@@ -135,6 +167,7 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    # Blacklisted JTIs are kept in Redis until the token expires (users.tokens.blacklist_token)
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
     'ALGORITHM': 'HS256',
@@ -152,6 +185,8 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'JTI_CLAIM': 'jti',
+    'TOKEN_USER_CLASS': 'users.authentication.ClaimsTokenUser',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.UserTokenRefreshSerializer',
 }
 
 # CORS settings
@@ -164,6 +199,21 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Cache (Redis): per-user token versions and the JWT blacklist, checked on every authenticated
+# request, and the user statistics counters (users/statistics.py)
+REDIS_CACHE_URL = config('REDIS_CACHE_URL', default='redis://redis:6379/1')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+    }
+}
+
+# manage.py test moves the cache to this Redis database and flushes it around every test
+# (users/testing.py); it must not be REDIS_CACHE_URL
+REDIS_TEST_CACHE_URL = config('REDIS_TEST_CACHE_URL', default='redis://redis:6379/15')
+TEST_RUNNER = 'users.testing.RedisTestRunner'
+
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://redis:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://redis:6379/0')
@@ -171,6 +221,46 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # Rebuild the user statistics counters in Redis from the users table
+    'reconcile-user-statistics': {
+        'task': 'users.tasks.reconcile_user_statistics',
+        'schedule': config('USER_STATISTICS_RECONCILE_SECONDS', default=300, cast=int),
+    },
+    # Delete expired user sessions, at most 100 batches per run
+    'purge-user-sessions': {
+        'task': 'users.tasks.purge_user_sessions',
+        'schedule': config('SESSION_PURGE_INTERVAL_SECONDS', default=3600, cast=int),
+    },
+}
+# Bulk imports run on their own worker (celery worker -Q imports --pool solo): tasks of a prefork
+# worker run in daemonic processes, which cannot start the pool that hashes the passwords
+CELERY_TASK_ROUTES = {
+    'users.tasks.import_user_file': {'queue': 'imports'},
+}
+
+# User sessions: sessions idle for SESSION_RETENTION_DAYS (never less than the refresh token
+# lifetime) are deleted SESSION_PURGE_BATCH_SIZE rows at a time; a login beyond
+# MAX_ACTIVE_SESSIONS_PER_USER active sessions signs out the least recently active (0: no limit)
+SESSION_RETENTION_DAYS = config('SESSION_RETENTION_DAYS', default=90, cast=int)
+SESSION_PURGE_BATCH_SIZE = config('SESSION_PURGE_BATCH_SIZE', default=5000, cast=int)
+MAX_ACTIVE_SESSIONS_PER_USER = config('MAX_ACTIVE_SESSIONS_PER_USER', default=10, cast=int)
+
+# Per-user dashboard cache entries are invalidated on changes, the timeout only bounds staleness
+# from changes that bypass the invalidation (users/dashboard.py)
+DASHBOARD_CACHE_SECONDS = config('DASHBOARD_CACHE_SECONDS', default=300, cast=int)
+
+# Bulk user import (users/bulk_import.py): API uploads are imported by a Celery task, rows written
+# BULK_IMPORT_CHUNK_SIZE at a time, passwords hashed on a pool of BULK_IMPORT_HASHING_WORKERS processes
+# kept by each worker process (0: in the importing process); the job state, with at most
+# BULK_IMPORT_MAX_ERRORS failed rows, stays in the cache for BULK_IMPORT_JOB_SECONDS
+BULK_IMPORT_CHUNK_SIZE = config('BULK_IMPORT_CHUNK_SIZE', default=1000, cast=int)
+BULK_IMPORT_HASHING_WORKERS = config('BULK_IMPORT_HASHING_WORKERS', default=os.cpu_count(), cast=int)
+BULK_IMPORT_MAX_ERRORS = config('BULK_IMPORT_MAX_ERRORS', default=1000, cast=int)
+BULK_IMPORT_JOB_SECONDS = config('BULK_IMPORT_JOB_SECONDS', default=86400, cast=int)
+
+# User export (users/export.py): rows fetched from the server-side cursor and sent per chunk
+USER_EXPORT_CHUNK_SIZE = config('USER_EXPORT_CHUNK_SIZE', default=2000, cast=int)
 
 # Logging
 LOGGING = {